@@ -0,0 +1,91 @@
+"""Benchmark SendStateStore.cleanup_missing against the old Python-side diff.
+
+Usage: python benchmarks/bench_cleanup_missing.py [rows ...]
+"""
+from __future__ import annotations
+
+import os
+import sys
+import tempfile
+import threading
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from watcher.config import StateConfig  # noqa: E402
+from watcher.state import SendStateStore  # noqa: E402
+
+
+class _TimedLock:
+    """Lock wrapper that records the longest single hold."""
+
+    def __init__(self) -> None:
+        self._lock = threading.Lock()
+        self._acquired_at = 0.0
+        self.max_hold = 0.0
+
+    def __enter__(self):
+        self._lock.acquire()
+        self._acquired_at = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc):
+        self.max_hold = max(self.max_hold, time.perf_counter() - self._acquired_at)
+        self._lock.release()
+
+
+def legacy_cleanup_missing(store: SendStateStore, known_paths: set[str]) -> int:
+    """The previous implementation: copy every path into Python and diff there."""
+    with store._lock:
+        rows = store._conn.execute(
+            "SELECT s.rowid, d.path, s.filename FROM screenshots s JOIN dirs d ON d.id = s.dir_id"
+        ).fetchall()
+        removable = [r["rowid"] for r in rows if os.path.join(r["path"], r["filename"]) not in known_paths]
+        if not removable:
+            return 0
+        with store._conn:
+            store._conn.executemany("DELETE FROM screenshots WHERE rowid = ?", [(rowid,) for rowid in removable])
+        return len(removable)
+
+
+def _populate(store: SendStateStore, rows: int) -> set[str]:
+    # Files older than the DB are registered as sent, newer ones as pending
+    old, new = 0.0, time.time() + 3600
+    data = []
+    for i in range(rows):
+        pending = i % 10 == 0
+        path = f"/screenshots/{100 + i % 500}/screenshots/{i:08d}_{'pending' if pending else 'sent'}.png"
+        data.append((path, new if pending else old))
+    store.preregister_startup(data)
+    # Drop 1% of pending files from disk
+    return {path for i, (path, mtime) in enumerate(data) if not (mtime == new and i % 1000 == 0)}
+
+
+def _run(rows: int, use_legacy: bool) -> tuple[float, float, int]:
+    with tempfile.TemporaryDirectory() as tmp:
+        store = SendStateStore(StateConfig(file_path=os.path.join(tmp, "state.db")))
+        known = _populate(store, rows)
+        store._lock = _TimedLock()
+        started = time.perf_counter()
+        if use_legacy:
+            removed = legacy_cleanup_missing(store, known)
+        else:
+            removed = store.cleanup_missing(known)
+        elapsed = time.perf_counter() - started
+        max_hold = store._lock.max_hold
+        store._lock = threading.Lock()
+        store.close()
+        return elapsed, max_hold, removed
+
+
+def main() -> None:
+    sizes = [int(a) for a in sys.argv[1:]] or [10_000, 100_000, 1_000_000]
+    print(f"{'rows':>10} {'variant':>8} {'total s':>9} {'max lock s':>11} {'removed':>8}")
+    for rows in sizes:
+        for name, legacy in (("legacy", True), ("sql", False)):
+            elapsed, max_hold, removed = _run(rows, legacy)
+            print(f"{rows:>10} {name:>8} {elapsed:>9.3f} {max_hold:>11.3f} {removed:>8}")
+
+
+if __name__ == "__main__":
+    main()
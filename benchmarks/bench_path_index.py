@@ -0,0 +1,90 @@
+"""Benchmark the memory of the scan snapshot against a set of full paths plus an mtime dict.
+
+Usage: python benchmarks/bench_path_index.py [files ...]
+"""
+from __future__ import annotations
+
+import gc
+import os
+import sys
+import time
+import tracemalloc
+from typing import Iterator
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from watcher.scanner import FileList, FileStat, ScanSnapshot, _DirState  # noqa: E402
+
+FILES_PER_GAME = 500
+LOOKUPS = 100_000
+
+
+def _listing(files: int) -> Iterator[tuple[str, list[tuple[str, FileStat]]]]:
+    """Yield one directory listing at a time, as the scanner produces them."""
+    for start in range(0, files, FILES_PER_GAME):
+        directory = f"/screenshots/remote/{1_000_000 + start // FILES_PER_GAME}/screenshots"
+        yield directory, [
+            (f"2024{i:010d}_1.jpg", FileStat(2_000_000 + i, 1_700_000_000_000_000_000 + i))
+            for i in range(start, min(files, start + FILES_PER_GAME))
+        ]
+
+
+def legacy_index(files: int):
+    """The original startup structures: every full path in a set, mtimes in a parallel dict."""
+    paths: set[str] = set()
+    mtimes: dict[str, float] = {}
+    for directory, entries in _listing(files):
+        for name, stat in entries:
+            path = os.path.join(directory, name)
+            paths.add(path)
+            mtimes[path] = stat.mtime_ns / 1e9
+    return paths, mtimes
+
+
+def dict_index(files: int):
+    """The previous snapshot: per directory, a dict of filename -> FileStat."""
+    return {directory: dict(entries) for directory, entries in _listing(files)}
+
+
+def compact_index(files: int):
+    return ScanSnapshot(
+        {directory: _DirState(0, None, FileList(entries), ()) for directory, entries in _listing(files)}
+    )
+
+
+def _retained(build, files: int) -> tuple[object, float]:
+    gc.collect()
+    tracemalloc.start()
+    index = build(files)
+    current, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return index, current / 1024 / 1024
+
+
+def _contains(index, path: str) -> bool:
+    if isinstance(index, tuple):
+        return path in index[0]
+    if isinstance(index, dict):
+        directory, name = os.path.split(path)
+        files = index.get(directory)
+        return files is not None and name in files
+    return path in index
+
+
+def main() -> None:
+    sizes = [int(a) for a in sys.argv[1:]] or [100_000, 1_000_000]
+    print(f"{'files':>8} {'variant':>8} {'MB':>8} {'lookup us':>10}")
+    for files in sizes:
+        probes = [os.path.join(d, name) for d, entries in _listing(files) for name, _ in entries]
+        probes = probes[:: max(1, len(probes) // LOOKUPS)]
+        for name, build in (("legacy", legacy_index), ("dict", dict_index), ("compact", compact_index)):
+            index, size = _retained(build, files)
+            started = time.perf_counter()
+            assert all(_contains(index, p) for p in probes)
+            per_lookup = (time.perf_counter() - started) / len(probes) * 1e6
+            print(f"{files:>8} {name:>8} {size:>8.1f} {per_lookup:>10.2f}")
+            del index
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,78 @@
+"""Benchmark the startup scan against the old os.walk + per-file stat pass.
+
+Usage: python benchmarks/bench_scan.py [files ...]
+"""
+from __future__ import annotations
+
+import os
+import sys
+import tempfile
+import time
+import tracemalloc
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from watcher.paths import extract_appid_from_path, is_screenshot_file, is_thumbnail_path  # noqa: E402
+from watcher.scanner import ScreenshotScanner  # noqa: E402
+
+FILES_PER_GAME = 500
+
+
+def legacy_scan(root: str) -> tuple[set[str], dict[str, float], set[str]]:
+    """The previous startup: walk, classify every full path, then stat every file."""
+    paths: set[str] = set()
+    for dirpath, _, filenames in os.walk(root):
+        for name in filenames:
+            path = os.path.join(dirpath, name)
+            if is_screenshot_file(path) and not is_thumbnail_path(path):
+                paths.add(path)
+    mtimes: dict[str, float] = {}
+    for path in paths:
+        try:
+            mtimes[path] = os.path.getmtime(path)
+        except OSError:
+            mtimes[path] = 0.0
+    appids = {appid for appid in map(extract_appid_from_path, paths) if appid}
+    return paths, mtimes, appids
+
+
+def single_pass_scan(root: str) -> tuple[int, int, set[str]]:
+    snapshot = ScreenshotScanner(root).scan(full=True)
+    mtimes = sum(1 for _ in snapshot.stats())
+    return len(snapshot), mtimes, snapshot.appids()
+
+
+def _build_tree(root: str, files: int) -> None:
+    for i in range(files):
+        game = os.path.join(root, str(1000 + i // FILES_PER_GAME), "screenshots")
+        if i % FILES_PER_GAME == 0:
+            os.makedirs(os.path.join(game, "thumbnails"))
+        open(os.path.join(game, f"{i:08d}.png"), "wb").close()
+        open(os.path.join(game, "thumbnails", f"{i:08d}.jpg"), "wb").close()
+
+
+def _measure(fn, root: str) -> tuple[float, float]:
+    started = time.perf_counter()
+    fn(root)
+    elapsed = time.perf_counter() - started
+    # Memory is traced in a second run, tracing slows the timed one down
+    tracemalloc.start()
+    fn(root)
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return elapsed, peak / 1024 / 1024
+
+
+def main() -> None:
+    sizes = [int(a) for a in sys.argv[1:]] or [10_000, 100_000]
+    print(f"{'files':>8} {'variant':>12} {'total s':>8} {'peak MB':>8}")
+    for files in sizes:
+        with tempfile.TemporaryDirectory() as tmp:
+            _build_tree(tmp, files)
+            for name, fn in (("legacy", legacy_scan), ("single-pass", single_pass_scan)):
+                elapsed, peak = _measure(fn, tmp)
+                print(f"{files:>8} {name:>12} {elapsed:>8.3f} {peak:>8.1f}")
+
+
+if __name__ == "__main__":
+    main()
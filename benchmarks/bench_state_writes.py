@@ -0,0 +1,107 @@
+"""Benchmark state transitions per second: legacy per-call commits vs the upsert write path.
+
+Each screenshot goes through mark_discovered -> mark_failed -> mark_sent.
+
+Usage: python benchmarks/bench_state_writes.py [screenshots ...]
+"""
+from __future__ import annotations
+
+import os
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from watcher.config import RETRY_INTERVAL_SECONDS, RETRY_MAX_INTERVAL_SECONDS, StateConfig  # noqa: E402
+from watcher.state import STATUS_PENDING, STATUS_SENT, SendStateStore  # noqa: E402
+
+
+class LegacyWrites:
+    """The previous write path: read-then-write under the lock, one fsync'd commit per call.
+
+    Ported to the dirs/filename schema so it runs against the current store.
+    """
+
+    def __init__(self, store: SendStateStore) -> None:
+        self._store = store
+        self._conn = store._conn
+        self._conn.execute("PRAGMA synchronous=FULL")
+
+    def _key(self, path: str) -> tuple[int, str]:
+        return self._store._dir_id(os.path.dirname(path)), os.path.basename(path)
+
+    def mark_discovered(self, path: str) -> bool:
+        now = time.time()
+        with self._store._lock:
+            key = self._key(path)
+            row = self._conn.execute(
+                "SELECT status FROM screenshots WHERE dir_id = ? AND filename = ?", key
+            ).fetchone()
+            if row and row["status"] == STATUS_SENT:
+                return False
+            if row is None:
+                with self._conn:
+                    self._conn.execute(
+                        """INSERT INTO screenshots (dir_id, filename, status, first_seen_at, next_retry_at, attempts)
+                           VALUES (?, ?, ?, ?, ?, 0)""",
+                        (*key, STATUS_PENDING, now, now),
+                    )
+            return True
+
+    def mark_failed(self, path: str, error: str) -> float:
+        now = time.time()
+        with self._store._lock:
+            key = self._key(path)
+            row = self._conn.execute(
+                "SELECT attempts FROM screenshots WHERE dir_id = ? AND filename = ?", key
+            ).fetchone()
+            attempts = (int(row["attempts"]) if row else 0) + 1
+            next_retry_at = now + min(RETRY_MAX_INTERVAL_SECONDS, RETRY_INTERVAL_SECONDS * (2 ** (attempts - 1)))
+            with self._conn:
+                self._conn.execute(
+                    """UPDATE screenshots SET status=?, last_attempt_at=?, next_retry_at=?,
+                       attempts=?, last_error=? WHERE dir_id = ? AND filename = ?""",
+                    (STATUS_PENDING, now, next_retry_at, attempts, error, *key),
+                )
+            return next_retry_at
+
+    def mark_sent(self, path: str) -> None:
+        now = time.time()
+        with self._store._lock:
+            key = self._key(path)
+            with self._conn:
+                self._conn.execute(
+                    """UPDATE screenshots SET status=?, last_attempt_at=?, next_retry_at=NULL, sent_at=?
+                       WHERE dir_id = ? AND filename = ?""",
+                    (STATUS_SENT, now, now, *key),
+                )
+
+
+def _run(count: int, variant: str) -> float:
+    with tempfile.TemporaryDirectory() as tmp:
+        durability = "batched" if variant == "batched" else "immediate"
+        store = SendStateStore(StateConfig(file_path=os.path.join(tmp, "state.db")), durability=durability)
+        writes = LegacyWrites(store) if variant == "legacy" else store
+        started = time.perf_counter()
+        for i in range(count):
+            path = f"/screenshots/730/screenshots/{i:08d}.png"
+            writes.mark_discovered(path)
+            writes.mark_failed(path, "timeout")
+            writes.mark_sent(path)
+        store.flush()
+        elapsed = time.perf_counter() - started
+        store.close()
+        return count * 3 / elapsed
+
+
+def main() -> None:
+    sizes = [int(a) for a in sys.argv[1:]] or [2_000]
+    print(f"{'screenshots':>11} {'variant':>10} {'transitions/s':>14}")
+    for count in sizes:
+        for variant in ("legacy", "immediate", "batched"):
+            print(f"{count:>11} {variant:>10} {_run(count, variant):>14.0f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,122 @@
+import json
+import os
+import threading
+import time
+
+import pytest
+
+from watcher import applist
+from watcher.applist import AppListIndex, compile_app_list
+
+
+def _write_dump(path, apps):
+    path.write_text(json.dumps({"applist": {"apps": apps}}), encoding="utf-8")
+
+
+@pytest.fixture
+def dump(tmp_path):
+    path = tmp_path / "applist.json"
+    _write_dump(
+        path,
+        [
+            {"appid": 730, "name": "Counter-Strike 2"},
+            {"appid": 10, "name": "Counter-Strike"},
+            {"appid": 1145360, "name": "Hadès"},
+            {"appid": 20, "name": ""},
+            {"appid": 730, "name": "Duplicate"},
+        ],
+    )
+    return path
+
+
+@pytest.fixture
+def index(dump, tmp_path):
+    idx = AppListIndex(str(dump), str(tmp_path / "applist.idx"))
+    yield idx
+    idx.close()
+
+
+class TestCompileAppList:
+    def test_counts_named_unique_apps(self, dump, tmp_path):
+        assert compile_app_list(str(dump), str(tmp_path / "out.idx")) == 3
+
+
+class TestAppListIndex:
+    def test_lookup_hits(self, index):
+        assert index.lookup("10") == "Counter-Strike"
+        assert index.lookup("730") == "Counter-Strike 2"
+        assert index.lookup("1145360") == "Hadès"
+
+    def test_lookup_misses(self, index):
+        assert index.lookup("20") is None
+        assert index.lookup("5") is None
+        assert index.lookup("999999999") is None
+        assert index.lookup("not-a-number") is None
+
+    def test_lazy_until_first_lookup(self, index, tmp_path):
+        assert not (tmp_path / "applist.idx").exists()
+        index.lookup("10")
+        assert (tmp_path / "applist.idx").exists()
+
+    def test_reuses_compiled_index(self, dump, tmp_path):
+        compile_app_list(str(dump), str(tmp_path / "applist.idx"))
+        mtime = os.stat(tmp_path / "applist.idx").st_mtime_ns
+        idx = AppListIndex(str(dump), str(tmp_path / "applist.idx"))
+        assert idx.lookup("730") == "Counter-Strike 2"
+        idx.close()
+        assert os.stat(tmp_path / "applist.idx").st_mtime_ns == mtime
+
+    def test_recompiles_when_dump_changes(self, dump, tmp_path):
+        compile_app_list(str(dump), str(tmp_path / "applist.idx"))
+        _write_dump(dump, [{"appid": 570, "name": "Dota 2"}])
+        idx = AppListIndex(str(dump), str(tmp_path / "applist.idx"))
+        assert idx.lookup("570") == "Dota 2"
+        assert idx.lookup("730") is None
+        idx.close()
+
+    def test_missing_dump_returns_none(self, tmp_path):
+        idx = AppListIndex(str(tmp_path / "nope.json"), str(tmp_path / "applist.idx"))
+        assert idx.lookup("730") is None
+        idx.close()
+
+    def test_corrupt_dump_returns_none(self, tmp_path):
+        (tmp_path / "bad.json").write_text("{not json", encoding="utf-8")
+        idx = AppListIndex(str(tmp_path / "bad.json"), str(tmp_path / "applist.idx"))
+        assert idx.lookup("730") is None
+        idx.close()
+
+    def test_lookups_during_compile_wait_for_it(self, dump, tmp_path, monkeypatch):
+        compile_started = threading.Event()
+
+        def slow_compile(source_path, index_path):
+            compile_started.set()
+            time.sleep(0.2)
+            return compile_app_list(source_path, index_path)
+
+        monkeypatch.setattr(applist, "compile_app_list", slow_compile)
+        idx = AppListIndex(str(dump), str(tmp_path / "applist.idx"))
+        results = []
+        first = threading.Thread(target=lambda: results.append(idx.lookup("730")))
+        first.start()
+        compile_started.wait(5)
+        results.append(idx.lookup("10"))
+        first.join()
+        idx.close()
+        assert sorted(results) == ["Counter-Strike", "Counter-Strike 2"]
+
+    def test_failed_load_is_retried_once_the_dump_changes(self, tmp_path):
+        dump = tmp_path / "applist.json"
+        dump.write_text("{not json", encoding="utf-8")
+        idx = AppListIndex(str(dump), str(tmp_path / "applist.idx"))
+        assert idx.lookup("730") is None
+        _write_dump(dump, [{"appid": 730, "name": "Counter-Strike 2"}])
+        assert idx.lookup("730") == "Counter-Strike 2"
+        idx.close()
+
+    def test_missing_dump_is_loaded_once_it_appears(self, tmp_path):
+        dump = tmp_path / "applist.json"
+        idx = AppListIndex(str(dump), str(tmp_path / "applist.idx"))
+        assert idx.lookup("730") is None
+        _write_dump(dump, [{"appid": 730, "name": "Counter-Strike 2"}])
+        assert idx.lookup("730") == "Counter-Strike 2"
+        idx.close()
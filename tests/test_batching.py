@@ -0,0 +1,42 @@
+from watcher.batching import AlbumBatcher
+
+
+class TestAlbumBatcher:
+    def test_lone_path_is_released_at_once(self):
+        batcher = AlbumBatcher(window=3.0, max_items=10)
+        assert batcher.add("730", "/a.png", now=100.0) == ["/a.png"]
+        assert batcher.next_deadline() is None
+        assert batcher.add("730", "/b.png", now=103.0) == ["/b.png"]
+
+    def test_second_path_opens_the_window(self):
+        batcher = AlbumBatcher(window=3.0, max_items=10)
+        assert batcher.add("730", "/a.png", now=100.0) == ["/a.png"]
+        assert batcher.add("730", "/b.png", now=101.0) is None
+        assert batcher.add("730", "/c.png", now=102.0) is None
+        assert batcher.next_deadline() == 104.0
+        assert batcher.pop_due(now=103.9) == []
+        assert batcher.pop_due(now=104.0) == [["/b.png", "/c.png"]]
+        assert len(batcher) == 0
+
+    def test_backlog_path_waits_for_the_window(self):
+        batcher = AlbumBatcher(window=3.0, max_items=10)
+        assert batcher.add("730", "/a.png", now=100.0, flush_lone=False) is None
+        assert batcher.add("730", "/b.png", now=101.0) is None
+        assert batcher.pop_due(now=103.0) == [["/a.png", "/b.png"]]
+
+    def test_full_batch_returned_immediately(self):
+        batcher = AlbumBatcher(window=3.0, max_items=2)
+        batcher.add("730", "/a.png", now=100.0)
+        batcher.add("730", "/b.png", now=100.5)
+        assert batcher.add("730", "/c.png", now=100.6) == ["/b.png", "/c.png"]
+        assert batcher.next_deadline() is None
+
+    def test_apps_are_batched_separately(self):
+        batcher = AlbumBatcher(window=3.0, max_items=10)
+        assert batcher.add("730", "/a.png", now=100.0) == ["/a.png"]
+        assert batcher.add("440", "/b.png", now=100.5) == ["/b.png"]
+        batcher.add("730", "/c.png", now=101.0)
+        batcher.add("440", "/d.png", now=102.0)
+        assert batcher.next_deadline() == 104.0
+        assert batcher.pop_due(now=104.5) == [["/c.png"]]
+        assert batcher.drain() == [["/d.png"]]
@@ -0,0 +1,27 @@
+from watcher.coalesce import EventCoalescer
+
+
+class TestEventCoalescer:
+    def test_repeated_events_within_ttl_are_merged(self):
+        coalescer = EventCoalescer(ttl=120.0)
+        assert coalescer.seen("/a.png", now=100.0) is False
+        assert coalescer.seen("/a.png", now=150.0) is True
+
+    def test_event_after_ttl_is_new(self):
+        coalescer = EventCoalescer(ttl=120.0)
+        coalescer.seen("/a.png", now=100.0)
+        assert coalescer.seen("/a.png", now=221.0) is False
+
+    def test_expired_entries_are_dropped(self):
+        coalescer = EventCoalescer(ttl=10.0)
+        for i in range(100):
+            coalescer.seen(f"/{i}.png", now=float(i))
+        coalescer.seen("/last.png", now=200.0)
+        assert len(coalescer) == 1
+
+    def test_rename_carries_entry_to_new_path(self):
+        coalescer = EventCoalescer(ttl=120.0)
+        coalescer.seen("/a.png", now=100.0)
+        coalescer.rename("/a.png", "/b.png", now=101.0)
+        assert coalescer.seen("/b.png", now=102.0) is True
+        assert coalescer.seen("/a.png", now=102.0) is False
@@ -61,3 +61,20 @@ class TestLoadAppConfigValues:
         with patch.dict(os.environ, env, clear=True):
             config = load_app_config()
         assert config.state.file_path == "/tmp/custom.db"
+
+    def test_steam_app_list_none_by_default(self):
+        with patch.dict(os.environ, BASE_ENV, clear=True):
+            config = load_app_config()
+        assert config.steam.app_list_file is None
+
+    def test_steam_app_list_loaded(self):
+        env = {**BASE_ENV, "STEAM_APP_LIST_FILE": "/state/applist.json"}
+        with patch.dict(os.environ, env, clear=True):
+            config = load_app_config()
+        assert config.steam.app_list_file == "/state/applist.json"
+
+    def test_steam_shortcuts_loaded(self):
+        env = {**BASE_ENV, "STEAM_SHORTCUTS_FILE": "/steam-config/shortcuts.vdf"}
+        with patch.dict(os.environ, env, clear=True):
+            config = load_app_config()
+        assert config.steam.shortcuts_file == "/steam-config/shortcuts.vdf"
@@ -0,0 +1,309 @@
+import os
+import threading
+import time
+from unittest.mock import MagicMock
+
+import pytest
+from watchdog.events import FileClosedEvent, FileCreatedEvent, FileMovedEvent
+
+from watcher import handler as handler_module
+from watcher.config import AppConfig, StateConfig, SteamConfig, TelegramConfig
+from watcher.handler import _CLOSED, _WAKEUP, ScreenshotHandler
+from watcher.lanes import LANE_STARTUP
+from watcher.state import STATUS_PENDING, STATUS_SENT
+
+
+@pytest.fixture
+def make_handler(tmp_path, monkeypatch):
+    """Build handlers with a stubbed Telegram sender and Steam resolver."""
+    monkeypatch.setattr(handler_module, "TRANSCODE_ENABLED", False)
+    monkeypatch.setattr(handler_module, "FILE_READY_DELAY_SECONDS", 0.05)
+    steam = MagicMock()
+    steam.resolve_game_name.return_value = None
+    monkeypatch.setattr(handler_module, "SteamResolver", lambda *args: steam)
+    handlers = []
+
+    def make(results=None, **constants):
+        for name, value in constants.items():
+            monkeypatch.setattr(handler_module, name, value)
+        telegram = MagicMock()
+        telegram.send_media_group.side_effect = results or (lambda paths, caption: [True] * len(paths))
+        monkeypatch.setattr(handler_module, "TelegramSender", lambda config: telegram)
+        config = AppConfig(
+            screenshot_dir=str(tmp_path / "screenshots"),
+            telegram=TelegramConfig(bot_token="test_token", chat_id="123456", proxy_url=None),
+            state=StateConfig(file_path=str(tmp_path / "state.db")),
+            steam=SteamConfig(app_list_file=None, shortcuts_file=None),
+        )
+        h = ScreenshotHandler(config)
+        handlers.append(h)
+        return h
+
+    yield make
+    for h in handlers:
+        if h._stop_event.is_set():
+            continue  # closed by the test
+        if h._maintenance_worker.ident is not None:
+            h.close()
+        else:
+            h._state.close()
+
+
+@pytest.fixture
+def shots(tmp_path):
+    """Create distinct screenshots of app 730; returns their paths."""
+    directory = tmp_path / "screenshots" / "remote" / "730" / "screenshots"
+    directory.mkdir(parents=True)
+
+    def create(*names):
+        paths = []
+        for name in names:
+            path = directory / name
+            path.write_bytes(name.encode().ljust(2048, b"x"))
+            paths.append(str(path))
+        return paths
+
+    return create
+
+
+def _row(h, path):
+    """(status, attempts, last_error) of the row for ``path``, or None."""
+    directory, filename = os.path.split(path)
+    row = h._state._conn.execute(
+        """SELECT s.status, s.attempts, s.last_error FROM screenshots s JOIN dirs d ON d.id = s.dir_id
+           WHERE d.path = ? AND s.filename = ?""",
+        (directory, filename),
+    ).fetchone()
+    return tuple(row) if row else None
+
+
+def _wait_until(condition, timeout=5.0):
+    deadline = time.monotonic() + timeout
+    while not condition():
+        if time.monotonic() > deadline:
+            raise AssertionError("condition not met in time")
+        time.sleep(0.01)
+
+
+class TestSendBatch:
+    def test_mixed_results_mark_sent_or_schedule_retry(self, make_handler, shots):
+        h = make_handler(results=lambda paths, caption: [True, False, True])
+        a, b, c = shots("a.jpg", "b.jpg", "c.jpg")
+        for path in (a, b, c):
+            h._state.mark_discovered(path)
+        h._send_batch([a, b, c])
+        assert _row(h, a)[0] == STATUS_SENT
+        assert _row(h, c)[0] == STATUS_SENT
+        assert _row(h, b) == (STATUS_PENDING, 1, "telegram send returned false")
+        assert h._state.next_retry_at() is not None
+        assert h._retry_wakeup.is_set()
+
+    def test_sender_exception_schedules_retry_for_every_path(self, make_handler, shots):
+        h = make_handler(results=RuntimeError("connection reset"))
+        a, b = shots("a.jpg", "b.jpg")
+        for path in (a, b):
+            h._state.mark_discovered(path)
+        h._send_batch([a, b])
+        assert _row(h, a) == (STATUS_PENDING, 1, "connection reset")
+        assert _row(h, b) == (STATUS_PENDING, 1, "connection reset")
+
+    def test_untracked_path_is_not_given_a_row(self, make_handler, shots):
+        h = make_handler(results=lambda paths, caption: [False])
+        (a,) = shots("a.jpg")
+        h._send_batch([a])
+        assert _row(h, a) is None
+
+
+class TestAlbums:
+    def test_lone_live_shot_is_sent_without_waiting_for_the_window(self, make_handler, shots):
+        h = make_handler(ALBUM_WINDOW_SECONDS=30.0)
+        h.start()
+        (a,) = shots("a.jpg")
+        h._on_file_event(a)
+        _wait_until(lambda: _row(h, a)[0] == STATUS_SENT)
+        h._telegram.send_media_group.assert_called_once_with([a], "App 730")
+
+    def test_burst_is_sent_as_one_album(self, make_handler, shots):
+        h = make_handler(ALBUM_WINDOW_SECONDS=0.5)
+        h.start()
+        a, b, c = shots("a.jpg", "b.jpg", "c.jpg")
+        for path in (a, b, c):
+            h._on_file_event(path)
+        _wait_until(lambda: all(_row(h, path)[0] == STATUS_SENT for path in (a, b, c)))
+        # The first shot goes out alone before the burst is recognised; the rest share one album
+        batches = [call.args[0] for call in h._telegram.send_media_group.call_args_list]
+        assert batches == [[a], [b, c]]
+
+
+class TestShutdown:
+    def test_close_wakes_idle_workers(self, make_handler):
+        h = make_handler()
+        h.start()
+        assert h._reconciled.wait(5)
+        started = time.monotonic()
+        h.close()
+        assert time.monotonic() - started < 1.0
+        workers = [h._pipeline_worker, h._retry_worker, h._maintenance_worker, *h._send_workers]
+        assert not any(worker.is_alive() for worker in workers)
+
+    def test_close_joins_the_steam_warmup_before_closing_the_store(self, make_handler):
+        h = make_handler()
+        finished = []
+
+        def warm(appids, stop):
+            stop.wait(5)
+            time.sleep(0.1)  # the lookup in flight when close() is called
+            h._state.get_app_name("730")  # raises once the store is closed
+            finished.append(True)
+
+        h._steam.warm.side_effect = warm
+        h.start()
+        assert h._reconciled.wait(5)
+        h.close()
+        assert finished == [True]
+        assert not h._warm_worker.is_alive()
+
+
+class TestEvents:
+    @staticmethod
+    def _track_indexing(h):
+        """Record, for each path added to the scan index, whether it had a state row then."""
+        had_row = []
+        add = h._scanner.add
+
+        def checked_add(path):
+            had_row.append(_row(h, path) is not None)
+            add(path)
+
+        h._scanner.add = checked_add
+        return had_row
+
+    def test_close_without_create_is_tracked_before_indexing(self, make_handler, shots):
+        h = make_handler()
+        (a,) = shots("a.jpg")
+        had_row = self._track_indexing(h)
+        h.on_closed(FileClosedEvent(a))
+        assert had_row == [True]
+        assert _row(h, a)[0] == STATUS_PENDING
+        assert a in h._queued_paths
+
+    def test_file_moved_into_place_is_tracked_before_indexing(self, make_handler, shots):
+        h = make_handler()
+        (a,) = shots("a.jpg")
+        had_row = self._track_indexing(h)
+        h.on_moved(FileMovedEvent(a + ".tmp", a))
+        assert had_row == [True]
+        assert _row(h, a)[0] == STATUS_PENDING
+
+    def test_renamed_row_moves_before_indexing(self, make_handler, shots):
+        h = make_handler()
+        a, b = shots("a.jpg", "b.jpg")
+        h._state.mark_sent(a)
+        had_row = self._track_indexing(h)
+        h.on_moved(FileMovedEvent(a, b))
+        assert had_row == [True]
+        assert _row(h, a) is None
+        assert _row(h, b)[0] == STATUS_SENT
+
+
+class TestBacklog:
+    def test_backlog_path_waits_for_room(self, make_handler, shots):
+        h = make_handler(SEND_BACKLOG_MAX_PATHS=2)
+        a, b, c = shots("a.jpg", "b.jpg", "c.jpg")
+        h._enqueue(a, LANE_STARTUP)
+        h._enqueue(b, LANE_STARTUP)
+        admitted = []
+        waiter = threading.Thread(target=lambda: admitted.append(h._wait_for_capacity(c)))
+        waiter.start()
+        waiter.join(0.2)
+        assert waiter.is_alive()
+        h._release([a])
+        waiter.join(5)
+        assert admitted == [True]
+
+    def test_path_already_in_flight_is_not_held_back(self, make_handler, shots):
+        h = make_handler(SEND_BACKLOG_MAX_PATHS=1)
+        (a,) = shots("a.jpg")
+        h._enqueue(a, LANE_STARTUP)
+        assert h._wait_for_capacity(a) is True
+
+    def test_close_wakes_a_backlog_wait(self, make_handler, shots):
+        h = make_handler(SEND_BACKLOG_MAX_PATHS=1, SHUTDOWN_DRAIN_SECONDS=0.1)
+        (a,) = shots("a.jpg")
+        h.start()
+        assert h._reconciled.wait(5)
+        with h._queue_lock:
+            h._queued_paths["/elsewhere/in-flight.jpg"] = LANE_STARTUP
+        closer = threading.Timer(0.1, h.close)
+        closer.start()
+        assert h._wait_for_capacity(a) is False
+        closer.join()
+
+    def test_row_sent_while_waiting_for_room_is_not_enqueued(self, make_handler, shots, monkeypatch):
+        h = make_handler()
+        a, b = shots("a.jpg", "b.jpg")
+        for path in (a, b):
+            h._state.mark_discovered(path)
+            h._scanner.add(path)
+        waited = []
+
+        def wait_for_capacity(path):
+            if path == a:
+                h._state.mark_sent(a)  # a live event sent it meanwhile
+            waited.append(path)
+            if len(waited) == 2:
+                h._stop_event.set()  # ends the retry loop after this pass
+                h._retry_wakeup.set()
+            return True
+
+        monkeypatch.setattr(h, "_wait_for_capacity", wait_for_capacity)
+        h._retry_loop()
+        assert sorted(waited) == [a, b]
+        assert h._queued_paths == {b: LANE_STARTUP}
+        assert _row(h, a)[0] == STATUS_SENT
+
+
+class TestStartupReconcile:
+    def test_files_seen_by_scan_and_live_events_are_enqueued_once(self, make_handler, shots):
+        h = make_handler(ALBUM_WINDOW_SECONDS=0.2)
+        # Created after the DB, so the scan treats them as taken while stopped
+        paths = shots("a.jpg", "b.jpg", "c.jpg")
+        scan = h._scanner.scan
+
+        def scan_racing_live_events():
+            known = scan()
+            # Live events for the same files land between the listing and preregistration
+            for path in paths:
+                h.on_created(FileCreatedEvent(path))
+                h.on_closed(FileClosedEvent(path))
+            return known
+
+        h._scanner.scan = scan_racing_live_events
+        intake = []
+        put = h._queue.put
+
+        def recording_put(item, lane):
+            if item[1] not in (_CLOSED, _WAKEUP):
+                intake.append(item[0])
+            put(item, lane)
+
+        h._queue.put = recording_put
+        passes = []
+        iter_due_pending = h._state.iter_due_pending
+
+        def recording_iter_due_pending(now):
+            yield from iter_due_pending(now)
+            passes.append(now)
+
+        h._state.iter_due_pending = recording_iter_due_pending
+        h.start()
+        # The retry loop's pass after the reconciliation must see them as well
+        _wait_until(
+            lambda: h._reconciled.is_set()
+            and len(passes) >= 2
+            and all(_row(h, path)[0] == STATUS_SENT for path in paths)
+            and not h._queued_paths
+        )
+        assert sorted(intake) == paths
+        sent = [path for call in h._telegram.send_media_group.call_args_list for path in call.args[0]]
+        assert sorted(sent) == paths
@@ -0,0 +1,18 @@
+from watcher.hashing import content_hash
+
+
+class TestContentHash:
+    def test_same_content_same_hash(self, tmp_path):
+        a = tmp_path / "a.png"
+        b = tmp_path / "b.png"
+        a.write_bytes(b"x" * 3_000_000)
+        b.write_bytes(b"x" * 3_000_000)
+        assert content_hash(str(a)) == content_hash(str(b))
+        assert len(content_hash(str(a))) == 32
+
+    def test_different_content_different_hash(self, tmp_path):
+        a = tmp_path / "a.png"
+        b = tmp_path / "b.png"
+        a.write_bytes(b"x" * 100)
+        b.write_bytes(b"y" * 100)
+        assert content_hash(str(a)) != content_hash(str(b))
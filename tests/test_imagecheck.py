@@ -0,0 +1,98 @@
+import struct
+import zlib
+
+import pytest
+
+from watcher.imagecheck import is_complete_image, jpeg_dimensions, png_dimensions
+
+
+def _chunk(chunk_type: bytes, data: bytes) -> bytes:
+    return struct.pack(">I", len(data)) + chunk_type + data + struct.pack(">I", zlib.crc32(chunk_type + data))
+
+
+def _png(width: int = 4, height: int = 4) -> bytes:
+    ihdr = struct.pack(">IIBBBBB", width, height, 8, 2, 0, 0, 0)
+    idat = zlib.compress(b"\x00" * (width * 3 + 1) * height)
+    return b"\x89PNG\r\n\x1a\n" + _chunk(b"IHDR", ihdr) + _chunk(b"IDAT", idat) + _chunk(b"IEND", b"")
+
+
+def _jpeg(width: int = 4, height: int = 4, sof: int = 0xC0, exif: bytes = b"") -> bytes:
+    app1 = b"\xff\xe1" + struct.pack(">H", len(exif) + 2) + exif
+    frame = b"\xff" + bytes([sof]) + struct.pack(">HBHHB", 11, 8, height, width, 1) + b"\x01\x11\x00"
+    return b"\xff\xd8" + app1 + frame + b"\xff\xda" + b"x" * 64 + b"\xff\xd9"
+
+
+def _check(tmp_path, data: bytes):
+    path = tmp_path / "shot"
+    path.write_bytes(data)
+    return is_complete_image(str(path), len(data))
+
+
+class TestPng:
+    def test_complete_png(self, tmp_path):
+        assert _check(tmp_path, _png()) is True
+
+    def test_truncated_png(self, tmp_path):
+        assert _check(tmp_path, _png()[:-6]) is False
+
+    def test_zero_padded_png(self, tmp_path):
+        assert _check(tmp_path, _png() + b"\x00" * 64) is False
+
+    def test_bad_ihdr_crc(self, tmp_path):
+        data = bytearray(_png())
+        data[20] ^= 0xFF
+        assert _check(tmp_path, bytes(data)) is False
+
+    def test_header_only(self, tmp_path):
+        assert _check(tmp_path, _png()[:20]) is False
+
+
+class TestJpeg:
+    def test_complete_jpeg(self, tmp_path):
+        assert _check(tmp_path, b"\xff\xd8" + b"x" * 100 + b"\xff\xd9") is True
+
+    def test_truncated_jpeg(self, tmp_path):
+        assert _check(tmp_path, b"\xff\xd8" + b"x" * 100) is False
+
+
+class TestUnknown:
+    @pytest.mark.parametrize("data", [b"", b"GIF89a" + b"x" * 100])
+    def test_unverifiable_returns_none(self, tmp_path, data):
+        assert _check(tmp_path, data) is None
+
+    def test_missing_file(self, tmp_path):
+        assert is_complete_image(str(tmp_path / "nope.png"), 100) is False
+
+
+class TestPngDimensions:
+    def test_reads_ihdr(self, tmp_path):
+        path = tmp_path / "shot.png"
+        path.write_bytes(_png(width=7, height=3))
+        assert png_dimensions(str(path)) == (7, 3)
+
+    def test_non_png_returns_none(self, tmp_path):
+        path = tmp_path / "shot.jpg"
+        path.write_bytes(b"\xff\xd8" + b"x" * 100)
+        assert png_dimensions(str(path)) is None
+
+
+class TestJpegDimensions:
+    def test_reads_baseline_frame_after_exif(self, tmp_path):
+        path = tmp_path / "shot.jpg"
+        path.write_bytes(_jpeg(width=2560, height=1600, exif=b"Exif\x00\x00" + b"e" * 4000))
+        assert jpeg_dimensions(str(path)) == (2560, 1600)
+
+    def test_reads_progressive_frame(self, tmp_path):
+        path = tmp_path / "shot.jpg"
+        path.write_bytes(_jpeg(width=7, height=3, sof=0xC2))
+        assert jpeg_dimensions(str(path)) == (7, 3)
+
+    def test_no_frame_before_scan_returns_none(self, tmp_path):
+        path = tmp_path / "shot.jpg"
+        path.write_bytes(b"\xff\xd8\xff\xda" + b"x" * 100)
+        assert jpeg_dimensions(str(path)) is None
+
+    def test_non_jpeg_returns_none(self, tmp_path):
+        path = tmp_path / "shot.png"
+        path.write_bytes(_png(width=7, height=3))
+        assert jpeg_dimensions(str(path)) is None
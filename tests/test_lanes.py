@@ -0,0 +1,101 @@
+import threading
+from queue import Empty
+
+import pytest
+
+from watcher.config import SEND_LANE_WEIGHTS
+from watcher.lanes import LANE_LIVE, LANE_RETRY, LANE_STARTUP, LaneQueue, higher_lane
+
+WEIGHTS = {LANE_LIVE: 4, LANE_STARTUP: 2, LANE_RETRY: 1}
+
+
+def _drain(queue, count):
+    return [queue.get(timeout=0) for _ in range(count)]
+
+
+class TestLaneQueue:
+    def test_single_lane_is_fifo(self):
+        queue = LaneQueue(WEIGHTS, log_interval=60)
+        for i in range(3):
+            queue.put(i, LANE_RETRY)
+        assert _drain(queue, 3) == [0, 1, 2]
+        assert queue.empty()
+
+    def test_live_item_overtakes_retry_backlog(self):
+        queue = LaneQueue(WEIGHTS, log_interval=60)
+        for i in range(100):
+            queue.put(f"retry-{i}", LANE_RETRY)
+        queue.get(timeout=0)
+        queue.put("fresh", LANE_LIVE)
+        assert queue.get(timeout=0) == "fresh"
+
+    def test_busy_lanes_share_by_weight(self):
+        queue = LaneQueue(WEIGHTS, log_interval=60)
+        for i in range(70):
+            for lane in (LANE_LIVE, LANE_STARTUP, LANE_RETRY):
+                queue.put(lane, lane)
+        taken = _drain(queue, 70)
+        assert taken.count(LANE_LIVE) == 40
+        assert taken.count(LANE_STARTUP) == 20
+        assert taken.count(LANE_RETRY) == 10
+        # Smooth round robin interleaves instead of serving lanes in runs
+        assert LANE_RETRY in taken[:7]
+
+    def test_idle_lane_does_not_bank_credit(self):
+        queue = LaneQueue(WEIGHTS, log_interval=60)
+        for i in range(20):
+            queue.put("retry", LANE_RETRY)
+        _drain(queue, 20)
+        for i in range(10):
+            queue.put("live", LANE_LIVE)
+            queue.put("retry", LANE_RETRY)
+        assert _drain(queue, 5).count("retry") == 1
+
+    def test_depths(self):
+        queue = LaneQueue(WEIGHTS, log_interval=60)
+        queue.put("a", LANE_LIVE)
+        queue.put("b", LANE_RETRY)
+        queue.put("c", LANE_RETRY)
+        assert queue.depths() == {LANE_LIVE: 1, LANE_STARTUP: 0, LANE_RETRY: 2}
+        assert len(queue) == 3
+
+    def test_get_times_out_when_empty(self):
+        with pytest.raises(Empty):
+            LaneQueue(WEIGHTS, log_interval=60).get(timeout=0.01)
+
+    def test_get_wakes_on_put(self):
+        queue = LaneQueue(WEIGHTS, log_interval=60)
+        timer = threading.Timer(0.05, queue.put, args=("late", LANE_STARTUP))
+        timer.start()
+        assert queue.get(timeout=5) == "late"
+        timer.join()
+
+    def test_close_drains_then_wakes_blocked_getters(self):
+        queue = LaneQueue(WEIGHTS, log_interval=60)
+        queue.put("last", LANE_RETRY)
+        queue.close()
+        assert queue.get() == "last"
+        with pytest.raises(Empty):
+            queue.get()
+
+    def test_close_wakes_blocked_get(self):
+        queue = LaneQueue(WEIGHTS, log_interval=60)
+        timer = threading.Timer(0.05, queue.close)
+        timer.start()
+        with pytest.raises(Empty):
+            queue.get()
+        timer.join()
+
+    def test_rejects_incomplete_weights(self):
+        with pytest.raises(ValueError):
+            LaneQueue({LANE_LIVE: 1}, log_interval=60)
+        with pytest.raises(ValueError):
+            LaneQueue({**WEIGHTS, LANE_RETRY: 0}, log_interval=60)
+
+    def test_configured_weights_are_valid(self):
+        assert LaneQueue(SEND_LANE_WEIGHTS, log_interval=60).empty()
+
+
+def test_higher_lane():
+    assert higher_lane(LANE_RETRY, LANE_LIVE) == LANE_LIVE
+    assert higher_lane(LANE_STARTUP, LANE_RETRY) == LANE_STARTUP
@@ -0,0 +1,58 @@
+from email.parser import BytesParser
+from email.policy import HTTP
+
+import pytest
+
+from watcher.multipart import MultipartEncoder
+
+
+def _parse(encoder: MultipartEncoder, chunk_size: int = 7) -> dict:
+    chunks = []
+    while chunk := encoder.read(chunk_size):
+        chunks.append(chunk)
+    body = b"".join(chunks)
+    assert len(body) == len(encoder)
+    message = BytesParser(policy=HTTP).parsebytes(
+        f"Content-Type: {encoder.content_type}\r\n\r\n".encode() + body
+    )
+    return {part.get_param("name", header="content-disposition"): part for part in message.iter_parts()}
+
+
+@pytest.fixture
+def image(tmp_path):
+    p = tmp_path / "shot.png"
+    p.write_bytes(bytes(range(256)) * 64)
+    return p
+
+
+class TestMultipartEncoder:
+    def test_fields_and_file_round_trip(self, image):
+        with MultipartEncoder({"chat_id": "123", "caption": "Half-Life"}, {"photo": str(image)}, "t") as enc:
+            parts = _parse(enc)
+        assert parts["chat_id"].get_content() == "123"
+        assert parts["caption"].get_content() == "Half-Life"
+        assert parts["photo"].get_filename() == "shot.png"
+        assert parts["photo"].get_payload(decode=True) == image.read_bytes()
+
+    def test_multiple_files(self, image, tmp_path):
+        other = tmp_path / "other.png"
+        other.write_bytes(b"abc")
+        with MultipartEncoder({}, {"photo0": str(image), "photo1": str(other)}, "t") as enc:
+            parts = _parse(enc, chunk_size=1000)
+        assert parts["photo1"].get_payload(decode=True) == b"abc"
+
+    def test_empty_file(self, tmp_path):
+        empty = tmp_path / "empty.png"
+        empty.write_bytes(b"")
+        with MultipartEncoder({}, {"photo": str(empty)}, "t") as enc:
+            parts = _parse(enc)
+        assert parts["photo"].get_payload(decode=True) == b""
+
+    def test_missing_file_raises(self, tmp_path):
+        with pytest.raises(OSError):
+            MultipartEncoder({}, {"photo": str(tmp_path / "missing.png")}, "t")
+
+    def test_read_all(self, image):
+        with MultipartEncoder({"chat_id": "1"}, {"photo": str(image)}, "t") as enc:
+            assert len(enc.read()) == len(enc)
+            assert enc.read(10) == b""
@@ -1,5 +1,11 @@
 import pytest
-from watcher.paths import extract_appid_from_path, is_screenshot_file, is_thumbnail_path
+from watcher.paths import (
+    extract_appid_from_dir,
+    extract_appid_from_path,
+    is_screenshot_file,
+    is_shortcut_appid,
+    is_thumbnail_path,
+)
 
 
 class TestIsThumbnailPath:
@@ -50,3 +56,24 @@ class TestExtractAppidFromPath:
 
     def test_non_numeric_segment_returns_none(self):
         assert extract_appid_from_path("/screenshots/abc/screenshots/shot.png") is None
+
+
+class TestExtractAppidFromDir:
+    def test_screenshots_dir(self):
+        assert extract_appid_from_dir("/screenshots/730/screenshots") == "730"
+
+    def test_app_dir_matches_its_files(self):
+        assert extract_appid_from_dir("/screenshots/730") == extract_appid_from_path("/screenshots/730/x.png")
+
+    def test_root_has_no_appid(self):
+        assert extract_appid_from_dir("/screenshots") is None
+
+
+class TestIsShortcutAppid:
+    @pytest.mark.parametrize("appid", ["2147483648", "3228510493", "13866329813389213696"])
+    def test_shortcut_ids(self, appid):
+        assert is_shortcut_appid(appid) is True
+
+    @pytest.mark.parametrize("appid", ["730", "2147483647", "abc", ""])
+    def test_store_ids(self, appid):
+        assert is_shortcut_appid(appid) is False
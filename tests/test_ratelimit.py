@@ -0,0 +1,48 @@
+import pytest
+
+from watcher.ratelimit import RateLimiter
+
+
+class FakeClock:
+    def __init__(self, now: float = 1000.0) -> None:
+        self.now = now
+
+    def __call__(self) -> float:
+        return self.now
+
+
+@pytest.fixture
+def clock():
+    return FakeClock()
+
+
+class TestRateLimiter:
+    def test_burst_passes_without_waiting(self, clock):
+        limiter = RateLimiter(1.0, 3, 30.0, 30, clock=clock)
+        assert [limiter.reserve() for _ in range(3)] == [0.0, 0.0, 0.0]
+
+    def test_requests_beyond_burst_are_spaced_at_rate(self, clock):
+        limiter = RateLimiter(1.0, 3, 30.0, 30, clock=clock)
+        for _ in range(3):
+            limiter.reserve()
+        assert limiter.reserve() == pytest.approx(1.0)
+        assert limiter.reserve() == pytest.approx(2.0)
+
+    def test_tokens_refill_over_time(self, clock):
+        limiter = RateLimiter(1.0, 3, 30.0, 30, clock=clock)
+        for _ in range(3):
+            limiter.reserve()
+        clock.now += 10
+        assert limiter.reserve() == 0.0
+
+    def test_global_bucket_also_applies(self, clock):
+        limiter = RateLimiter(100.0, 100, 1.0, 1, clock=clock)
+        assert limiter.reserve() == 0.0
+        assert limiter.reserve() == pytest.approx(1.0)
+
+    def test_defer_blocks_every_caller_until_cooldown_ends(self, clock):
+        limiter = RateLimiter(1.0, 3, 30.0, 30, clock=clock)
+        limiter.defer(5.0)
+        assert limiter.reserve() == pytest.approx(5.0)
+        # Resumes at the steady rate rather than a fresh burst
+        assert limiter.reserve() == pytest.approx(6.0)
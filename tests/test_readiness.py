@@ -0,0 +1,113 @@
+import pytest
+
+from watcher.readiness import ReadinessTracker
+
+JPEG = b"\xff\xd8" + b"x" * 2048 + b"\xff\xd9"
+
+
+@pytest.fixture
+def tracker():
+    return ReadinessTracker(delay=1.0, attempts=3, min_size=1024)
+
+
+class TestReadinessTracker:
+    def test_stable_file_ready_on_second_check(self, tracker, tmp_path):
+        path = tmp_path / "shot.png"
+        path.write_bytes(b"x" * 2048)
+        tracker.add(str(path), now=100.0)
+        assert tracker.poll(now=100.0) == ([], [])
+        assert tracker.next_deadline() == 101.0
+        assert tracker.poll(now=101.0) == ([str(path)], [])
+        assert len(tracker) == 0
+
+    def test_growing_file_waits(self, tracker, tmp_path):
+        path = tmp_path / "shot.png"
+        path.write_bytes(b"x" * 2048)
+        tracker.add(str(path), now=100.0)
+        tracker.poll(now=100.0)
+        path.write_bytes(b"x" * 4096)
+        assert tracker.poll(now=101.0) == ([], [])
+        assert tracker.poll(now=102.0) == ([str(path)], [])
+
+    def test_small_file_given_up(self, tracker, tmp_path):
+        path = tmp_path / "shot.png"
+        path.write_bytes(b"x" * 10)
+        tracker.add(str(path), now=100.0)
+        for now in (100.0, 101.0):
+            assert tracker.poll(now=now) == ([], [])
+        assert tracker.poll(now=102.0) == ([], [str(path)])
+
+    def test_missing_file_given_up(self, tracker, tmp_path):
+        path = str(tmp_path / "missing.png")
+        tracker.add(path, now=100.0)
+        tracker.poll(now=100.0)
+        tracker.poll(now=101.0)
+        assert tracker.poll(now=102.0) == ([], [path])
+
+    def test_checks_do_not_block_each_other(self, tracker, tmp_path):
+        slow = tmp_path / "slow.png"
+        slow.write_bytes(b"x" * 10)
+        fast = tmp_path / "fast.png"
+        fast.write_bytes(b"x" * 2048)
+        tracker.add(str(slow), now=100.0)
+        tracker.add(str(fast), now=100.5)
+        tracker.poll(now=100.5)
+        assert tracker.poll(now=101.5) == ([str(fast)], [])
+
+    def test_complete_jpeg_ready_on_first_check(self, tracker, tmp_path):
+        path = tmp_path / "shot.jpg"
+        path.write_bytes(JPEG)
+        tracker.add(str(path), now=100.0)
+        assert tracker.poll(now=100.0) == ([str(path)], [])
+
+    def test_truncated_jpeg_falls_back_to_polling(self, tracker, tmp_path):
+        path = tmp_path / "shot.jpg"
+        path.write_bytes(JPEG[:-2])
+        tracker.add(str(path), now=100.0)
+        assert tracker.poll(now=100.0) == ([], [])
+        assert tracker.poll(now=101.0) == ([str(path)], [])
+
+
+class TestEventDrivenReadiness:
+    def test_close_event_marks_file_ready(self, tmp_path):
+        tracker = ReadinessTracker(1.0, 3, 1024, mode="events", event_timeout=5.0)
+        path = tmp_path / "shot.png"
+        path.write_bytes(b"x" * 10)
+        tracker.add(str(path), now=100.0, await_close=True)
+        assert tracker.poll(now=100.0) == ([], [])
+        # Nothing is polled while waiting for the close event
+        assert tracker.next_deadline() == 105.0
+        tracker.mark_closed(str(path), now=100.2)
+        assert tracker.poll(now=100.2) == ([str(path)], [])
+        assert tracker.poll(now=105.0) == ([], [])
+
+    def test_falls_back_to_polling_without_close_event(self, tmp_path):
+        tracker = ReadinessTracker(1.0, 3, 1024, mode="events", event_timeout=5.0)
+        path = tmp_path / "shot.png"
+        path.write_bytes(b"x" * 2048)
+        tracker.add(str(path), now=100.0, await_close=True)
+        tracker.poll(now=100.0)
+        assert tracker.poll(now=105.0) == ([str(path)], [])
+
+    def test_existing_files_are_polled_in_event_mode(self, tmp_path):
+        tracker = ReadinessTracker(1.0, 3, 1024, mode="events", event_timeout=5.0)
+        path = tmp_path / "shot.png"
+        path.write_bytes(b"x" * 2048)
+        tracker.add(str(path), now=100.0)
+        tracker.poll(now=100.0)
+        assert tracker.poll(now=101.0) == ([str(path)], [])
+
+    def test_auto_mode_switches_after_first_close_event(self, tmp_path):
+        tracker = ReadinessTracker(1.0, 3, 1024, mode="auto", event_timeout=5.0)
+        assert tracker.event_driven is False
+        tracker.mark_closed(str(tmp_path / "unrelated.png"), now=100.0)
+        assert tracker.event_driven is True
+
+    def test_poll_mode_ignores_close_events(self):
+        tracker = ReadinessTracker(1.0, 3, 1024, mode="poll")
+        tracker.mark_closed("/x.png", now=100.0)
+        assert tracker.event_driven is False
+
+    def test_unknown_mode_rejected(self):
+        with pytest.raises(ValueError, match="readiness mode"):
+            ReadinessTracker(1.0, 3, 1024, mode="magic")
@@ -0,0 +1,191 @@
+import os
+
+import pytest
+
+from watcher.scanner import FileList, FileStat, ScreenshotScanner
+
+
+@pytest.fixture
+def tree(tmp_path):
+    shots = tmp_path / "730" / "screenshots"
+    shots.mkdir(parents=True)
+    (shots / "a.png").write_bytes(b"x")
+    (shots / "notes.txt").write_text("skip")
+    thumbs = tmp_path / "730" / "screenshots" / "thumbnails"
+    thumbs.mkdir()
+    (thumbs / "a.jpg").write_bytes(b"x")
+    return tmp_path
+
+
+class TestScan:
+    def test_finds_screenshots_and_skips_thumbnails(self, tree):
+        scanner = ScreenshotScanner(str(tree))
+        found = scanner.scan()
+        assert found == {str(tree / "730" / "screenshots" / "a.png")}
+
+    def test_unchanged_dirs_are_not_relisted(self, tree):
+        scanner = ScreenshotScanner(str(tree))
+        scanner.scan()
+        scanner.scan()
+        assert scanner.last_stats.dirs_listed == 0
+        assert scanner.last_stats.dirs_unchanged == 3
+
+    def test_changed_dir_is_relisted(self, tree):
+        scanner = ScreenshotScanner(str(tree))
+        scanner.scan()
+        shots = tree / "730" / "screenshots"
+        (shots / "b.png").write_bytes(b"x")
+        os.utime(shots, ns=(0, os.stat(shots).st_mtime_ns + 1_000_000_000))
+        found = scanner.scan()
+        assert str(shots / "b.png") in found
+        assert scanner.last_stats.dirs_listed == 1
+
+    def test_full_scan_relists_everything(self, tree):
+        scanner = ScreenshotScanner(str(tree))
+        scanner.scan()
+        scanner.scan(full=True)
+        assert scanner.last_stats.dirs_listed == 3
+
+    def test_removed_dir_drops_its_files(self, tree):
+        scanner = ScreenshotScanner(str(tree))
+        scanner.scan()
+        shots = tree / "730" / "screenshots"
+        for child in (shots / "thumbnails").iterdir():
+            child.unlink()
+        (shots / "thumbnails").rmdir()
+        for child in shots.iterdir():
+            child.unlink()
+        shots.rmdir()
+        assert scanner.scan() == frozenset()
+
+
+class TestEventUpdates:
+    def test_add_and_discard_update_snapshot(self, tree):
+        scanner = ScreenshotScanner(str(tree))
+        scanner.scan()
+        new_path = str(tree / "730" / "screenshots" / "c.png")
+        scanner.add(new_path)
+        assert new_path in scanner.snapshot()
+        scanner.discard(new_path)
+        assert new_path not in scanner.snapshot()
+
+    def test_add_ignores_non_screenshots(self, tree):
+        scanner = ScreenshotScanner(str(tree))
+        scanner.add(str(tree / "730" / "thumbnails" / "c.png"))
+        scanner.add(str(tree / "730" / "screenshots" / "c.txt"))
+        assert scanner.snapshot() == frozenset()
+
+
+class TestScanSnapshot:
+    def test_stats_come_from_the_listing(self, tree):
+        path = tree / "730" / "screenshots" / "a.png"
+        os.utime(path, ns=(0, 1_700_000_000_000_000_000))
+        stats = dict(ScreenshotScanner(str(tree)).scan().stats())
+        assert stats == {str(path): (1, 1_700_000_000_000_000_000)}
+
+    def test_appids_per_directory(self, tree):
+        other = tree / "remote" / "570" / "screenshots"
+        other.mkdir(parents=True)
+        (other / "b.png").write_bytes(b"x")
+        assert ScreenshotScanner(str(tree)).scan().appids() == {"570"}
+
+    def test_membership_by_full_path(self, tree):
+        found = ScreenshotScanner(str(tree)).scan()
+        assert str(tree / "730" / "screenshots" / "a.png") in found
+        assert str(tree / "730" / "screenshots" / "notes.txt") not in found
+        assert str(tree / "731" / "screenshots" / "a.png") not in found
+        assert len(found) == 1
+
+    def test_diff_reports_added_and_removed(self, tree):
+        scanner = ScreenshotScanner(str(tree))
+        before = scanner.scan()
+        shots = tree / "730" / "screenshots"
+        (shots / "a.png").unlink()
+        (shots / "b.png").write_bytes(b"x")
+        other = tree / "570" / "screenshots"
+        other.mkdir(parents=True)
+        (other / "c.png").write_bytes(b"x")
+        added, removed = scanner.scan().diff(before)
+        assert sorted(added) == [str(other / "c.png"), str(shots / "b.png")]
+        assert removed == [str(shots / "a.png")]
+
+    def test_unchanged_dirs_share_their_file_lists(self, tree):
+        scanner = ScreenshotScanner(str(tree))
+        first = scanner.scan()
+        second = scanner.scan()
+        assert second.diff(first) == ([], [])
+        assert first._dirs == second._dirs
+        assert all(second._dirs[d][1] is files for d, (_, files) in first._dirs.items())
+
+
+class TestFileList:
+    def test_lookup_in_sorted_names(self):
+        files = FileList([("b.png", FileStat(2, 20)), ("a.png", FileStat(1, 10)), ("c.jpg", FileStat(3, 30))])
+        assert list(files) == ["a.png", "b.png", "c.jpg"]
+        assert files.get("b.png") == FileStat(2, 20)
+        assert files.get("bb.png") is None
+        assert "c.jpg" in files and "a" not in files
+        assert len(files) == 3
+
+    def test_changes_return_new_lists(self):
+        files = FileList([("a.png", FileStat(1, 10))])
+        added = files.with_file("b.png", FileStat(2, 20))
+        assert list(files) == ["a.png"]
+        assert dict(added.items()) == {"a.png": (1, 10), "b.png": (2, 20)}
+        assert list(added.without("a.png")) == ["b.png"]
+        assert added.without("zzz.png") is added
+
+    def test_replaces_stat_of_existing_name(self):
+        files = FileList([("a.png", FileStat(1, 10))]).with_file("a.png", FileStat(5, 50))
+        assert list(files.items()) == [("a.png", FileStat(5, 50))]
+
+    def test_unchanged_stat_returns_same_list(self):
+        files = FileList([("a.png", FileStat(1, 10))])
+        assert files.with_file("a.png", FileStat(1, 10)) is files
+
+    def test_spliced_changes_match_a_rebuild(self):
+        names = ["m%03d.png" % i for i in range(0, 100, 3)]
+        files = FileList((name, FileStat(i, i)) for i, name in enumerate(names))
+        expected = dict(files.items())
+        for i, name in enumerate(["a.png", "m050.png", "zz.png", "m0.png"]):
+            files = files.with_file(name, FileStat(1000 + i, i))
+            expected[name] = FileStat(1000 + i, i)
+        for name in ["a.png", "m003.png", "zz.png"]:
+            files = files.without(name)
+            del expected[name]
+        assert list(files.items()) == sorted(expected.items())
+        assert all(files.get(name) == stat for name, stat in expected.items())
+
+
+class TestRestore:
+    def test_unchanged_restored_dirs_are_not_listed(self, tree):
+        first = ScreenshotScanner(str(tree))
+        expected = first.scan()
+        fresh = ScreenshotScanner(str(tree))
+        assert fresh.restore(first.export()) == 3
+        assert fresh.scan() == expected
+        assert fresh.last_stats.dirs_listed == 0
+
+    def test_restored_files_keep_their_stats(self, tree):
+        first = ScreenshotScanner(str(tree))
+        expected = dict(first.scan().stats())
+        fresh = ScreenshotScanner(str(tree))
+        fresh.restore(first.export())
+        assert dict(fresh.scan().stats()) == expected
+
+    def test_changed_restored_dir_is_relisted(self, tree):
+        first = ScreenshotScanner(str(tree))
+        first.scan()
+        snapshot = first.export()
+        shots = tree / "730" / "screenshots"
+        (shots / "b.png").write_bytes(b"x")
+        os.utime(shots, ns=(0, os.stat(shots).st_mtime_ns + 1_000_000_000))
+        fresh = ScreenshotScanner(str(tree))
+        fresh.restore(snapshot)
+        assert str(shots / "b.png") in fresh.scan()
+        assert fresh.last_stats.dirs_listed == 1
+
+    def test_export_skips_unlisted_dirs(self, tree):
+        scanner = ScreenshotScanner(str(tree))
+        scanner.add(str(tree / "730" / "screenshots" / "a.png"))
+        assert scanner.export() == []
@@ -0,0 +1,97 @@
+import os
+import struct
+import zlib
+
+import pytest
+
+from watcher.shortcuts import ShortcutResolver, parse_binary_vdf, parse_shortcuts
+
+
+def _str(key, value):
+    return b"\x01" + key.encode() + b"\x00" + value.encode() + b"\x00"
+
+
+def _int(key, value):
+    return b"\x02" + key.encode() + b"\x00" + struct.pack("<i", value)
+
+
+def _map(key, body):
+    return b"\x00" + key.encode() + b"\x00" + body + b"\x08"
+
+
+def _shortcuts_vdf(*entries):
+    body = b"".join(_map(str(i), entry) for i, entry in enumerate(entries))
+    return _map("shortcuts", body) + b"\x08"
+
+
+# 3228510493 as a signed int32
+RETROARCH = _int("appid", 3228510493 - 2**32) + _str("AppName", "RetroArch") + _str("Exe", '"/usr/bin/retroarch"')
+HEROIC = _int("appid", -1234567) + _str("AppName", "Heroic") + _map("tags", _str("0", "Launcher"))
+
+
+class TestParseBinaryVdf:
+    def test_nested_maps_and_values(self):
+        data = _map("root", _str("name", "x") + _int("n", 7) + b"\x07big\x00" + struct.pack("<Q", 2**40)) + b"\x08"
+        assert parse_binary_vdf(data) == {"root": {"name": "x", "n": 7, "big": 2**40}}
+
+    def test_truncated_raises(self):
+        with pytest.raises(ValueError):
+            parse_binary_vdf(_shortcuts_vdf(RETROARCH)[:20])
+
+    def test_unknown_type_raises(self):
+        with pytest.raises(ValueError):
+            parse_binary_vdf(b"\x09key\x00")
+
+
+class TestParseShortcuts:
+    def test_maps_32_and_64_bit_ids(self):
+        names = parse_shortcuts(_shortcuts_vdf(RETROARCH, HEROIC))
+        assert names["3228510493"] == "RetroArch"
+        assert names[str((3228510493 << 32) | 0x02000000)] == "RetroArch"
+        assert names[str(2**32 - 1234567)] == "Heroic"
+
+    def test_derives_id_without_appid_field(self):
+        entry = _str("appname", "Old Game") + _str("exe", "/games/old")
+        expected = zlib.crc32(b"/games/oldOld Game") | 0x80000000
+        assert parse_shortcuts(_shortcuts_vdf(entry)) == {
+            str(expected): "Old Game",
+            str((expected << 32) | 0x02000000): "Old Game",
+        }
+
+    def test_skips_unnamed_entries(self):
+        assert parse_shortcuts(_shortcuts_vdf(_int("appid", -5))) == {}
+
+
+class TestShortcutResolver:
+    def test_lookup(self, tmp_path):
+        path = tmp_path / "shortcuts.vdf"
+        path.write_bytes(_shortcuts_vdf(RETROARCH))
+        assert ShortcutResolver(str(path)).lookup("3228510493") == "RetroArch"
+
+    def test_missing_file(self, tmp_path):
+        assert ShortcutResolver(str(tmp_path / "nope.vdf")).lookup("3228510493") is None
+
+    def test_reloads_only_when_mtime_changes(self, tmp_path):
+        path = tmp_path / "shortcuts.vdf"
+        path.write_bytes(_shortcuts_vdf(RETROARCH))
+        resolver = ShortcutResolver(str(path))
+        assert resolver.lookup("3228510493") == "RetroArch"
+
+        renamed = _int("appid", 3228510493 - 2**32) + _str("AppName", "RetroArch (Flatpak)")
+        mtime = os.stat(path).st_mtime_ns
+        path.write_bytes(_shortcuts_vdf(renamed))
+        os.utime(path, ns=(mtime, mtime))
+        assert resolver.lookup("3228510493") == "RetroArch"
+
+        os.utime(path, ns=(mtime + 10**9, mtime + 10**9))
+        assert resolver.lookup("3228510493") == "RetroArch (Flatpak)"
+
+    def test_keeps_names_when_rewrite_is_corrupt(self, tmp_path):
+        path = tmp_path / "shortcuts.vdf"
+        path.write_bytes(_shortcuts_vdf(RETROARCH))
+        resolver = ShortcutResolver(str(path))
+        resolver.lookup("3228510493")
+        mtime = os.stat(path).st_mtime_ns
+        path.write_bytes(b"\x00shortcuts\x00\x00")
+        os.utime(path, ns=(mtime + 10**9, mtime + 10**9))
+        assert resolver.lookup("3228510493") == "RetroArch"
@@ -1,9 +1,11 @@
+import os
 import time
 
 import pytest
 
 from watcher.config import RETRY_INTERVAL_SECONDS, StateConfig
-from watcher.state import SendStateStore
+from watcher.scanner import FileList, FileStat, ScanDir
+from watcher.state import STATUS_PENDING, STATUS_SENT, SendStateStore, _path_key
 
 
 @pytest.fixture
@@ -73,6 +75,14 @@ class TestMarkFailed:
         assert delays[2] > delays[1] * 1.5
         assert delays[3] > delays[2] * 1.5
 
+    def test_untracked_path_gets_no_row(self, store):
+        assert store.mark_failed("/screenshots/730/gone.png", "err") is None
+        store.mark_discovered("/screenshots/730/shot.png")
+        store.rename("/screenshots/730/shot.png", "/screenshots/730/renamed.png")
+        # A failure reported for the old name once the file has been renamed
+        assert store.mark_failed("/screenshots/730/shot.png", "err") is None
+        assert _tracked_paths(store) == {"/screenshots/730/renamed.png"}
+
     def test_capped_at_max_interval(self, store):
         store.mark_discovered("/screenshots/730/shot.png")
         # Run many failures to hit the cap
@@ -85,6 +95,16 @@ class TestMarkFailed:
         assert next_retry - t0 <= RETRY_MAX_INTERVAL_SECONDS + 1
 
 
+class TestIsPending:
+    def test_follows_the_row_status(self, store):
+        path = "/screenshots/730/shot.png"
+        assert store.is_pending(path) is False
+        store.mark_discovered(path)
+        assert store.is_pending(path) is True
+        store.mark_sent(path)
+        assert store.is_pending(path) is False
+
+
 class TestGetDuePending:
     def test_returns_overdue_item(self, store):
         store.mark_discovered("/screenshots/730/shot.png")
@@ -102,6 +122,42 @@ class TestGetDuePending:
         assert not any(item.path == "/screenshots/730/shot.png" for item in due)
 
 
+class TestIterDuePending:
+    def _pending(self, store, deadlines):
+        for name, deadline in deadlines.items():
+            store.mark_discovered(f"/screenshots/730/screenshots/{name}")
+            store._conn.execute(
+                "UPDATE screenshots SET next_retry_at = ? WHERE filename = ?", (deadline, name)
+            )
+        store._conn.commit()
+
+    def test_pages_in_retry_order(self, store):
+        self._pending(store, {f"{i}.png": 100.0 - i // 2 for i in range(7)})
+        items = list(store.iter_due_pending(now=200.0, page_size=2))
+        assert [i.next_retry_at for i in items] == sorted(i.next_retry_at for i in items)
+        assert sorted(os.path.basename(i.path) for i in items) == [f"{i}.png" for i in range(7)]
+
+    def test_stops_at_now(self, store):
+        self._pending(store, {"due.png": 10.0, "later.png": 30.0})
+        assert [os.path.basename(i.path) for i in store.iter_due_pending(now=20.0)] == ["due.png"]
+
+    def test_next_page_is_read_lazily(self, store):
+        self._pending(store, {f"{i}.png": float(i) for i in range(4)})
+        stream = store.iter_due_pending(now=100.0, page_size=2)
+        assert next(stream).path.endswith("0.png")
+        # Rows changed after the first page are seen by the second
+        store.mark_sent("/screenshots/730/screenshots/3.png")
+        assert [os.path.basename(i.path) for i in stream] == ["1.png", "2.png"]
+
+    def test_rescheduled_row_is_not_returned_again(self, store):
+        self._pending(store, {f"{i}.png": float(i) for i in range(4)})
+        seen = []
+        for item in store.iter_due_pending(now=time.time(), page_size=1):
+            seen.append(item.path)
+            store.mark_failed(item.path, "boom")
+        assert len(seen) == len(set(seen)) == 4
+
+
 class TestCleanupMissing:
     def test_removes_pending_not_on_disk(self, store):
         store.mark_discovered("/screenshots/730/shot.png")
@@ -119,6 +175,14 @@ class TestCleanupMissing:
         removed = store.cleanup_missing({"/screenshots/730/shot.png"})
         assert removed == 0
 
+    def test_keeps_rows_first_seen_after_scan_started(self, store):
+        scan_started_at = time.time()
+        store.mark_discovered("/screenshots/730/live.png")
+        store._conn.execute("UPDATE screenshots SET first_seen_at = ?", (scan_started_at + 1,))
+        store._conn.commit()
+        assert store.cleanup_missing(set(), seen_before=scan_started_at) == 0
+        assert store.cleanup_missing(set(), seen_before=scan_started_at + 2) == 1
+
 
 class TestPreregisterStartup:
     def test_new_file_marked_pending(self, store):
@@ -136,3 +200,433 @@ class TestPreregisterStartup:
         future_mtime = store._db_created_at + 10
         count = store.preregister_startup({"/screenshots/730/shot.png": future_mtime})
         assert count == 0
+
+
+class TestRename:
+    def test_moves_row_in_place(self, store):
+        store.mark_discovered("/screenshots/730/shot.png")
+        store.mark_sent("/screenshots/730/shot.png")
+        assert store.rename("/screenshots/730/shot.png", "/screenshots/730/renamed.png") == "sent"
+        assert store.mark_discovered("/screenshots/730/renamed.png") is False
+        assert store.mark_discovered("/screenshots/730/shot.png") is True
+
+    def test_unknown_source_returns_none(self, store):
+        assert store.rename("/screenshots/730/nope.png", "/screenshots/730/b.png") is None
+
+    def test_replaces_existing_destination_row(self, store):
+        store.mark_discovered("/screenshots/730/a.png")
+        store.mark_sent("/screenshots/730/a.png")
+        store.mark_discovered("/screenshots/730/b.png")
+        assert store.rename("/screenshots/730/a.png", "/screenshots/730/b.png") == "sent"
+        assert store.mark_discovered("/screenshots/730/b.png") is False
+
+
+class TestNextRetryAt:
+    def test_none_when_nothing_pending(self, store):
+        assert store.next_retry_at() is None
+
+    def test_returns_earliest_pending_deadline(self, store):
+        store.mark_discovered("/screenshots/730/a.png")
+        store.mark_discovered("/screenshots/730/b.png")
+        first = store.mark_failed("/screenshots/730/a.png", "err")
+        store.mark_failed("/screenshots/730/b.png", "err")
+        store.mark_failed("/screenshots/730/b.png", "err")
+        assert store.next_retry_at(after=time.time()) == first
+
+    def test_ignores_sent_and_past_deadlines(self, store):
+        store.mark_discovered("/screenshots/730/a.png")
+        store.mark_discovered("/screenshots/730/b.png")
+        store.mark_sent("/screenshots/730/b.png")
+        assert store.next_retry_at(after=time.time() + 1) is None
+
+
+class TestContentHash:
+    def test_finds_sent_row_by_hash(self, store):
+        store.mark_discovered("/screenshots/730/a.png")
+        store.set_content_hash("/screenshots/730/a.png", "abc")
+        assert store.find_sent_by_hash("abc") is None
+        store.mark_sent("/screenshots/730/a.png")
+        assert store.find_sent_by_hash("abc") == "/screenshots/730/a.png"
+
+    def test_unknown_hash(self, store):
+        assert store.find_sent_by_hash("nope") is None
+
+    def test_hash_is_reused_only_for_the_same_stat(self, store):
+        store.mark_discovered("/screenshots/730/a.png")
+        store.set_content_hash("/screenshots/730/a.png", "abc", 10, 100)
+        assert store.get_content_hash("/screenshots/730/a.png", 10, 100) == "abc"
+        assert store.get_content_hash("/screenshots/730/a.png", 10, 101) is None
+        assert store.get_content_hash("/screenshots/730/a.png", 11, 100) is None
+        assert store.get_content_hash("/screenshots/440/a.png", 10, 100) is None
+
+    def test_migrates_db_without_hash_column(self, tmp_path):
+        import sqlite3
+
+        db_path = tmp_path / "old.db"
+        conn = sqlite3.connect(db_path)
+        conn.execute(
+            """CREATE TABLE screenshots (
+                path TEXT PRIMARY KEY, status TEXT NOT NULL, first_seen_at REAL,
+                last_attempt_at REAL, next_retry_at REAL, attempts INTEGER NOT NULL DEFAULT 0,
+                last_error TEXT, sent_at REAL)"""
+        )
+        conn.execute("INSERT INTO screenshots (path, status) VALUES ('/screenshots/730/a.png', 'sent')")
+        conn.commit()
+        conn.close()
+        s = SendStateStore(StateConfig(file_path=str(db_path)))
+        s.set_content_hash("/screenshots/730/a.png", "abc")
+        assert s.find_sent_by_hash("abc") == "/screenshots/730/a.png"
+        s.close()
+
+    def test_adds_hash_stat_columns_to_existing_db(self, tmp_path):
+        import sqlite3
+
+        db_path = str(tmp_path / "state.db")
+        SendStateStore(StateConfig(file_path=db_path)).close()
+        conn = sqlite3.connect(db_path)
+        conn.execute("ALTER TABLE screenshots DROP COLUMN hashed_size")
+        conn.execute("ALTER TABLE screenshots DROP COLUMN hashed_mtime_ns")
+        conn.commit()
+        conn.close()
+        s = SendStateStore(StateConfig(file_path=db_path))
+        s.mark_discovered("/screenshots/730/a.png")
+        s.set_content_hash("/screenshots/730/a.png", "abc", 10, 100)
+        assert s.get_content_hash("/screenshots/730/a.png", 10, 100) == "abc"
+        s.close()
+
+    def test_migrates_path_keyed_db(self, tmp_path):
+        import sqlite3
+
+        db_path = tmp_path / "old.db"
+        conn = sqlite3.connect(db_path)
+        conn.execute(
+            """CREATE TABLE screenshots (
+                path TEXT PRIMARY KEY, status TEXT NOT NULL, first_seen_at REAL,
+                last_attempt_at REAL, next_retry_at REAL, attempts INTEGER NOT NULL DEFAULT 0,
+                last_error TEXT, sent_at REAL, content_hash TEXT)"""
+        )
+        conn.execute("CREATE INDEX idx_status_retry ON screenshots (status, next_retry_at)")
+        conn.executemany(
+            "INSERT INTO screenshots (path, status, next_retry_at, attempts, content_hash) VALUES (?, ?, ?, ?, ?)",
+            [
+                ("/screenshots/730/screenshots/a.png", "sent", None, 1, "h1"),
+                ("/screenshots/730/screenshots/b.png", "pending", 0, 2, None),
+                ("/screenshots/570/screenshots/c.png", "pending", 0, 0, None),
+            ],
+        )
+        conn.commit()
+        conn.close()
+        s = SendStateStore(StateConfig(file_path=str(db_path)))
+        assert s.find_sent_by_hash("h1") == "/screenshots/730/screenshots/a.png"
+        due = {i.path: i.attempt for i in s.get_due_pending(time.time())}
+        assert due == {"/screenshots/730/screenshots/b.png": 2, "/screenshots/570/screenshots/c.png": 0}
+        assert not s.mark_discovered("/screenshots/730/screenshots/a.png")
+        tables = {r[0] for r in s._conn.execute("SELECT name FROM sqlite_master WHERE type='table'")}
+        assert "screenshots_legacy" not in tables
+        s.close()
+
+
+class TestNormalizedSchema:
+    def test_directory_is_stored_once(self, store):
+        for name in ("a.png", "b.png", "c.png"):
+            store.mark_discovered(f"/screenshots/730/screenshots/{name}")
+        rows = store._conn.execute("SELECT path, appid FROM dirs").fetchall()
+        assert [tuple(r) for r in rows] == [("/screenshots/730/screenshots", "730")]
+
+    def test_counts_by_appid(self, store):
+        store.mark_discovered("/screenshots/730/screenshots/a.png")
+        store.mark_sent("/screenshots/730/screenshots/b.png")
+        store.mark_sent("/screenshots/570/screenshots/c.png")
+        assert store.counts_by_appid() == {
+            "730": {"pending": 1, "sent": 1},
+            "570": {"pending": 0, "sent": 1},
+        }
+
+    def test_status_and_appid_queries_use_covering_indexes(self, store):
+        plans = [
+            f"SELECT dir_id, filename, attempts FROM screenshots WHERE status={STATUS_PENDING} AND next_retry_at <= 0",
+            "SELECT dir_id, status, COUNT(*) FROM screenshots GROUP BY dir_id, status",
+        ]
+        for sql in plans:
+            detail = " ".join(r["detail"] for r in store._conn.execute(f"EXPLAIN QUERY PLAN {sql}"))
+            assert "COVERING INDEX" in detail, detail
+
+
+class TestScanDirs:
+    SHOTS = "/screenshots/730/screenshots"
+
+    def test_round_trip_keeps_file_stats(self, store):
+        files = FileList([("a.png", FileStat(10, 100)), ("b.png", FileStat(20, 200))])
+        store.save_scan_dirs(
+            [ScanDir("/screenshots", 5, ("/screenshots/730",), FileList()), ScanDir(self.SHOTS, 7, (), files)]
+        )
+        loaded = {d.path: d for d in store.load_scan_dirs()}
+        assert loaded["/screenshots"].subdirs == ("/screenshots/730",)
+        shots = loaded[self.SHOTS]
+        assert shots.mtime_ns == 7
+        assert list(shots.files.items()) == list(files.items())
+
+    def test_damaged_file_list_is_not_restored(self, store):
+        store.save_scan_dirs([ScanDir(self.SHOTS, 7, (), FileList([("a.png", FileStat(1, 1))]))])
+        store._conn.execute("UPDATE scan_dirs SET offsets = x'00'")
+        assert store.load_scan_dirs() == []
+
+    def test_save_replaces_previous_snapshot(self, store):
+        store.save_scan_dirs([ScanDir("/old", 1, (), FileList())])
+        store.save_scan_dirs([ScanDir("/new", 2, (), FileList())])
+        assert [d.path for d in store.load_scan_dirs()] == ["/new"]
+
+    def test_snapshot_in_old_layout_is_dropped(self, tmp_path):
+        import sqlite3
+
+        db_path = tmp_path / "old.db"
+        conn = sqlite3.connect(db_path)
+        conn.execute("CREATE TABLE scan_dirs (path TEXT PRIMARY KEY, mtime_ns INTEGER, entries INTEGER, subdirs TEXT)")
+        conn.execute("INSERT INTO scan_dirs VALUES ('/a', 1, 0, '[]')")
+        conn.commit()
+        conn.close()
+        s = SendStateStore(StateConfig(file_path=str(db_path)))
+        assert s.load_scan_dirs() == []
+        s.close()
+
+    def test_save_writes_only_changed_dirs(self, store):
+        unchanged = ScanDir("/a", 1, (), FileList([("a.png", FileStat(1, 1))]))
+        store.save_scan_dirs([unchanged, ScanDir("/b", 1, (), FileList())])
+        store._conn.execute("UPDATE scan_dirs SET mtime_ns = 99 WHERE path = '/a'")
+        store.save_scan_dirs([unchanged, ScanDir("/b", 2, (), FileList())])
+        assert {d.path: d.mtime_ns for d in store.load_scan_dirs()} == {"/a": 99, "/b": 2}
+
+
+def _committed_status(db_path, path):
+    import sqlite3
+
+    conn = sqlite3.connect(db_path)
+    try:
+        row = conn.execute(
+            """SELECT s.status FROM screenshots s JOIN dirs d ON d.id = s.dir_id
+               WHERE d.path = ? AND s.filename = ?""",
+            os.path.split(path),
+        ).fetchone()
+        return {STATUS_PENDING: "pending", STATUS_SENT: "sent"}[row[0]] if row else None
+    finally:
+        conn.close()
+
+
+class TestDurability:
+    def test_unknown_mode_raises(self, tmp_path):
+        with pytest.raises(ValueError):
+            SendStateStore(StateConfig(file_path=str(tmp_path / "state.db")), durability="never")
+
+    def test_immediate_commits_each_transition(self, tmp_path):
+        db_path = str(tmp_path / "state.db")
+        s = SendStateStore(StateConfig(file_path=db_path), durability="immediate")
+        s.mark_discovered("/screenshots/730/shot.png")
+        assert _committed_status(db_path, "/screenshots/730/shot.png") == "pending"
+        s.close()
+
+    def test_batched_commits_on_flush(self, tmp_path):
+        db_path = str(tmp_path / "state.db")
+        s = SendStateStore(StateConfig(file_path=db_path), durability="batched")
+        s.mark_sent("/screenshots/730/shot.png")
+        s.flush()
+        assert _committed_status(db_path, "/screenshots/730/shot.png") == "sent"
+        s.close()
+
+    def test_batched_commits_within_interval(self, tmp_path):
+        db_path = str(tmp_path / "state.db")
+        s = SendStateStore(StateConfig(file_path=db_path), durability="batched")
+        s.mark_sent("/screenshots/730/shot.png")
+        deadline = time.time() + 5
+        while time.time() < deadline and _committed_status(db_path, "/screenshots/730/shot.png") is None:
+            time.sleep(0.05)
+        assert _committed_status(db_path, "/screenshots/730/shot.png") == "sent"
+        s.close()
+
+    def test_close_commits_pending_transitions(self, tmp_path):
+        db_path = str(tmp_path / "state.db")
+        s = SendStateStore(StateConfig(file_path=db_path), durability="batched")
+        s.mark_discovered("/screenshots/730/shot.png")
+        s.mark_failed("/screenshots/730/shot.png", "boom")
+        s.close()
+        assert _committed_status(db_path, "/screenshots/730/shot.png") == "pending"
+
+
+class TestReaders:
+    def test_open_read_snapshot_does_not_block_writes(self, store):
+        import threading
+
+        store.mark_discovered("/screenshots/730/shot.png")
+        reading = threading.Event()
+        release = threading.Event()
+
+        def long_scan():
+            with store._reader() as conn:
+                conn.execute("SELECT filename FROM screenshots").fetchall()
+                reading.set()
+                release.wait(5)
+
+        scanner = threading.Thread(target=long_scan)
+        scanner.start()
+        assert reading.wait(5)
+        started = time.monotonic()
+        store.mark_sent("/screenshots/730/shot.png")
+        store.flush()
+        elapsed = time.monotonic() - started
+        release.set()
+        scanner.join()
+        assert elapsed < 1.0
+        assert store.get_due_pending(time.time() + 9999) == []
+
+    def test_each_thread_gets_its_own_reader(self, store):
+        import threading
+
+        conns = []
+
+        def grab():
+            with store._reader() as conn:
+                conns.append(conn)
+
+        threads = [threading.Thread(target=grab) for _ in range(2)]
+        for t in threads:
+            t.start()
+        for t in threads:
+            t.join()
+        grab()
+        assert len({id(c) for c in conns}) == 3
+        assert all(c is not store._conn for c in conns)
+
+    def test_readers_see_batched_writes(self, tmp_path):
+        s = SendStateStore(StateConfig(file_path=str(tmp_path / "state.db")), durability="batched")
+        s.mark_discovered("/screenshots/730/shot.png")
+        assert [i.path for i in s.get_due_pending(time.time() + 1)] == ["/screenshots/730/shot.png"]
+        s.close()
+
+
+def _age_sent(store, path, seconds):
+    store._conn.execute(
+        "UPDATE screenshots SET sent_at = ? WHERE filename = ?", (time.time() - seconds, os.path.basename(path))
+    )
+    store._conn.commit()
+
+
+def _tracked_paths(store):
+    rows = store._conn.execute("SELECT d.path, s.filename FROM screenshots s JOIN dirs d ON d.id = s.dir_id")
+    return {os.path.join(r["path"], r["filename"]) for r in rows}
+
+
+class TestPruneSent:
+    OLD = "/screenshots/730/screenshots/old.png"
+
+    def test_prunes_only_old_sent_rows(self, store):
+        store.mark_sent(self.OLD)
+        store.mark_sent("/screenshots/730/screenshots/new.png")
+        store.mark_discovered("/screenshots/730/screenshots/pending.png")
+        _age_sent(store, self.OLD, 1000)
+        assert store.prune_sent(retention=500) == 1
+        assert _tracked_paths(store) == {
+            "/screenshots/730/screenshots/new.png",
+            "/screenshots/730/screenshots/pending.png",
+        }
+
+    def test_prunes_in_batches(self, store):
+        for i in range(7):
+            path = f"/screenshots/730/screenshots/{i}.png"
+            store.mark_sent(path)
+            _age_sent(store, path, 1000)
+        assert store.prune_sent(retention=500, batch_size=3) == 7
+
+    def test_pruned_path_is_not_rediscovered(self, store):
+        store.mark_sent(self.OLD)
+        _age_sent(store, self.OLD, 1000)
+        store.prune_sent(retention=500)
+        assert store.mark_discovered(self.OLD) is False
+        assert store.get_due_pending(time.time() + 9999) == []
+
+    def test_preregister_skips_pruned_paths(self, store):
+        store.mark_sent(self.OLD)
+        _age_sent(store, self.OLD, 1000)
+        store.prune_sent(retention=500)
+        assert store.preregister_startup({self.OLD: time.time() + 10}) == 0
+
+    def test_unsent_skips_sent_and_pruned_paths(self, store):
+        store.mark_sent(self.OLD)
+        _age_sent(store, self.OLD, 1000)
+        store.prune_sent(retention=500)
+        sent = "/screenshots/730/screenshots/sent.png"
+        store.mark_sent(sent)
+        pending = "/screenshots/730/screenshots/pending.png"
+        store.mark_discovered(pending)
+        new = "/screenshots/440/screenshots/new.png"
+        assert store.unsent([self.OLD, sent, pending, new]) == [pending, new]
+        assert store.unsent([]) == []
+
+    def test_rename_of_pruned_path_stays_sent(self, store):
+        store.mark_sent(self.OLD)
+        _age_sent(store, self.OLD, 1000)
+        store.prune_sent(retention=500)
+        dest = "/screenshots/730/screenshots/renamed.png"
+        assert store.rename(self.OLD, dest) == "sent"
+        assert store.mark_discovered(dest) is False
+
+    def test_rename_of_pruned_path_moves_its_tombstone(self, store):
+        store.mark_sent(self.OLD)
+        _age_sent(store, self.OLD, 1000)
+        store.prune_sent(retention=500)
+        store.rename(self.OLD, "/screenshots/730/screenshots/renamed.png")
+        tombstones = [r[0] for r in store._conn.execute("SELECT path_hash FROM sent_tombstones")]
+        assert tombstones == [_path_key("/screenshots/730/screenshots/renamed.png")]
+        # A new file at the old path is a different screenshot
+        assert store.mark_discovered(self.OLD) is True
+
+    def test_tombstones_with_dir_hash_are_migrated(self, tmp_path):
+        import sqlite3
+
+        db_path = tmp_path / "old.db"
+        conn = sqlite3.connect(db_path)
+        conn.execute("CREATE TABLE sent_tombstones (path_hash INTEGER PRIMARY KEY, dir_hash INTEGER NOT NULL)")
+        conn.execute("INSERT INTO sent_tombstones VALUES (?, 0)", (_path_key(self.OLD),))
+        conn.commit()
+        conn.close()
+        s = SendStateStore(StateConfig(file_path=str(db_path)))
+        columns = [r["name"] for r in s._conn.execute("PRAGMA table_info(sent_tombstones)")]
+        assert columns == ["path_hash"]
+        assert s.mark_discovered(self.OLD) is False
+        s.close()
+
+    def test_scan_snapshot_keeps_pruned_files(self, store):
+        store.mark_sent(self.OLD)
+        _age_sent(store, self.OLD, 1000)
+        store.prune_sent(retention=500)
+        files = FileList([("old.png", FileStat(1, 1)), ("new.png", FileStat(1, 1))])
+        store.save_scan_dirs([ScanDir("/screenshots/730/screenshots", 7, (), files)])
+        assert [list(d.files) for d in store.load_scan_dirs()] == [["new.png", "old.png"]]
+
+    def test_new_db_uses_incremental_vacuum(self, store):
+        assert store._conn.execute("PRAGMA auto_vacuum").fetchone()[0] == 2
+
+    def test_converts_old_db_to_incremental_vacuum(self, tmp_path):
+        import sqlite3
+
+        db_path = tmp_path / "old.db"
+        conn = sqlite3.connect(db_path)
+        conn.execute("CREATE TABLE t (x)")
+        conn.commit()
+        conn.close()
+        s = SendStateStore(StateConfig(file_path=str(db_path)))
+        # Opening does not rewrite the file; the conversion runs later, in the background
+        assert s._conn.execute("PRAGMA auto_vacuum").fetchone()[0] == 0
+        s.mark_discovered("/screenshots/730/screenshots/shot.png")
+        s.convert_auto_vacuum()
+        assert s._conn.execute("PRAGMA auto_vacuum").fetchone()[0] == 2
+        assert s.is_pending("/screenshots/730/screenshots/shot.png")
+        s.close()
+
+    def test_vacuum_frees_pages_in_steps(self, store):
+        for i in range(2000):
+            store.mark_sent(f"/screenshots/730/screenshots/{i:05d}-{'x' * 100}.png")
+        store.flush()
+        store._conn.execute("DELETE FROM screenshots")
+        store._conn.commit()
+        assert store._conn.execute("PRAGMA freelist_count").fetchone()[0] > 4
+        store._vacuum(batch_pages=4)
+        assert store._conn.execute("PRAGMA freelist_count").fetchone()[0] == 0
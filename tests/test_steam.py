@@ -0,0 +1,157 @@
+import json
+import threading
+import time
+from unittest.mock import MagicMock, patch
+
+import pytest
+
+from watcher.applist import AppListIndex
+from watcher.config import STEAM_NEGATIVE_TTL_SECONDS, StateConfig
+from watcher.shortcuts import ShortcutResolver
+from watcher.state import SendStateStore
+from watcher.steam import SteamResolver
+
+
+def _resp(payload, status=200):
+    resp = MagicMock(status_code=status)
+    resp.json.return_value = payload
+    return resp
+
+
+FOUND = _resp({"730": {"success": True, "data": {"name": "Counter-Strike 2"}}})
+MISSING = _resp({"730": {"success": False}})
+
+
+@pytest.fixture
+def store(tmp_path):
+    s = SendStateStore(StateConfig(file_path=str(tmp_path / "state.db")))
+    yield s
+    s.close()
+
+
+@pytest.fixture
+def resolver(store):
+    r = SteamResolver(store)
+    yield r
+    r.close()
+
+
+class TestResolveGameName:
+    def test_resolves_and_caches(self, resolver):
+        with patch.object(resolver._session, "get", return_value=FOUND) as mock_get:
+            assert resolver.resolve_game_name("730") == "Counter-Strike 2"
+            assert resolver.resolve_game_name("730") == "Counter-Strike 2"
+        assert mock_get.call_count == 1
+
+    def test_cache_survives_restart(self, store, resolver):
+        with patch.object(resolver._session, "get", return_value=FOUND):
+            resolver.resolve_game_name("730")
+        fresh = SteamResolver(store)
+        with patch.object(fresh._session, "get") as mock_get:
+            assert fresh.resolve_game_name("730") == "Counter-Strike 2"
+        mock_get.assert_not_called()
+        fresh.close()
+
+    def test_negative_result_is_cached(self, resolver):
+        with patch.object(resolver._session, "get", return_value=MISSING) as mock_get:
+            assert resolver.resolve_game_name("730") is None
+            assert resolver.resolve_game_name("730") is None
+        assert mock_get.call_count == 1
+
+    def test_expired_negative_entry_is_refetched(self, store, resolver):
+        store.put_app_name("730", None, fetched_at=time.time() - STEAM_NEGATIVE_TTL_SECONDS - 1)
+        with patch.object(resolver._session, "get", return_value=FOUND):
+            assert resolver.resolve_game_name("730") == "Counter-Strike 2"
+
+    def test_network_error_keeps_stale_name(self, store, resolver):
+        store.put_app_name("730", "Old Name", fetched_at=0.0)
+        with patch.object(resolver._session, "get", return_value=_resp({}, status=503)) as mock_get:
+            assert resolver.resolve_game_name("730") == "Old Name"
+            assert resolver.resolve_game_name("730") == "Old Name"
+        assert mock_get.call_count == 1
+        # Transient errors are not persisted
+        assert store.get_app_name("730") == ("Old Name", 0.0)
+
+    def test_concurrent_lookups_share_one_request(self, resolver):
+        def slow_get(*args, **kwargs):
+            time.sleep(0.2)
+            return FOUND
+
+        results = []
+        with patch.object(resolver._session, "get", side_effect=slow_get) as mock_get:
+            threads = [threading.Thread(target=lambda: results.append(resolver.resolve_game_name("730"))) for _ in range(5)]
+            for t in threads:
+                t.start()
+            for t in threads:
+                t.join()
+        assert mock_get.call_count == 1
+        assert results == ["Counter-Strike 2"] * 5
+
+
+class TestWarm:
+    def test_resolves_every_appid(self, resolver):
+        with patch.object(resolver._session, "get", return_value=FOUND) as mock_get:
+            resolver.warm(["730", "440"])
+        assert mock_get.call_count == 2
+
+    def test_stops_once_stop_is_set(self, resolver):
+        stop = threading.Event()
+
+        def get_then_stop(*args, **kwargs):
+            stop.set()
+            return FOUND
+
+        with patch.object(resolver._session, "get", side_effect=get_then_stop) as mock_get:
+            resolver.warm(["730", "440", "570"], stop)
+        assert mock_get.call_count == 1
+
+    def test_lookup_finishing_after_store_close_does_not_raise(self, tmp_path):
+        store = SendStateStore(StateConfig(file_path=str(tmp_path / "state.db")))
+        resolver = SteamResolver(store)
+
+        def get_during_shutdown(*args, **kwargs):
+            store.close()
+            return FOUND
+
+        with patch.object(resolver._session, "get", side_effect=get_during_shutdown):
+            assert resolver.resolve_game_name("730") == "Counter-Strike 2"
+        resolver.close()
+
+
+class TestOfflineAppList:
+    def test_index_hit_skips_http(self, store, tmp_path):
+        dump = tmp_path / "applist.json"
+        dump.write_text(json.dumps({"applist": {"apps": [{"appid": 730, "name": "Counter-Strike 2"}]}}))
+        resolver = SteamResolver(store, AppListIndex(str(dump), str(tmp_path / "applist.idx")))
+        with patch.object(resolver._session, "get") as mock_get:
+            assert resolver.resolve_game_name("730") == "Counter-Strike 2"
+        mock_get.assert_not_called()
+        resolver.close()
+
+    def test_index_miss_falls_back_to_http(self, store, tmp_path):
+        dump = tmp_path / "applist.json"
+        dump.write_text(json.dumps({"applist": {"apps": [{"appid": 10, "name": "Counter-Strike"}]}}))
+        resolver = SteamResolver(store, AppListIndex(str(dump), str(tmp_path / "applist.idx")))
+        with patch.object(resolver._session, "get", return_value=FOUND) as mock_get:
+            assert resolver.resolve_game_name("730") == "Counter-Strike 2"
+        assert mock_get.call_count == 1
+        resolver.close()
+
+
+class TestShortcuts:
+    def test_shortcut_ids_skip_http(self, store):
+        resolver = SteamResolver(store)
+        with patch.object(resolver._session, "get") as mock_get:
+            assert resolver.resolve_game_name("3228510493") is None
+        mock_get.assert_not_called()
+        resolver.close()
+
+    def test_shortcut_names_from_resolver(self, store):
+        shortcuts = MagicMock(spec=ShortcutResolver)
+        shortcuts.lookup.return_value = "RetroArch"
+        resolver = SteamResolver(store, shortcuts=shortcuts)
+        with patch.object(resolver._session, "get") as mock_get:
+            assert resolver.resolve_game_name("3228510493") == "RetroArch"
+        mock_get.assert_not_called()
+        shortcuts.lookup.assert_called_once_with("3228510493")
+        resolver.close()
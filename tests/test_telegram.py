@@ -1,3 +1,4 @@
+import json
 from unittest.mock import MagicMock, patch
 
 import pytest
@@ -69,16 +70,59 @@ class TestSendPhoto:
         with patch.object(sender._session, "post", side_effect=[fail_resp, ok_resp]):
             with patch("watcher.telegram.time.sleep", side_effect=lambda s: slept.append(s)):
                 sender.send_photo(photo, "Half-Life")
-        assert slept == [5.0]
+        # retry_after closes the shared limiter; the next acquire waits it out
+        assert slept == [pytest.approx(5.0, abs=0.1)]
 
     def test_no_caption_sends_without_caption_field(self, sender, photo):
         mock_resp = MagicMock(status_code=200)
         with patch.object(sender._session, "post", return_value=mock_resp) as mock_post:
             sender.send_photo(photo, None)
-        call_data = mock_post.call_args.kwargs["data"]
+        call_data = mock_post.call_args.kwargs["data"].fields
         assert "caption" not in call_data
 
 
+@pytest.fixture
+def photos(tmp_path):
+    paths = []
+    for i in range(3):
+        p = tmp_path / f"shot{i}.png"
+        p.write_bytes(b"x" * 2048)
+        paths.append(str(p))
+    return paths
+
+
+class TestSendMediaGroup:
+    def test_success_returns_true_for_every_item(self, sender, photos):
+        mock_resp = MagicMock(status_code=200)
+        with patch.object(sender._session, "post", return_value=mock_resp) as mock_post:
+            assert sender.send_media_group(photos, "Half-Life") == [True, True, True]
+        assert mock_post.call_args.args[0].endswith("/sendMediaGroup")
+        media = json.loads(mock_post.call_args.kwargs["data"].fields["media"])
+        assert [m["media"] for m in media] == ["attach://photo0", "attach://photo1", "attach://photo2"]
+        assert media[0]["caption"] == "Half-Life"
+        assert "caption" not in media[1]
+
+    def test_single_item_uses_send_photo(self, sender, photo):
+        mock_resp = MagicMock(status_code=200)
+        with patch.object(sender._session, "post", return_value=mock_resp) as mock_post:
+            assert sender.send_media_group([photo], None) == [True]
+        assert mock_post.call_args.args[0].endswith("/sendPhoto")
+
+    def test_rejected_album_falls_back_to_single_sends(self, sender, photos):
+        rejected = MagicMock(status_code=400, text="PHOTO_INVALID_DIMENSIONS")
+        ok_resp = MagicMock(status_code=200)
+        bad_resp = MagicMock(status_code=400, text="PHOTO_INVALID_DIMENSIONS")
+        with patch.object(sender._session, "post", side_effect=[rejected, ok_resp, bad_resp, ok_resp]):
+            assert sender.send_media_group(photos, "Half-Life") == [True, False, True]
+
+    def test_server_errors_fail_every_item(self, sender, photos):
+        mock_resp = MagicMock(status_code=500, text="err")
+        mock_resp.json.return_value = {}
+        with patch.object(sender._session, "post", return_value=mock_resp):
+            with patch("watcher.telegram.time.sleep"):
+                assert sender.send_media_group(photos, "Half-Life") == [False, False, False]
+
+
 class TestTruncateCaption:
     def test_short_caption_unchanged(self, sender):
         assert sender._truncate_caption("Short") == "Short"
@@ -0,0 +1,79 @@
+import os
+
+import pytest
+
+from watcher import transcode
+from watcher.transcode import Transcoder
+
+Image = pytest.importorskip("PIL.Image")
+
+
+@pytest.fixture
+def big_png(tmp_path, monkeypatch):
+    monkeypatch.setattr(transcode, "TRANSCODE_MAX_SIDE", 64)
+    path = tmp_path / "shot.png"
+    Image.new("RGB", (256, 128), (200, 30, 30)).save(path)
+    return str(path)
+
+
+@pytest.fixture
+def transcoder(tmp_path):
+    t = Transcoder(str(tmp_path / "cache"), enabled=True)
+    yield t
+    t.close()
+
+
+class TestTranscoder:
+    def test_disabled_returns_originals(self, tmp_path, big_png):
+        t = Transcoder(str(tmp_path / "cache"), enabled=False)
+        assert t.prepare([big_png]) == [big_png]
+
+    def test_small_file_sent_as_is(self, transcoder, tmp_path):
+        path = tmp_path / "small.png"
+        Image.new("RGB", (32, 32)).save(path)
+        assert transcoder.prepare([str(path)]) == [str(path)]
+
+    def test_oversized_png_downscaled_to_jpeg(self, transcoder, big_png):
+        [upload] = transcoder.prepare([big_png])
+        assert upload != big_png
+        with Image.open(upload) as image:
+            assert image.format == "JPEG"
+            assert max(image.size) <= 64
+
+    def test_oversized_jpeg_under_byte_limit_downscaled(self, transcoder, tmp_path, monkeypatch):
+        monkeypatch.setattr(transcode, "TRANSCODE_MAX_SIDE", 64)
+        path = tmp_path / "shot.jpg"
+        Image.new("RGB", (256, 128), (30, 200, 30)).save(path)
+        assert os.path.getsize(path) < transcode.TRANSCODE_TARGET_BYTES
+        [upload] = transcoder.prepare([str(path)])
+        assert upload != str(path)
+        with Image.open(upload) as image:
+            assert max(image.size) <= 64
+
+    def test_retry_reuses_cached_output(self, transcoder, big_png):
+        [first] = transcoder.prepare([big_png])
+        mtime = os.path.getmtime(first)
+        [second] = transcoder.prepare([big_png])
+        assert second == first
+        assert os.path.getmtime(second) == mtime
+
+    def test_discard_removes_cached_output(self, transcoder, big_png):
+        [upload] = transcoder.prepare([big_png])
+        transcoder.discard(upload, big_png)
+        assert not os.path.exists(upload)
+        assert os.path.exists(big_png)
+
+    def test_prune_removes_old_entries(self, transcoder, big_png):
+        [upload] = transcoder.prepare([big_png])
+        os.utime(upload, (0, 0))
+        assert transcoder.prune(max_age=60) == 1
+
+    def test_unfittable_image_falls_back_to_original(self, transcoder, big_png, monkeypatch):
+        monkeypatch.setattr(transcode, "TRANSCODE_TARGET_BYTES", 1)
+        assert transcoder.prepare([big_png]) == [big_png]
+
+    def test_transcode_stops_at_min_side(self, big_png, tmp_path):
+        dest = str(tmp_path / "out.jpg")
+        with pytest.raises(ValueError):
+            transcode._transcode(big_png, dest, 1, 64, 16)
+        assert not os.path.exists(dest) and not os.path.exists(dest + ".tmp")
@@ -24,6 +24,7 @@ class _JsonFormatter(logging.Formatter):
 
 def main() -> None:
     """Entry point for the media watcher service."""
+    started_at = time.monotonic()
     logger = logging.getLogger()
     logger.setLevel(logging.INFO)
     handler = logging.StreamHandler(sys.stdout)
@@ -46,8 +47,10 @@ def main() -> None:
     observer = Observer()
     # Watch recursively to capture screenshots in all per-game subfolders
     observer.schedule(screenshot_handler, config.screenshot_dir, recursive=True)
-    logger.info("Watching %s (recursive)", config.screenshot_dir)
     observer.start()
+    logger.info("Watching %s (recursive), %.2fs after start", config.screenshot_dir, time.monotonic() - started_at)
+    # Reconciles existing files in the background, after watching has begun
+    screenshot_handler.start(started_at)
 
     try:
         while True:
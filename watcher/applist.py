@@ -0,0 +1,155 @@
+from __future__ import annotations
+
+import json
+import logging
+import mmap
+import os
+import struct
+import sys
+import threading
+import time
+from array import array
+from bisect import bisect_left
+from typing import Optional, Tuple
+
+# Header: magic, byte order, source size, source mtime_ns, entry count
+_MAGIC = b"DMWAPPS1"
+_HEADER = struct.Struct("<8scQqI")
+_BYTE_ORDER = b"L" if sys.byteorder == "little" else b"B"
+
+
+def compile_app_list(source_path: str, index_path: str) -> int:
+    """Compile a GetAppList JSON dump into a sorted binary index; returns the entry count.
+
+    Layout after the header: appids (uint32, sorted), name offsets (uint32,
+    count + 1), then the UTF-8 names blob.
+    """
+    stat = os.stat(source_path)
+    with open(source_path, "r", encoding="utf-8") as f:
+        payload = json.load(f)
+    apps = payload.get("applist", {}).get("apps", []) if isinstance(payload, dict) else []
+    names: dict[int, str] = {}
+    for app in apps:
+        try:
+            appid = int(app["appid"])
+            name = str(app.get("name") or "").strip()
+        except (KeyError, TypeError, ValueError):
+            continue
+        if name and 0 <= appid < 2**32 and appid not in names:
+            names[appid] = name
+    appids = array("I", sorted(names))
+    offsets = array("I", [0])
+    blob = bytearray()
+    for appid in appids:
+        blob += names[appid].encode("utf-8")
+        offsets.append(len(blob))
+    tmp = index_path + ".tmp"
+    with open(tmp, "wb") as f:
+        f.write(_HEADER.pack(_MAGIC, _BYTE_ORDER, stat.st_size, stat.st_mtime_ns, len(appids)))
+        f.write(appids.tobytes())
+        f.write(offsets.tobytes())
+        f.write(blob)
+    os.replace(tmp, index_path)
+    return len(appids)
+
+
+class AppListIndex:
+    """Offline appid → name lookups from a local Steam app list dump.
+
+    The dump is compiled into a binary index the first time it is needed (or
+    when the dump changes) and then memory-mapped, so lookups are a binary
+    search over the mapped appids and nothing is loaded at startup. Lookups
+    made while the index is being compiled wait for it. A dump that could not
+    be loaded is tried again once it changes.
+    """
+
+    def __init__(self, source_path: str, index_path: str) -> None:
+        self._source_path = source_path
+        self._index_path = index_path
+        self._lock = threading.Lock()
+        # Set once the index is mapped
+        self._loaded = False
+        # (size, mtime_ns) of the dump as last failed to load, (-1, -1) if it was missing
+        self._failed_source: Optional[Tuple[int, int]] = None
+        self._map: Optional[mmap.mmap] = None
+        self._appids: Optional[memoryview] = None
+        self._offsets: Optional[memoryview] = None
+        self._names_start = 0
+
+    def lookup(self, appid: str) -> Optional[str]:
+        if not appid.isdigit():
+            return None
+        with self._lock:
+            if not self._loaded:
+                self._load()
+            if self._appids is None or self._offsets is None or self._map is None:
+                return None
+            key = int(appid)
+            i = bisect_left(self._appids, key)
+            if i == len(self._appids) or self._appids[i] != key:
+                return None
+            start = self._names_start + self._offsets[i]
+            end = self._names_start + self._offsets[i + 1]
+            return self._map[start:end].decode("utf-8")
+
+    def close(self) -> None:
+        with self._lock:
+            for view in (self._appids, self._offsets):
+                if view is not None:
+                    view.release()
+            if self._map is not None:
+                self._map.close()
+            self._appids = self._offsets = self._map = None
+
+    def _load(self) -> None:
+        """Compile the index if the dump changed, then map it; called with the lock held."""
+        try:
+            source = os.stat(self._source_path)
+            signature = (source.st_size, source.st_mtime_ns)
+        except OSError as exc:
+            if self._failed_source != (-1, -1):
+                logging.warning("Steam app list %s is not readable: %s", self._source_path, exc)
+                self._failed_source = (-1, -1)
+            return
+        if signature == self._failed_source:
+            return
+        try:
+            if not self._index_matches(source):
+                started = time.monotonic()
+                count = compile_app_list(self._source_path, self._index_path)
+                logging.info(
+                    "Compiled Steam app list %s: %s apps in %.2fs",
+                    self._source_path,
+                    count,
+                    time.monotonic() - started,
+                )
+            self._map_index()
+        except (OSError, ValueError) as exc:
+            logging.warning("Could not load Steam app list %s: %s", self._source_path, exc)
+            self._failed_source = signature
+            return
+        self._loaded = True
+
+    def _index_matches(self, source: os.stat_result) -> bool:
+        try:
+            with open(self._index_path, "rb") as f:
+                header = f.read(_HEADER.size)
+        except OSError:
+            return False
+        if len(header) < _HEADER.size:
+            return False
+        magic, order, size, mtime_ns, _ = _HEADER.unpack(header)
+        return magic == _MAGIC and order == _BYTE_ORDER and size == source.st_size and mtime_ns == source.st_mtime_ns
+
+    def _map_index(self) -> None:
+        with open(self._index_path, "rb") as f:
+            mapped = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        _, _, _, _, count = _HEADER.unpack(mapped[: _HEADER.size])
+        view = memoryview(mapped)
+        appids_end = _HEADER.size + 4 * count
+        offsets_end = appids_end + 4 * (count + 1)
+        self._appids = view[_HEADER.size : appids_end].cast("I")
+        self._offsets = view[appids_end:offsets_end].cast("I")
+        view.release()
+        self._names_start = offsets_end
+        self._map = mapped
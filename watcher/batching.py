@@ -0,0 +1,62 @@
+from __future__ import annotations
+
+from dataclasses import dataclass, field
+from typing import List, Optional
+
+
+@dataclass
+class _Batch:
+    deadline: float
+    paths: List[str] = field(default_factory=list)
+
+
+class AlbumBatcher:
+    """Group screenshots of the same app into albums.
+
+    A path added with ``flush_lone`` that has no open batch for its app, and
+    no other path of that app in the last ``window`` seconds, is sent on its
+    own straight away. Any other path opens a batch (or joins the open one),
+    which is released once ``window`` seconds have passed since it opened, or
+    as soon as it holds ``max_items`` paths.
+    """
+
+    def __init__(self, window: float, max_items: int) -> None:
+        self._window = window
+        self._max_items = max_items
+        self._batches: dict[Optional[str], _Batch] = {}
+        # When each app last had a path added, to spot the start of a burst
+        self._last_added: dict[Optional[str], float] = {}
+
+    def add(self, key: Optional[str], path: str, now: float, flush_lone: bool = True) -> Optional[List[str]]:
+        """Add a path; returns a batch if it is ready now (a lone path, or a full batch)."""
+        last_added = self._last_added.get(key)
+        self._last_added[key] = now
+        batch = self._batches.get(key)
+        if batch is None:
+            if flush_lone and (last_added is None or now - last_added >= self._window):
+                return [path]
+            batch = self._batches[key] = _Batch(deadline=now + self._window)
+        batch.paths.append(path)
+        if len(batch.paths) >= self._max_items:
+            del self._batches[key]
+            return batch.paths
+        return None
+
+    def pop_due(self, now: float) -> List[List[str]]:
+        due = [key for key, batch in self._batches.items() if batch.deadline <= now]
+        for key in [k for k, added in self._last_added.items() if now - added >= self._window]:
+            del self._last_added[key]
+        return [self._batches.pop(key).paths for key in due]
+
+    def drain(self) -> List[List[str]]:
+        batches = [batch.paths for batch in self._batches.values()]
+        self._batches.clear()
+        return batches
+
+    def next_deadline(self) -> Optional[float]:
+        if not self._batches:
+            return None
+        return min(batch.deadline for batch in self._batches.values())
+
+    def __len__(self) -> int:
+        return len(self._batches)
@@ -0,0 +1,41 @@
+from __future__ import annotations
+
+from collections import OrderedDict
+
+
+class EventCoalescer:
+    """Merge filesystem events per path within a TTL window.
+
+    Entries are kept in first-seen order, so expiry only ever pops from the
+    front: amortized O(1) per event instead of rebuilding the whole window.
+    A rename carries the entry over to the new path.
+    """
+
+    def __init__(self, ttl: float) -> None:
+        self._ttl = ttl
+        self._seen: OrderedDict[str, float] = OrderedDict()
+
+    def seen(self, path: str, now: float) -> bool:
+        """Record an event for ``path``; True if it already had one within the TTL."""
+        self._expire(now)
+        if path in self._seen:
+            return True
+        self._seen[path] = now
+        return False
+
+    def rename(self, src: str, dest: str, now: float) -> None:
+        self._expire(now)
+        self._seen.pop(src, None)
+        self._seen.pop(dest, None)
+        self._seen[dest] = now
+
+    def __len__(self) -> int:
+        return len(self._seen)
+
+    def _expire(self, now: float) -> None:
+        cutoff = now - self._ttl
+        while self._seen:
+            path, ts = next(iter(self._seen.items()))
+            if ts >= cutoff:
+                break
+            del self._seen[path]
@@ -11,10 +11,21 @@ from dataclasses import dataclass
 FILE_READY_DELAY_SECONDS: float = 1.0
 FILE_READY_ATTEMPTS: int = 5
 FILE_READY_MIN_SIZE_BYTES: int = 1024
+# "events": a close-after-write/move event marks a file ready, no polling;
+# "poll": (size, mtime) polling only; "auto": poll until the filesystem is
+# seen delivering close events, then switch to events
+READINESS_MODE: str = "auto"
+# In event mode, how long to wait for a close event before falling back to polling
+FILE_READY_EVENT_TIMEOUT_SECONDS: float = 5.0
 
 # In-memory dedup window (seconds before the same path can be re-queued)
 DEDUP_TTL_SECONDS: float = 120.0
 
+# Album batching: screenshots of the same app arriving within the window
+# are sent as one album (Telegram allows at most 10 items per album)
+ALBUM_WINDOW_SECONDS: float = 3.0
+ALBUM_MAX_ITEMS: int = 10
+
 # Graceful shutdown: how long to wait for the send queue to drain
 SHUTDOWN_DRAIN_SECONDS: float = 5.0
 
@@ -22,10 +33,38 @@ SHUTDOWN_DRAIN_SECONDS: float = 5.0
 RETRY_INTERVAL_SECONDS: float = 30.0
 RETRY_MAX_INTERVAL_SECONDS: float = 600.0
 
+# State DB write path. "batched" group-commits state transitions at most
+# STATE_COMMIT_INTERVAL_SECONDS after they happen, so a crash can lose that
+# window; "immediate" commits each transition before the call returns
+STATE_DURABILITY: str = "batched"
+STATE_COMMIT_INTERVAL_SECONDS: float = 0.2
+# SQLite PRAGMA synchronous; NORMAL never corrupts the DB in WAL mode
+STATE_SYNCHRONOUS: str = "NORMAL"
+# Sent rows older than this are pruned in batches (leaving a path-hash
+# tombstone so the file is never re-sent) and the freed pages vacuumed
+STATE_SENT_RETENTION_SECONDS: float = 3 * 86400.0
+STATE_PRUNE_BATCH_SIZE: int = 500
+# Free pages returned per incremental_vacuum step; the writer is released between steps
+STATE_VACUUM_BATCH_PAGES: int = 256
+# Due pending rows read per page when draining the backlog from the state DB
+STATE_PAGE_SIZE: int = 256
+
+# Screenshot tree reconciliation: between scans the known set is kept current
+# from watchdog events; scans only re-list directories whose mtime changed
+SCAN_RECONCILE_INTERVAL_SECONDS: float = 600.0
+# How often the liveness heartbeat is written; files newer than the last
+# heartbeat are treated as created while stopped on the next start
+HEARTBEAT_INTERVAL_SECONDS: float = 30.0
+
 # Steam Store API
 STEAM_LANG: str = "en"
 STEAM_CC: str = "us"
 STEAM_TIMEOUT_SECONDS: float = 10.0
+# App name cache (stored in the state DB): names, definite misses, and
+# transient lookup errors (memory only) expire after these
+STEAM_CACHE_TTL_SECONDS: float = 30 * 86400.0
+STEAM_NEGATIVE_TTL_SECONDS: float = 86400.0
+STEAM_ERROR_TTL_SECONDS: float = 300.0
 
 # Telegram sender
 TELEGRAM_SEND_ATTEMPTS: int = 3
@@ -33,6 +72,33 @@ TELEGRAM_BACKOFF_SECONDS: float = 1.0
 TELEGRAM_CAPTION_LIMIT: int = 1024
 TELEGRAM_CONNECT_TIMEOUT_SECONDS: float = 10.0
 TELEGRAM_READ_TIMEOUT_SECONDS: float = 60.0
+# How often a long upload logs its progress
+UPLOAD_PROGRESS_LOG_SECONDS: float = 5.0
+
+# Telegram send pool and proactive rate limiting (shared by all workers)
+SENDER_WORKERS: int = 3
+# Weighted fair share of the send workers per lane (live, startup backlog, retries)
+SEND_LANE_WEIGHTS: dict[str, int] = {"live": 8, "startup": 2, "retry": 1}
+# How often the per-lane send queue depth is logged while a backlog drains
+SEND_QUEUE_LOG_SECONDS: float = 30.0
+# Most screenshots in the send pipeline before the startup/retry backlog waits
+# for capacity; live screenshots are always admitted
+SEND_BACKLOG_MAX_PATHS: int = 100
+TELEGRAM_CHAT_RATE_PER_SECOND: float = 1.0
+TELEGRAM_CHAT_BURST: int = 3
+TELEGRAM_GLOBAL_RATE_PER_SECOND: float = 30.0
+TELEGRAM_GLOBAL_BURST: int = 30
+
+# Optional image transcoding before upload (requires Pillow). Oversized
+# screenshots are re-encoded as JPEG within the byte budget and side limit
+TRANSCODE_ENABLED: bool = False
+TRANSCODE_WORKERS: int = 2
+TRANSCODE_TARGET_BYTES: int = 5 * 1024 * 1024
+TRANSCODE_MAX_SIDE: int = 2560
+# Downscaling stops here; an image that still does not fit is sent as the original
+TRANSCODE_MIN_SIDE: int = 640
+TRANSCODE_JPEG_QUALITY: int = 90
+TRANSCODE_CACHE_MAX_AGE_SECONDS: float = 86400.0
 
 # ---------------------------------------------------------------------------
 # Config objects — only fields that come from environment variables
@@ -51,11 +117,18 @@ class StateConfig:
     file_path: str
 
 
+@dataclass(frozen=True)
+class SteamConfig:
+    app_list_file: str | None
+    shortcuts_file: str | None
+
+
 @dataclass(frozen=True)
 class AppConfig:
     screenshot_dir: str
     telegram: TelegramConfig
     state: StateConfig
+    steam: SteamConfig
 
 
 def load_app_config() -> AppConfig:
@@ -80,4 +153,8 @@ def load_app_config() -> AppConfig:
         state=StateConfig(
             file_path=os.getenv("STATE_FILE", "/state/send_state.db"),
         ),
+        steam=SteamConfig(
+            app_list_file=os.getenv("STEAM_APP_LIST_FILE") or None,
+            shortcuts_file=os.getenv("STEAM_SHORTCUTS_FILE") or None,
+        ),
     )
@@ -4,24 +4,53 @@ import logging
 import os
 import threading
 import time
-from queue import Empty, Queue
-from typing import Optional, Tuple
+from queue import Empty
+from typing import List, Optional, Tuple
 
 from watchdog.events import FileSystemEventHandler
 
+from watcher.applist import AppListIndex
+from watcher.batching import AlbumBatcher
+from watcher.coalesce import EventCoalescer
 from watcher.config import (
+    ALBUM_MAX_ITEMS,
+    ALBUM_WINDOW_SECONDS,
     DEDUP_TTL_SECONDS,
     FILE_READY_ATTEMPTS,
     FILE_READY_DELAY_SECONDS,
+    FILE_READY_EVENT_TIMEOUT_SECONDS,
     FILE_READY_MIN_SIZE_BYTES,
-    RETRY_INTERVAL_SECONDS,
+    HEARTBEAT_INTERVAL_SECONDS,
+    READINESS_MODE,
+    SCAN_RECONCILE_INTERVAL_SECONDS,
+    SEND_BACKLOG_MAX_PATHS,
+    SEND_LANE_WEIGHTS,
+    SEND_QUEUE_LOG_SECONDS,
+    SENDER_WORKERS,
     SHUTDOWN_DRAIN_SECONDS,
+    STATE_SENT_RETENTION_SECONDS,
+    STEAM_TIMEOUT_SECONDS,
+    TRANSCODE_CACHE_MAX_AGE_SECONDS,
+    TRANSCODE_ENABLED,
     AppConfig,
 )
+from watcher.hashing import content_hash
+from watcher.lanes import LANE_LIVE, LANE_RETRY, LANE_STARTUP, LaneQueue, higher_lane
 from watcher.paths import extract_appid_from_path, is_screenshot_file, is_thumbnail_path
+from watcher.readiness import ReadinessTracker
+from watcher.scanner import ScreenshotScanner
+from watcher.shortcuts import ShortcutResolver
 from watcher.state import SendStateStore
 from watcher.steam import SteamResolver
 from watcher.telegram import TelegramSender
+from watcher.transcode import Transcoder
+
+
+# Pipeline intake signals
+_LIVE = "live"  # just created; may wait for its close event
+_EXISTING = "existing"  # already on disk (startup backlog, retries)
+_CLOSED = "closed"  # close-after-write for a path queued earlier
+_WAKEUP = "wakeup"  # no path; wakes the pipeline so it sees the stop event
 
 
 class ScreenshotHandler(FileSystemEventHandler):
@@ -29,51 +58,128 @@ class ScreenshotHandler(FileSystemEventHandler):
 
     def __init__(self, config: AppConfig) -> None:
         self._screenshot_dir = config.screenshot_dir
-        self._queue: Queue[str] = Queue()
-        self._queued_paths: set[str] = set()
+        # Intake for the send pipeline: (path, signal), and the batches for the
+        # senders, both split into live/startup/retry lanes
+        self._queue: LaneQueue[Tuple[str, str]] = LaneQueue(
+            SEND_LANE_WEIGHTS, SEND_QUEUE_LOG_SECONDS, "Intake queue"
+        )
+        self._send_queue: LaneQueue[List[str]] = LaneQueue(SEND_LANE_WEIGHTS, SEND_QUEUE_LOG_SECONDS, "Send queue")
+        # Paths anywhere between _enqueue and the end of their send, across all
+        # workers, with the lane they are sent in
+        self._queued_paths: dict[str, str] = {}
         self._queue_lock = threading.Lock()
+        # Notified whenever paths leave _queued_paths, for backlog backpressure
+        self._capacity = threading.Condition(self._queue_lock)
         self._stop_event = threading.Event()
-        self._worker = threading.Thread(target=self._worker_loop, name="telegram-sender", daemon=True)
+        self._pipeline_worker = threading.Thread(target=self._pipeline_loop, name="send-pipeline", daemon=True)
+        self._send_workers = [
+            threading.Thread(target=self._send_loop, name=f"telegram-sender-{i}", daemon=True)
+            for i in range(1, SENDER_WORKERS + 1)
+        ]
         self._retry_worker = threading.Thread(target=self._retry_loop, name="telegram-retry", daemon=True)
-        self._recent: dict[str, float] = {}
+        self._retry_wakeup = threading.Event()
+        # Set once the startup reconciliation has listed the tree
+        self._reconciled = threading.Event()
+        self._maintenance_worker = threading.Thread(
+            target=self._maintenance_loop, name="state-maintenance", daemon=True
+        )
+        # Resolves the names of every game in the tree; started by the startup reconciliation
+        self._warm_worker: Optional[threading.Thread] = None
+        self._coalescer = EventCoalescer(DEDUP_TTL_SECONDS)
+        self._readiness = ReadinessTracker(
+            FILE_READY_DELAY_SECONDS,
+            FILE_READY_ATTEMPTS,
+            FILE_READY_MIN_SIZE_BYTES,
+            mode=READINESS_MODE,
+            event_timeout=FILE_READY_EVENT_TIMEOUT_SECONDS,
+        )
+        self._batcher = AlbumBatcher(ALBUM_WINDOW_SECONDS, ALBUM_MAX_ITEMS)
         self._state = SendStateStore(config.state)
-        self._steam = SteamResolver()
+        state_dir = os.path.dirname(config.state.file_path) or "."
+        app_list = (
+            AppListIndex(config.steam.app_list_file, os.path.join(state_dir, "steam-applist.idx"))
+            if config.steam.app_list_file
+            else None
+        )
+        shortcuts = ShortcutResolver(config.steam.shortcuts_file) if config.steam.shortcuts_file else None
+        self._steam = SteamResolver(self._state, app_list, shortcuts)
         self._telegram = TelegramSender(config.telegram)
-        known_paths = self._discover_existing_screenshots()
-        path_mtimes = self._get_mtimes(known_paths)
-        self._state.cleanup_missing(known_paths)
-        new_count = self._state.preregister_startup(path_mtimes)
-        if new_count:
-            logging.info("Found %s new screenshots created while stopped, queuing for send", new_count)
-        due_items = self._state.get_due_pending()
-        for item in due_items:
-            if item.path in known_paths:
-                self._enqueue(item.path)
-        logging.info("Loaded %s existing screenshots for state tracking", len(known_paths))
-        self._worker.start()
+        self._transcoder = Transcoder(
+            os.path.join(state_dir, "transcode-cache"),
+            enabled=TRANSCODE_ENABLED,
+        )
+        self._scanner = ScreenshotScanner(config.screenshot_dir)
+
+    def start(self, started_at: Optional[float] = None) -> None:
+        """Start the worker threads; the initial reconciliation runs in the background.
+
+        Call this once the observer is watching, so nothing created during the
+        reconciliation is missed. ``started_at`` (a ``time.monotonic()`` value)
+        is only used to log the time from process start to reconciled.
+        """
+        self._started_at = time.monotonic() if started_at is None else started_at
+        self._pipeline_worker.start()
+        for worker in self._send_workers:
+            worker.start()
         self._retry_worker.start()
+        self._maintenance_worker.start()
 
     def on_created(self, event):  # type: ignore[override]
+        if not event.is_directory:
+            self._on_file_event(event.src_path)
+
+    def on_modified(self, event):  # type: ignore[override]
+        # Coalesced with the created event; catches files whose creation was missed
+        if not event.is_directory:
+            self._on_file_event(event.src_path)
+
+    def on_deleted(self, event):  # type: ignore[override]
+        if not event.is_directory:
+            self._scanner.discard(event.src_path)
+
+    def on_closed(self, event):  # type: ignore[override]
         if event.is_directory:
             return
         path = event.src_path
-        if is_thumbnail_path(path):
-            return
-        if not is_screenshot_file(path):
-            return
-        if self._is_duplicate(path):
+        # A file whose created event was missed is discovered by its close
+        if self._is_screenshot(path) and self._state.mark_discovered(path):
+            self._enqueue(path, LANE_LIVE)
+        # After the state write, so a saved scan snapshot never lists an untracked file
+        self._scanner.add(path)
+        self._signal_closed(path)
+
+    def on_moved(self, event):  # type: ignore[override]
+        if event.is_directory:
             return
-        if self._state.mark_discovered(path):
-            self._enqueue(path)
+        src, dest = event.src_path, event.dest_path
+        if self._is_screenshot(dest):
+            self._coalescer.rename(src, dest, time.time())
+            self._track_rename(src, dest)
+        # After the state write, as for created files
+        self._scanner.discard(src)
+        self._scanner.add(dest)
 
     def close(self) -> None:
         self._stop_event.set()
+        self._retry_wakeup.set()
+        self._queue.put(("", _WAKEUP), LANE_LIVE)
+        with self._capacity:
+            self._capacity.notify_all()
         deadline = time.time() + SHUTDOWN_DRAIN_SECONDS
-        while time.time() < deadline and not self._queue.empty():
+        while time.time() < deadline and self._queued_paths:
             time.sleep(0.1)
-        self._worker.join(timeout=5)
+        self._pipeline_worker.join(timeout=5)
+        for worker in self._send_workers:
+            worker.join(timeout=5)
         self._retry_worker.join(timeout=5)
+        self._maintenance_worker.join(timeout=5)
+        if self._warm_worker is not None:
+            # Stops after its current lookup, which must not outlive the store
+            self._warm_worker.join(timeout=STEAM_TIMEOUT_SECONDS * 2)
+        if self._reconciled.is_set():
+            self._state.save_scan_dirs(self._scanner.export())
         self._telegram.close()
+        self._transcoder.close()
         self._steam.close()
         self._state.close()
 
@@ -85,45 +191,187 @@ class ScreenshotHandler(FileSystemEventHandler):
         name = self._steam.resolve_game_name(appid)
         return f"{name}" if name else f"App {appid}"
 
-    def _worker_loop(self) -> None:
+    def _pipeline_loop(self) -> None:
+        """Move queued paths through the readiness check and album batching.
+
+        Both stages are timer driven, so the loop sleeps until the next check
+        or batch deadline instead of blocking on any single file, and with
+        nothing pending it blocks until a path arrives.
+        """
+        try:
+            self._run_pipeline()
+        finally:
+            # Lets the senders finish the queued batches and exit
+            self._send_queue.close()
+
+    def _run_pipeline(self) -> None:
         while True:
-            if self._stop_event.is_set() and self._queue.empty():
+            stopping = self._stop_event.is_set()
+            if stopping and self._queue.empty() and not len(self._readiness) and not len(self._batcher):
                 break
+            deadlines = [d for d in (self._readiness.next_deadline(), self._batcher.next_deadline()) if d is not None]
+            # With nothing pending, block until the next path or the close() wakeup
+            timeout = max(0.0, min(deadlines) - time.time()) if deadlines else None
             try:
-                path = self._queue.get(timeout=0.5)
+                path, signal = self._queue.get(timeout=timeout)
             except Empty:
-                continue
+                pass
+            else:
+                if signal == _CLOSED:
+                    self._readiness.mark_closed(path, time.time())
+                elif signal != _WAKEUP:
+                    self._readiness.add(path, time.time(), await_close=signal == _LIVE)
+            ready, given_up = self._readiness.poll(time.time())
+            for path in given_up:
+                self._skip_unstable(path)
+            for path in ready:
+                if self._is_duplicate_content(path):
+                    continue
+                # A lone live screenshot or a full album goes out now; a burst, and
+                # the backlog, which arrives as one, wait for the album window
+                with self._queue_lock:
+                    live = self._queued_paths.get(path) == LANE_LIVE
+                batch = self._batcher.add(extract_appid_from_path(path), path, time.time(), flush_lone=live)
+                if batch:
+                    self._send_queue.put(batch, self._batch_lane(batch))
+            for batch in self._batcher.drain() if stopping else self._batcher.pop_due(time.time()):
+                self._send_queue.put(batch, self._batch_lane(batch))
+
+    def _send_loop(self) -> None:
+        while True:
+            try:
+                batch = self._send_queue.get()
+            except Empty:
+                break  # closed by the pipeline on its way out, and drained
             try:
-                self._send_screenshot(path)
+                self._send_batch(batch)
             finally:
-                self._queue.task_done()
-                with self._queue_lock:
-                    self._queued_paths.discard(path)
+                self._release(batch)
 
     def _retry_loop(self) -> None:
+        """Enqueue the due backlog, sleeping exactly until the next retry is due.
+
+        Due rows are streamed from the state DB page by page, and each one
+        waits for room in the pipeline, so a large backlog is read only as
+        fast as it is sent. Rows never attempted (found by the startup
+        reconciliation) go in the startup lane, the rest in the retry lane.
+        ``_schedule_retry`` wakes the loop early when a failure schedules a
+        retry; with nothing pending it sleeps until woken.
+        """
         while not self._stop_event.is_set():
-            known_paths = self._discover_existing_screenshots()
-            self._state.cleanup_missing(known_paths)
-            due_items = self._state.get_due_pending()
-            for item in due_items:
-                if self._stop_event.is_set():
+            # Clear before querying so a wakeup during the query is not lost
+            self._retry_wakeup.clear()
+            now = time.time()
+            known_paths = self._scanner.snapshot()
+            for item in self._state.iter_due_pending(now):
+                if item.path not in known_paths:
+                    continue
+                if not self._wait_for_capacity(item.path):
                     return
-                if item.path in known_paths:
-                    self._enqueue(item.path)
+                # A live event may have sent the file while this row waited for room
+                if not self._state.is_pending(item.path):
+                    continue
+                self._enqueue(item.path, LANE_STARTUP if item.attempt == 0 else LANE_RETRY)
+            # Due items are queued or in flight now and will be rescheduled by
+            # mark_failed, so only future deadlines matter here
+            next_retry_at = self._state.next_retry_at(after=now)
+            timeout = None if next_retry_at is None else max(0.0, next_retry_at - time.time())
+            self._retry_wakeup.wait(timeout)
+
+    def _maintenance_loop(self) -> None:
+        self._reconcile_startup()
+        if not self._stop_event.is_set():
+            self._state.convert_auto_vacuum()
+        next_reconcile_at = time.time() + SCAN_RECONCILE_INTERVAL_SECONDS
+        while not self._stop_event.wait(HEARTBEAT_INTERVAL_SECONDS):
             self._state.update_heartbeat()
-            self._stop_event.wait(RETRY_INTERVAL_SECONDS)
+            if time.time() < next_reconcile_at:
+                continue
+            next_reconcile_at = time.time() + SCAN_RECONCILE_INTERVAL_SECONDS
+            scan_started_at = time.time()
+            previous = self._scanner.snapshot()
+            known_paths = self._scanner.scan()
+            added, removed = known_paths.diff(previous)
+            if added or removed:
+                logging.info("Rescan found %s screenshots and lost %s not reported by events", len(added), len(removed))
+            # Files whose events were missed (e.g. an inotify overflow) are discovered here
+            for path in self._state.unsent(added):
+                if self._state.mark_discovered(path):
+                    self._enqueue(path, LANE_LIVE)
+            self._state.cleanup_missing(known_paths, seen_before=scan_started_at)
+            self._state.save_scan_dirs(self._scanner.export())
+            self._state.prune_sent(STATE_SENT_RETENTION_SECONDS)
+            self._transcoder.prune(TRANSCODE_CACHE_MAX_AGE_SECONDS)
+            # Newly found files may make due retries enqueueable
+            self._retry_wakeup.set()
+
+    def _reconcile_startup(self) -> None:
+        """Bring the state DB in line with the screenshot tree after a restart.
 
-    def _send_screenshot(self, path: str) -> None:
-        if not self._wait_until_stable(path):
-            logging.warning("File not stable or missing, skipping: %s", path)
-            next_retry_at = self._state.mark_failed(path, "file not stable or missing")
-            logging.info("Scheduled retry for %s at %.0f", path, next_retry_at)
+        Runs while the observer is already watching: files created during the
+        scan get their rows from live events, so cleanup only considers rows
+        first seen before the scan started.
+        """
+        reconcile_started = time.monotonic()
+        scan_started_at = time.time()
+        # Directories unchanged since the last run are not listed again
+        restored = self._scanner.restore(self._state.load_scan_dirs())
+        if restored:
+            logging.info("Restored %s directories from the last scan snapshot", restored)
+        previous = self._scanner.snapshot()
+        known_paths = self._scanner.scan()
+        if self._stop_event.is_set():
             return
-        caption = self._build_caption(path)
+        self._state.cleanup_missing(known_paths, seen_before=scan_started_at)
+        # Restored listings are tracked already; only re-listed directories can hold new files
+        added, _ = known_paths.diff(previous)
+        new_count = self._state.preregister_startup(
+            (path, stat.mtime_ns / 1e9) for path in added if (stat := known_paths.stat(path)) is not None
+        )
+        if new_count:
+            logging.info("Found %s new screenshots created while stopped, queuing for send", new_count)
+        self._state.save_scan_dirs(self._scanner.export())
+        self._reconciled.set()
+        now = time.monotonic()
+        logging.info(
+            "Startup reconciliation done: %s existing screenshots in %.2fs (%.2fs after start)",
+            len(known_paths),
+            now - reconcile_started,
+            now - self._started_at,
+        )
+        counts = self._state.counts_by_appid()
+        logging.info(
+            "Tracking %s pending and %s sent screenshots across %s games",
+            sum(c["pending"] for c in counts.values()),
+            sum(c["sent"] for c in counts.values()),
+            sum(1 for appid in counts if appid),
+        )
+        self._warm_worker = threading.Thread(
+            target=self._steam.warm,
+            args=(sorted(known_paths.appids()), self._stop_event),
+            name="steam-warmup",
+            daemon=True,
+        )
+        self._warm_worker.start()
+        # The retry loop drains the due backlog, which it skipped while the
+        # scan had not found its files yet
+        self._retry_wakeup.set()
+
+    def _send_batch(self, paths: List[str]) -> None:
+        # Batches are grouped by appid, so the first path's caption fits them all
+        caption = self._build_caption(paths[0])
         try:
-            ok = self._telegram.send_photo(path, caption)
+            uploads = self._transcoder.prepare(paths)
+            results = self._telegram.send_media_group(uploads, caption)
+        except Exception as e:
+            logging.exception("Failed to send screenshots %s: %s", paths, e)
+            for path in paths:
+                self._schedule_retry(path, str(e))
+            return
+        for path, upload, ok in zip(paths, uploads, results):
             if ok:
                 self._state.mark_sent(path)
+                self._transcoder.discard(upload, path)
                 logging.info(
                     "Sent screenshot: %s%s",
                     os.path.basename(path),
@@ -131,65 +379,121 @@ class ScreenshotHandler(FileSystemEventHandler):
                 )
             else:
                 logging.error("Failed to send screenshot after retries: %s", path)
-                next_retry_at = self._state.mark_failed(path, "telegram send returned false")
-                logging.info("Scheduled retry for %s at %.0f", path, next_retry_at)
-        except Exception as e:
-            logging.exception("Failed to send screenshot %s: %s", path, e)
-            next_retry_at = self._state.mark_failed(path, str(e))
-            logging.info("Scheduled retry for %s at %.0f", path, next_retry_at)
-
-    def _wait_until_stable(self, path: str) -> bool:
-        last: Optional[Tuple[int, float]] = None
-        for _ in range(FILE_READY_ATTEMPTS):
-            if not os.path.exists(path):
-                time.sleep(FILE_READY_DELAY_SECONDS)
-                continue
-            try:
-                stat = os.stat(path)
-            except OSError:
-                time.sleep(FILE_READY_DELAY_SECONDS)
-                continue
-            current = (stat.st_size, stat.st_mtime)
-            if last == current and stat.st_size >= FILE_READY_MIN_SIZE_BYTES:
-                return True
-            last = current
-            time.sleep(FILE_READY_DELAY_SECONDS)
-        return False
-
-    def _is_duplicate(self, path: str) -> bool:
-        now = time.time()
-        cutoff = now - DEDUP_TTL_SECONDS
-        if self._recent:
-            self._recent = {p: ts for p, ts in self._recent.items() if ts >= cutoff}
-        if path in self._recent:
-            return True
-        self._recent[path] = now
-        return False
-
-    def _get_mtimes(self, paths: set[str]) -> dict[str, float]:
-        mtimes: dict[str, float] = {}
-        for path in paths:
-            try:
-                mtimes[path] = os.path.getmtime(path)
-            except OSError:
-                mtimes[path] = 0.0
-        return mtimes
-
-    def _discover_existing_screenshots(self) -> set[str]:
-        found: set[str] = set()
-        for root, dirs, files in os.walk(self._screenshot_dir):
-            dirs[:] = [d for d in dirs if d.lower() != "thumbnails"]
-            for name in files:
-                path = os.path.join(root, name)
-                if is_thumbnail_path(path):
-                    continue
-                if is_screenshot_file(path):
-                    found.add(path)
-        return found
+                self._schedule_retry(path, "telegram send returned false")
+
+    def _skip_unstable(self, path: str) -> None:
+        logging.warning("File not stable or missing, skipping: %s", path)
+        self._schedule_retry(path, "file not stable or missing")
+        self._release([path])
+
+    def _is_duplicate_content(self, path: str) -> bool:
+        """Mark ``path`` sent without uploading if identical content was already sent.
+
+        Runs on the pipeline thread so hashing never holds up a sender.
+        """
+        try:
+            st = os.stat(path)
+            # A retry of an unchanged file reuses the hash from its earlier pass
+            digest = self._state.get_content_hash(path, st.st_size, st.st_mtime_ns)
+            if digest is None:
+                digest = content_hash(path)
+                self._state.set_content_hash(path, digest, st.st_size, st.st_mtime_ns)
+        except OSError:
+            return False  # the send attempt will report it
+        original = self._state.find_sent_by_hash(digest)
+        if original is None:
+            return False
+        if original == path:
+            # This very file was sent already, e.g. by a live event while it was queued again
+            logging.info("Skipping %s: already sent", path)
+        else:
+            self._state.mark_sent(path)
+            logging.info("Skipping %s: same image was already sent as %s", path, original)
+        self._release([path])
+        return True
+
+    def _schedule_retry(self, path: str, error: str) -> None:
+        next_retry_at = self._state.mark_failed(path, error)
+        if next_retry_at is None:
+            # Renamed or removed while in flight; its row, if any, moved with it
+            logging.info("Not retrying %s, it is no longer tracked", path)
+            return
+        logging.info("Scheduled retry for %s at %.0f", path, next_retry_at)
+        self._retry_wakeup.set()
+
+    def _on_file_event(self, path: str) -> None:
+        if not self._is_screenshot(path):
+            return
+        # Modified fires once per write; only the event the coalescer accepts
+        # updates the index, and close-after-write records the final stat
+        if self._coalescer.seen(path, time.time()):
+            return
+        discovered = self._state.mark_discovered(path)
+        # After the state write, so a saved scan snapshot never lists an untracked file
+        self._scanner.add(path)
+        if discovered:
+            self._enqueue(path, LANE_LIVE, live=True)
+
+    def _track_rename(self, src: str, dest: str) -> None:
+        """Move the row of a renamed screenshot, or discover ``dest`` if ``src`` was not tracked."""
+        if self._is_screenshot(src):
+            status = self._state.rename(src, dest)
+            if status is not None:
+                logging.info("Screenshot renamed: %s -> %s", src, dest)
+                if status == "pending":
+                    self._enqueue(dest, LANE_LIVE)
+                return
+        # A temporary file renamed into place is complete the moment it appears
+        if self._state.mark_discovered(dest):
+            self._enqueue(dest, LANE_LIVE)
+            self._signal_closed(dest)
+
+    @staticmethod
+    def _is_screenshot(path: str) -> bool:
+        return is_screenshot_file(path) and not is_thumbnail_path(path)
+
+    def _enqueue(self, path: str, lane: str, live: bool = False) -> None:
+        with self._queue_lock:
+            queued_lane = self._queued_paths.get(path)
+            if queued_lane is not None:
+                # Already on its way; a live event still moves its batch forward
+                self._queued_paths[path] = higher_lane(queued_lane, lane)
+                return
+            self._queued_paths[path] = lane
+        self._queue.put((path, _LIVE if live else _EXISTING), lane)
+
+    def _wait_for_capacity(self, path: str) -> bool:
+        """Block until the pipeline has room for another backlog path; False once stopping.
+
+        Woken by ``_release`` as paths leave the pipeline, and by ``close``.
+        """
+        with self._capacity:
+            while len(self._queued_paths) >= SEND_BACKLOG_MAX_PATHS and path not in self._queued_paths:
+                if self._stop_event.is_set():
+                    return False
+                self._capacity.wait()
+        return not self._stop_event.is_set()
+
+    def _release(self, paths: List[str]) -> None:
+        """Forget paths that left the pipeline, making room for the backlog."""
+        with self._capacity:
+            for path in paths:
+                self._queued_paths.pop(path, None)
+            self._capacity.notify_all()
+
+    def _batch_lane(self, batch: List[str]) -> str:
+        """A batch is sent in the highest lane of any of its paths."""
+        with self._queue_lock:
+            lanes = [self._queued_paths.get(path, LANE_RETRY) for path in batch]
+        lane = lanes[0]
+        for other in lanes[1:]:
+            lane = higher_lane(lane, other)
+        return lane
 
-    def _enqueue(self, path: str) -> None:
+    def _signal_closed(self, path: str) -> None:
         with self._queue_lock:
-            if path in self._queued_paths:
+            if path not in self._queued_paths:
                 return
-            self._queued_paths.add(path)
-        self._queue.put(path)
+        # Only live adds wait for this signal, and they use the same lane, so
+        # it always follows its add
+        self._queue.put((path, _CLOSED), LANE_LIVE)
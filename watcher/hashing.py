@@ -0,0 +1,20 @@
+from __future__ import annotations
+
+import hashlib
+
+# Read size for streaming a file through the hash
+_CHUNK_SIZE = 1024 * 1024
+
+
+def content_hash(path: str) -> str:
+    """Hash a file's content in fixed-size chunks; returns a 32-char hex digest.
+
+    BLAKE2b-128 from the standard library: fast, no extra dependency, and
+    wide enough that a false match (which would skip a real upload) is not a
+    practical concern.
+    """
+    digest = hashlib.blake2b(digest_size=16)
+    with open(path, "rb") as f:
+        while chunk := f.read(_CHUNK_SIZE):
+            digest.update(chunk)
+    return digest.hexdigest()
@@ -0,0 +1,114 @@
+from __future__ import annotations
+
+import os
+import struct
+import zlib
+from typing import Optional, Tuple
+
+PNG_SIGNATURE = b"\x89PNG\r\n\x1a\n"
+# Zero-length IEND chunk: length, type and its fixed CRC
+PNG_IEND = b"\x00\x00\x00\x00IEND\xaeB`\x82"
+# Signature + IHDR chunk (length, type, 13 data bytes, CRC)
+_PNG_HEAD_SIZE = 8 + 4 + 4 + 13 + 4
+_PNG_MIN_SIZE = _PNG_HEAD_SIZE + len(PNG_IEND)
+
+JPEG_SOI = b"\xff\xd8"
+JPEG_EOI = b"\xff\xd9"
+# Start-of-frame markers (baseline, progressive, ...); C4, C8 and CC share the range but are not frames
+_JPEG_SOF = frozenset(range(0xC0, 0xD0)) - {0xC4, 0xC8, 0xCC}
+# Markers without a length field
+_JPEG_STANDALONE = frozenset(range(0xD0, 0xD8)) | {0x01}
+_JPEG_SOS = 0xDA
+
+
+def is_complete_image(path: str, size: int) -> Optional[bool]:
+    """Check whether a PNG/JPEG has been fully written, reading only its head and tail.
+
+    Returns True if the file is complete, False if it is recognisably
+    truncated, and None if the format cannot be verified this way.
+    """
+    try:
+        with open(path, "rb") as f:
+            head = f.read(_PNG_HEAD_SIZE)
+            if head.startswith(PNG_SIGNATURE):
+                return _png_complete(f, head, size)
+            if head.startswith(JPEG_SOI):
+                return _tail_matches(f, size, JPEG_EOI)
+    except OSError:
+        return False
+    return None
+
+
+def _png_complete(f, head: bytes, size: int) -> bool:
+    if size < _PNG_MIN_SIZE or len(head) < _PNG_HEAD_SIZE:
+        return False
+    length, chunk_type = struct.unpack(">I4s", head[8:16])
+    if length != 13 or chunk_type != b"IHDR":
+        return False
+    data = head[16:29]
+    (crc,) = struct.unpack(">I", head[29:33])
+    if zlib.crc32(chunk_type + data) != crc:
+        return False
+    width, height = struct.unpack(">II", data[:8])
+    if width == 0 or height == 0:
+        return False
+    return _tail_matches(f, size, PNG_IEND)
+
+
+def _tail_matches(f, size: int, marker: bytes) -> bool:
+    if size < len(marker):
+        return False
+    f.seek(size - len(marker), os.SEEK_SET)
+    return f.read(len(marker)) == marker
+
+
+def png_dimensions(path: str) -> Optional[Tuple[int, int]]:
+    """Return (width, height) from a PNG's IHDR, or None if it is not a PNG."""
+    try:
+        with open(path, "rb") as f:
+            head = f.read(_PNG_HEAD_SIZE)
+    except OSError:
+        return None
+    if len(head) < _PNG_HEAD_SIZE or not head.startswith(PNG_SIGNATURE) or head[12:16] != b"IHDR":
+        return None
+    width, height = struct.unpack(">II", head[16:24])
+    return width, height
+
+
+def jpeg_dimensions(path: str) -> Optional[Tuple[int, int]]:
+    """Return (width, height) from a JPEG's start-of-frame segment, or None if it is not a JPEG.
+
+    Walks the marker segments from the start of the file, seeking over each
+    one (EXIF included), so only a few hundred bytes are read.
+    """
+    try:
+        with open(path, "rb") as f:
+            if f.read(2) != JPEG_SOI:
+                return None
+            while True:
+                marker = f.read(2)
+                if len(marker) < 2 or marker[0] != 0xFF:
+                    return None
+                code = marker[1]
+                while code == 0xFF:  # fill bytes before a marker
+                    fill = f.read(1)
+                    if not fill:
+                        return None
+                    code = fill[0]
+                if code in _JPEG_STANDALONE:
+                    continue
+                if code == _JPEG_SOS or code == JPEG_EOI[1]:
+                    return None  # image data before any frame header
+                header = f.read(2)
+                if len(header) < 2:
+                    return None
+                (length,) = struct.unpack(">H", header)
+                if code in _JPEG_SOF:
+                    frame = f.read(5)
+                    if len(frame) < 5:
+                        return None
+                    height, width = struct.unpack(">HH", frame[1:5])
+                    return (width, height) if width and height else None
+                f.seek(length - 2, os.SEEK_CUR)
+    except OSError:
+        return None
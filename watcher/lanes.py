@@ -0,0 +1,110 @@
+from __future__ import annotations
+
+import logging
+import threading
+import time
+from collections import deque
+from queue import Empty
+from typing import Deque, Dict, Generic, Mapping, Optional, Tuple, TypeVar
+
+# Send lanes, highest priority first
+LANE_LIVE = "live"  # just taken (or found by a rescan)
+LANE_STARTUP = "startup"  # backlog found by the startup reconciliation
+LANE_RETRY = "retry"  # due retries
+LANES: Tuple[str, ...] = (LANE_LIVE, LANE_STARTUP, LANE_RETRY)
+
+T = TypeVar("T")
+
+
+def higher_lane(a: str, b: str) -> str:
+    """Return whichever of two lanes has the higher priority."""
+    return a if LANES.index(a) <= LANES.index(b) else b
+
+
+class LaneQueue(Generic[T]):
+    """Thread-safe queue with one FIFO lane per priority, dequeued by weight.
+
+    ``get`` uses smooth weighted round robin over the non-empty lanes: with
+    weights 8/2/1 and every lane busy, 8 of every 11 items come from the
+    live lane, but the startup and retry backlogs still drain. An empty
+    lane costs nothing, so a fresh item waits behind at most a few backlog
+    items. Lane depths are logged at most every ``log_interval`` seconds
+    while a backlog is being drained.
+    """
+
+    def __init__(self, weights: Mapping[str, int], log_interval: float, name: str = "queue") -> None:
+        if set(weights) != set(LANES) or min(weights.values()) < 1:
+            raise ValueError(f"Lane weights must be positive and cover {LANES}: {dict(weights)}")
+        self._weights = dict(weights)
+        self._lanes: Dict[str, Deque[T]] = {lane: deque() for lane in LANES}
+        # Smooth weighted round robin state
+        self._current: Dict[str, int] = {lane: 0 for lane in LANES}
+        self._cond = threading.Condition()
+        self._closed = False
+        self._log_interval = log_interval
+        self._name = name
+        self._last_log_at = 0.0
+
+    def put(self, item: T, lane: str) -> None:
+        with self._cond:
+            self._lanes[lane].append(item)
+            self._cond.notify()
+
+    def get(self, timeout: Optional[float] = None) -> T:
+        """Remove and return the next item; raises ``queue.Empty`` after ``timeout``, or once closed and drained."""
+        deadline = None if timeout is None else time.monotonic() + timeout
+        with self._cond:
+            while not any(self._lanes.values()):
+                if self._closed:
+                    raise Empty
+                remaining = None if deadline is None else deadline - time.monotonic()
+                if remaining is not None and remaining <= 0:
+                    raise Empty
+                self._cond.wait(remaining)
+            self._maybe_log()
+            return self._lanes[self._next_lane()].popleft()
+
+    def close(self) -> None:
+        """Wake every blocked ``get``; items still queued are returned before it raises ``queue.Empty``."""
+        with self._cond:
+            self._closed = True
+            self._cond.notify_all()
+
+    def empty(self) -> bool:
+        with self._cond:
+            return not any(self._lanes.values())
+
+    def depths(self) -> Dict[str, int]:
+        with self._cond:
+            return {lane: len(items) for lane, items in self._lanes.items()}
+
+    def __len__(self) -> int:
+        with self._cond:
+            return sum(len(items) for items in self._lanes.values())
+
+    def _next_lane(self) -> str:
+        active = [lane for lane in LANES if self._lanes[lane]]
+        total = 0
+        for lane in active:
+            self._current[lane] += self._weights[lane]
+            total += self._weights[lane]
+        # Ties go to the higher-priority lane, which comes first
+        chosen = max(active, key=lambda lane: self._current[lane])
+        self._current[chosen] -= total
+        for lane in LANES:
+            if not self._lanes[lane]:
+                # An idle lane does not bank credit for later
+                self._current[lane] = 0
+        return chosen
+
+    def _maybe_log(self) -> None:
+        now = time.monotonic()
+        # A lone item is not a backlog
+        if now - self._last_log_at < self._log_interval or sum(map(len, self._lanes.values())) < 2:
+            return
+        self._last_log_at = now
+        logging.info(
+            "%s depth: %s",
+            self._name,
+            ", ".join(f"{lane}={len(self._lanes[lane])}" for lane in LANES),
+        )
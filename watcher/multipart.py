@@ -0,0 +1,124 @@
+from __future__ import annotations
+
+import logging
+import mmap
+import os
+import time
+import uuid
+from typing import Dict, List, Union
+
+from watcher.config import UPLOAD_PROGRESS_LOG_SECONDS
+
+_Segment = Union[bytes, mmap.mmap]
+
+
+class MultipartEncoder:
+    """Streaming multipart/form-data body.
+
+    Files are memory-mapped and handed out in the chunks the HTTP client asks
+    for, so peak memory stays flat whatever the image size. ``len()`` gives
+    the exact body size, which lets ``requests`` send a Content-Length
+    instead of buffering. Upload progress and throughput are logged.
+    """
+
+    def __init__(self, fields: Dict[str, str], files: Dict[str, str], label: str) -> None:
+        self.fields = dict(fields)
+        self.boundary = uuid.uuid4().hex
+        self._label = label
+        self._segments: List[_Segment] = []
+        self._maps: List[mmap.mmap] = []
+        try:
+            for name, value in self.fields.items():
+                self._segments.append(
+                    f'--{self.boundary}\r\nContent-Disposition: form-data; name="{name}"\r\n\r\n'
+                    f"{value}\r\n".encode("utf-8")
+                )
+            for name, path in files.items():
+                filename = os.path.basename(path).replace('"', "")
+                self._segments.append(
+                    f'--{self.boundary}\r\nContent-Disposition: form-data; name="{name}"; '
+                    f'filename="{filename}"\r\nContent-Type: application/octet-stream\r\n\r\n'.encode("utf-8")
+                )
+                self._segments.append(self._map_file(path))
+                self._segments.append(b"\r\n")
+            self._segments.append(f"--{self.boundary}--\r\n".encode("utf-8"))
+        except Exception:
+            self.close()
+            raise
+        self._length = sum(len(segment) for segment in self._segments)
+        self._index = 0
+        self._offset = 0
+        self._position = 0
+        self._started_at: float | None = None
+        self._last_log_at = 0.0
+
+    @property
+    def content_type(self) -> str:
+        return f"multipart/form-data; boundary={self.boundary}"
+
+    def __len__(self) -> int:
+        return self._length
+
+    def read(self, size: int = -1) -> bytes:
+        if self._started_at is None:
+            self._started_at = self._last_log_at = time.monotonic()
+        if size is None or size < 0:
+            size = self._length - self._position
+        chunks: List[bytes] = []
+        remaining = size
+        while remaining > 0 and self._index < len(self._segments):
+            segment = self._segments[self._index]
+            chunk = segment[self._offset : self._offset + remaining]
+            chunks.append(chunk)
+            remaining -= len(chunk)
+            self._offset += len(chunk)
+            if self._offset >= len(segment):
+                self._index += 1
+                self._offset = 0
+        data = b"".join(chunks)
+        self._position += len(data)
+        self._report_progress(done=self._index >= len(self._segments) and bool(data))
+        return data
+
+    def close(self) -> None:
+        for mapped in self._maps:
+            mapped.close()
+        self._maps.clear()
+
+    def __enter__(self) -> "MultipartEncoder":
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self.close()
+
+    def _map_file(self, path: str) -> _Segment:
+        with open(path, "rb") as f:
+            size = os.fstat(f.fileno()).st_size
+            if size == 0:
+                return b""
+            # The mapping stays valid after the file object is closed
+            mapped = mmap.mmap(f.fileno(), size, access=mmap.ACCESS_READ)
+        self._maps.append(mapped)
+        return mapped
+
+    def _report_progress(self, done: bool) -> None:
+        now = time.monotonic()
+        elapsed = max(now - (self._started_at or now), 1e-6)
+        rate = self._position / elapsed
+        if done:
+            logging.info(
+                "Uploaded %s: %.1f KB in %.2fs (%.1f KB/s)",
+                self._label,
+                self._length / 1024,
+                elapsed,
+                rate / 1024,
+            )
+        elif now - self._last_log_at >= UPLOAD_PROGRESS_LOG_SECONDS:
+            self._last_log_at = now
+            logging.info(
+                "Uploading %s: %.0f%% of %.1f KB (%.1f KB/s)",
+                self._label,
+                100.0 * self._position / self._length,
+                self._length / 1024,
+                rate / 1024,
+            )
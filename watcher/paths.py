@@ -3,6 +3,9 @@ from typing import Optional
 
 # Steam app IDs below this value are considered invalid/junk folders
 MIN_STEAM_APP_ID = 100
+# Non-Steam shortcuts get 32-bit IDs with the high bit set, or the 64-bit
+# game ID form (id << 32 | 0x02000000); store app IDs are always below this
+SHORTCUT_MIN_APP_ID = 2**31
 
 
 def is_thumbnail_path(path: str) -> bool:
@@ -13,6 +16,10 @@ def is_screenshot_file(path: str) -> bool:
     return path.lower().endswith((".png", ".jpg", ".jpeg"))
 
 
+def is_shortcut_appid(appid: str) -> bool:
+    return appid.isdigit() and int(appid) >= SHORTCUT_MIN_APP_ID
+
+
 def extract_appid_from_path(path: str) -> Optional[str]:
     """
     Steam appid extraction that works both in container and host.
@@ -42,3 +49,8 @@ def extract_appid_from_path(path: str) -> Optional[str]:
         pass
 
     return None
+
+
+def extract_appid_from_dir(directory: str) -> Optional[str]:
+    """Appid of the screenshots in ``directory``, as ``extract_appid_from_path`` sees them."""
+    return extract_appid_from_path(os.path.join(directory, ""))
@@ -0,0 +1,77 @@
+from __future__ import annotations
+
+import threading
+import time
+from typing import Callable, List
+
+
+class TokenBucket:
+    """Token bucket kept as a theoretical arrival time (GCRA).
+
+    ``rate`` tokens per second refill the bucket, up to ``burst`` tokens.
+    Callers reserve a slot and are told when they may proceed, so waiting
+    happens outside any lock.
+    """
+
+    def __init__(self, rate: float, burst: int) -> None:
+        self._interval = 1.0 / rate
+        self._tolerance = (max(1, burst) - 1) * self._interval
+        self._tat = 0.0
+        self._blocked_until = 0.0
+
+    def earliest(self, now: float) -> float:
+        """Earliest time a request arriving at ``now`` may be sent."""
+        return max(now, self._tat - self._tolerance, self._blocked_until)
+
+    def consume(self, at: float) -> None:
+        self._tat = max(self._tat, at) + self._interval
+
+    def block(self, until: float) -> None:
+        """Hold the bucket closed until ``until``, e.g. after a 429."""
+        self._blocked_until = max(self._blocked_until, until)
+        # After a cooldown, resume at the steady rate instead of a full burst
+        self._tat = max(self._tat, self._blocked_until + self._tolerance)
+
+
+class RateLimiter:
+    """Proactive limiter shared by all sender workers.
+
+    Every request must pass both the per-chat and the global bucket.
+    ``defer`` feeds a server-provided ``retry_after`` back in so no worker
+    sends into a known cooldown.
+    """
+
+    def __init__(
+        self,
+        chat_rate: float,
+        chat_burst: int,
+        global_rate: float,
+        global_burst: int,
+        clock: Callable[[], float] = time.monotonic,
+    ) -> None:
+        self._chat = TokenBucket(chat_rate, chat_burst)
+        self._global = TokenBucket(global_rate, global_burst)
+        self._buckets: List[TokenBucket] = [self._chat, self._global]
+        self._clock = clock
+        self._lock = threading.Lock()
+
+    def reserve(self) -> float:
+        """Reserve a send slot; returns how many seconds to wait before using it."""
+        with self._lock:
+            now = self._clock()
+            at = max(bucket.earliest(now) for bucket in self._buckets)
+            for bucket in self._buckets:
+                bucket.consume(at)
+            return at - now
+
+    def acquire(self) -> float:
+        """Block until a send slot is available; returns the time waited."""
+        wait = self.reserve()
+        if wait > 0:
+            time.sleep(wait)
+        return wait
+
+    def defer(self, seconds: float) -> None:
+        """Close the chat bucket for ``seconds``, as reported by Telegram."""
+        with self._lock:
+            self._chat.block(self._clock() + seconds)
@@ -0,0 +1,136 @@
+from __future__ import annotations
+
+import heapq
+import logging
+import os
+from dataclasses import dataclass
+from typing import List, Optional, Tuple
+
+from watcher.imagecheck import is_complete_image
+
+
+READINESS_MODES = ("auto", "events", "poll")
+
+
+@dataclass
+class _Candidate:
+    last: Optional[Tuple[int, float]] = None
+    checks: int = 0
+    closed: bool = False
+    awaiting_close: bool = False
+    # Sequence number of the latest heap entry; older entries are stale
+    seq: int = 0
+
+
+class ReadinessTracker:
+    """Track candidate files until they stop changing.
+
+    Candidates sit in a heap keyed by their next check time, so any number of
+    files can be waited on at once without blocking the sender. A file is
+    ready once two checks ``delay`` seconds apart see the same (size, mtime)
+    and it is at least ``min_size`` bytes; it is given up on after ``attempts``
+    checks. PNG/JPEG files whose end marker is already on disk skip the wait
+    and are ready on their first check.
+
+    In event-driven mode a close-after-write (or move into place) reported via
+    ``mark_closed`` is the readiness signal and nothing is polled while
+    waiting for it; if no event arrives within ``event_timeout`` the file
+    falls back to polling. ``auto`` mode switches to event-driven once the
+    filesystem has been seen delivering close events.
+    """
+
+    def __init__(
+        self,
+        delay: float,
+        attempts: int,
+        min_size: int,
+        mode: str = "poll",
+        event_timeout: float = 0.0,
+    ) -> None:
+        if mode not in READINESS_MODES:
+            raise ValueError(f"Unknown readiness mode: {mode}")
+        self._delay = delay
+        self._attempts = attempts
+        self._min_size = min_size
+        self._mode = mode
+        self._event_timeout = event_timeout
+        self._close_events_seen = False
+        self._heap: List[Tuple[float, int, str]] = []
+        self._candidates: dict[str, _Candidate] = {}
+        self._seq = 0
+
+    @property
+    def event_driven(self) -> bool:
+        return self._mode == "events" or (self._mode == "auto" and self._close_events_seen)
+
+    def add(self, path: str, now: float, await_close: bool = False) -> None:
+        """Track ``path``; ``await_close`` is for files just created, whose close event is still to come."""
+        if path in self._candidates:
+            return
+        self._candidates[path] = _Candidate(awaiting_close=await_close and self.event_driven)
+        self._schedule(path, now)
+
+    def mark_closed(self, path: str, now: float) -> None:
+        """Record that the writer closed (or moved in) ``path``; it is checked right away."""
+        if self._mode == "poll":
+            return
+        if not self._close_events_seen and self._mode == "auto":
+            logging.info("Close events are delivered, switching file readiness to event-driven")
+        self._close_events_seen = True
+        candidate = self._candidates.get(path)
+        if candidate is None or candidate.closed:
+            return
+        candidate.closed = True
+        self._schedule(path, now)
+
+    def poll(self, now: float) -> Tuple[List[str], List[str]]:
+        """Run checks that are due; returns (ready, given_up) paths."""
+        ready: List[str] = []
+        given_up: List[str] = []
+        while self._heap and self._heap[0][0] <= now:
+            _, seq, path = heapq.heappop(self._heap)
+            candidate = self._candidates.get(path)
+            if candidate is None or candidate.seq != seq:
+                # Superseded by a later mark_closed
+                continue
+            candidate.checks += 1
+            current = self._stat(path)
+            if current is not None and (
+                candidate.closed
+                or is_complete_image(path, current[0])
+                or (current == candidate.last and current[0] >= self._min_size)
+            ):
+                del self._candidates[path]
+                ready.append(path)
+                continue
+            candidate.last = current
+            if candidate.awaiting_close:
+                # Wait for the close event; poll only if it never comes
+                candidate.awaiting_close = False
+                self._schedule(path, now + self._event_timeout)
+                continue
+            if candidate.checks >= self._attempts:
+                del self._candidates[path]
+                given_up.append(path)
+                continue
+            self._schedule(path, now + self._delay)
+        return ready, given_up
+
+    def next_deadline(self) -> Optional[float]:
+        return self._heap[0][0] if self._heap else None
+
+    def __len__(self) -> int:
+        return len(self._candidates)
+
+    def _schedule(self, path: str, due: float) -> None:
+        self._seq += 1
+        self._candidates[path].seq = self._seq
+        heapq.heappush(self._heap, (due, self._seq, path))
+
+    @staticmethod
+    def _stat(path: str) -> Optional[Tuple[int, float]]:
+        try:
+            stat = os.stat(path)
+        except OSError:
+            return None
+        return stat.st_size, stat.st_mtime
@@ -0,0 +1,405 @@
+from __future__ import annotations
+
+import logging
+import os
+import threading
+import time
+from array import array
+from collections.abc import Set
+from dataclasses import dataclass
+from typing import Iterable, Iterator, List, NamedTuple, Optional, Tuple
+
+try:
+    import resource
+except ImportError:  # not available on Windows
+    resource = None  # type: ignore[assignment]
+
+from watcher.paths import extract_appid_from_dir, is_screenshot_file, is_thumbnail_path
+
+
+class FileStat(NamedTuple):
+    size: int
+    mtime_ns: int
+
+
+class FileList:
+    """Immutable, sorted filenames of one directory with their sizes and mtimes.
+
+    The names are concatenated into one string with an offsets array, and
+    sizes and mtimes live in int64 arrays, so a file costs a few dozen bytes
+    instead of a dict entry, a string and a tuple. Lookups bisect the names.
+    Changes return a new list, which lets scans and snapshots share one.
+    """
+
+    __slots__ = ("_names", "_offsets", "_sizes", "_mtimes")
+
+    def __init__(self, entries: Iterable[Tuple[str, FileStat]] = ()) -> None:
+        items = sorted(dict(entries).items())
+        self._names = "".join(name for name, _ in items)
+        self._offsets = array("I", [0])
+        for name, _ in items:
+            self._offsets.append(self._offsets[-1] + len(name))
+        self._sizes = array("q", (stat.size for _, stat in items))
+        self._mtimes = array("q", (stat.mtime_ns for _, stat in items))
+
+    def __len__(self) -> int:
+        return len(self._sizes)
+
+    def __iter__(self) -> Iterator[str]:
+        return (self._name(i) for i in range(len(self)))
+
+    def __contains__(self, name: object) -> bool:
+        return isinstance(name, str) and self._find(name) >= 0
+
+    def get(self, name: str) -> Optional[FileStat]:
+        i = self._find(name)
+        return None if i < 0 else FileStat(self._sizes[i], self._mtimes[i])
+
+    def items(self) -> Iterator[Tuple[str, FileStat]]:
+        for i in range(len(self)):
+            yield self._name(i), FileStat(self._sizes[i], self._mtimes[i])
+
+    def with_file(self, name: str, stat: FileStat) -> FileList:
+        i = self._bisect(name)
+        if i < len(self) and self._name(i) == name:
+            if self._sizes[i] == stat.size and self._mtimes[i] == stat.mtime_ns:
+                return self
+            sizes, mtimes = self._sizes[:], self._mtimes[:]
+            sizes[i], mtimes[i] = stat.size, stat.mtime_ns
+            return self._copy(self._names, self._offsets, sizes, mtimes)
+        # Splice the name in at its sorted position; later offsets shift by its length
+        start = self._offsets[i]
+        shift = len(name)
+        offsets = self._offsets[: i + 1]
+        offsets.extend(offset + shift for offset in self._offsets[i:])
+        return self._copy(
+            self._names[:start] + name + self._names[start:],
+            offsets,
+            self._sizes[:i] + array("q", [stat.size]) + self._sizes[i:],
+            self._mtimes[:i] + array("q", [stat.mtime_ns]) + self._mtimes[i:],
+        )
+
+    def without(self, name: str) -> FileList:
+        i = self._find(name)
+        if i < 0:
+            return self
+        start, end = self._offsets[i], self._offsets[i + 1]
+        offsets = self._offsets[: i + 1]
+        offsets.extend(offset - (end - start) for offset in self._offsets[i + 2 :])
+        return self._copy(
+            self._names[:start] + self._names[end:],
+            offsets,
+            self._sizes[:i] + self._sizes[i + 1 :],
+            self._mtimes[:i] + self._mtimes[i + 1 :],
+        )
+
+    def to_blobs(self) -> Tuple[str, bytes, bytes, bytes]:
+        """Return the names string and the packed offsets, sizes and mtimes, for persisting."""
+        return self._names, self._offsets.tobytes(), self._sizes.tobytes(), self._mtimes.tobytes()
+
+    @classmethod
+    def from_blobs(cls, names: str, offsets: bytes, sizes: bytes, mtimes: bytes) -> FileList:
+        """Rebuild a list saved with ``to_blobs``; raises ValueError if the parts do not fit together."""
+        files = cls._copy(names, array("I", offsets), array("q", sizes), array("q", mtimes))
+        if (
+            len(files._offsets) != len(files._sizes) + 1
+            or len(files._mtimes) != len(files._sizes)
+            or files._offsets[0] != 0
+            or files._offsets[-1] != len(names)
+        ):
+            raise ValueError("inconsistent packed file list")
+        return files
+
+    def nbytes(self) -> int:
+        """Approximate memory held by the arrays and the names string."""
+        return sum(a.itemsize * len(a) for a in (self._offsets, self._sizes, self._mtimes)) + len(self._names)
+
+    def _name(self, i: int) -> str:
+        return self._names[self._offsets[i] : self._offsets[i + 1]]
+
+    def _bisect(self, name: str) -> int:
+        lo, hi = 0, len(self)
+        while lo < hi:
+            mid = (lo + hi) // 2
+            if self._name(mid) < name:
+                lo = mid + 1
+            else:
+                hi = mid
+        return lo
+
+    def _find(self, name: str) -> int:
+        i = self._bisect(name)
+        return i if i < len(self) and self._name(i) == name else -1
+
+    @classmethod
+    def _copy(cls, names: str, offsets: array, sizes: array, mtimes: array) -> FileList:
+        new = cls.__new__(cls)
+        new._names, new._offsets, new._sizes, new._mtimes = names, offsets, sizes, mtimes
+        return new
+
+
+_NO_FILES = FileList()
+
+
+@dataclass
+class _DirState:
+    mtime_ns: int
+    appid: Optional[str]
+    # Screenshots from the directory listing; replaced, never mutated
+    files: FileList
+    subdirs: Tuple[str, ...]
+
+
+@dataclass(frozen=True)
+class ScanDir:
+    """A listed directory as persisted between runs: its mtime, subdirs and screenshots."""
+
+    path: str
+    mtime_ns: int
+    subdirs: Tuple[str, ...]
+    # Compared by identity: an unchanged directory keeps the same list
+    files: FileList
+
+
+@dataclass(frozen=True)
+class ScanStats:
+    dirs_listed: int
+    dirs_unchanged: int
+    files: int
+    duration: float
+    # Lifetime peak resident set size of the whole process (not of this scan),
+    # None where unavailable
+    process_peak_rss_mb: Optional[float] = None
+
+
+class ScanSnapshot(Set):
+    """Immutable view of the screenshots found by a scan, grouped by directory.
+
+    Behaves as a set of full paths, but stores each directory once with a
+    ``FileList`` of its filenames and their size/mtime instead of a path
+    string per file. File lists are shared with the scanner, not copied, so
+    taking a snapshot costs one entry per directory.
+    """
+
+    def __init__(self, dirs: dict[str, _DirState]) -> None:
+        self._dirs = {d: (state.appid, state.files) for d, state in dirs.items() if state.files}
+        self._len = sum(len(files) for _, files in self._dirs.values())
+
+    def __contains__(self, path: object) -> bool:
+        if not isinstance(path, str):
+            return False
+        directory, name = os.path.split(path)
+        entry = self._dirs.get(directory)
+        return entry is not None and name in entry[1]
+
+    def __iter__(self) -> Iterator[str]:
+        for directory, (_, files) in self._dirs.items():
+            for name in files:
+                yield os.path.join(directory, name)
+
+    def __len__(self) -> int:
+        return self._len
+
+    def stat(self, path: str) -> Optional[FileStat]:
+        """Return the size/mtime recorded for ``path``, or None if it is not known."""
+        directory, name = os.path.split(path)
+        entry = self._dirs.get(directory)
+        return None if entry is None else entry[1].get(name)
+
+    def stats(self) -> Iterator[Tuple[str, FileStat]]:
+        """Yield (path, stat) for every screenshot, as recorded by the scan."""
+        for directory, (_, files) in self._dirs.items():
+            for name, stat in files.items():
+                yield os.path.join(directory, name), stat
+
+    def appids(self) -> set[str]:
+        return {appid for appid, _ in self._dirs.values() if appid}
+
+    def diff(self, previous: ScanSnapshot) -> Tuple[List[str], List[str]]:
+        """Return the (added, removed) paths since ``previous``.
+
+        Directories whose file list is shared with ``previous`` are unchanged
+        and skipped without looking at their files.
+        """
+        added: List[str] = []
+        removed: List[str] = []
+        for directory, (_, files) in self._dirs.items():
+            old = previous._dirs.get(directory)
+            old_files = old[1] if old is not None else _NO_FILES
+            if files is old_files:
+                continue
+            added.extend(os.path.join(directory, name) for name in files if name not in old_files)
+            removed.extend(os.path.join(directory, name) for name in old_files if name not in files)
+        for directory, (_, old_files) in previous._dirs.items():
+            if directory not in self._dirs:
+                removed.extend(os.path.join(directory, name) for name in old_files)
+        return added, removed
+
+    def nbytes(self) -> int:
+        """Approximate memory held by the file lists and directory strings."""
+        return sum(files.nbytes() + len(directory) for directory, (_, files) in self._dirs.items())
+
+
+class ScreenshotScanner:
+    """Incremental screenshot tree scanner.
+
+    Directory mtimes are cached between scans, so only folders whose mtime
+    changed are re-listed. Each listing is a single ``os.scandir`` pass that
+    classifies the directory (thumbnails, appid) once and takes size and
+    mtime from the entries, so callers never stat the files again. Watchdog
+    events keep the known set current between scans via ``add``/``discard``.
+    """
+
+    def __init__(self, root: str) -> None:
+        self._root = os.path.normpath(root)
+        self._dirs: dict[str, _DirState] = {}
+        self._lock = threading.Lock()
+        self.last_stats: ScanStats | None = None
+
+    def scan(self, full: bool = False) -> ScanSnapshot:
+        """Walk the tree, re-listing only directories whose mtime changed.
+
+        With ``full=True`` every directory is re-listed regardless of the cache.
+        """
+        started = time.monotonic()
+        listed = 0
+        unchanged = 0
+        seen: set[str] = set()
+        stack = [self._root]
+        while stack:
+            directory = stack.pop()
+            try:
+                mtime_ns = os.stat(directory).st_mtime_ns
+            except OSError:
+                continue
+            seen.add(directory)
+            with self._lock:
+                cached = self._dirs.get(directory)
+            if cached is not None and not full and cached.mtime_ns == mtime_ns:
+                unchanged += 1
+                stack.extend(cached.subdirs)
+                continue
+            state = self._list_directory(directory, mtime_ns)
+            if state is None:
+                seen.discard(directory)
+                continue
+            listed += 1
+            with self._lock:
+                self._dirs[directory] = state
+            stack.extend(state.subdirs)
+
+        with self._lock:
+            for directory in [d for d in self._dirs if d not in seen]:
+                del self._dirs[directory]
+            result = ScanSnapshot(self._dirs)
+
+        rss_mb = _process_peak_rss_mb()
+        self.last_stats = ScanStats(
+            dirs_listed=listed,
+            dirs_unchanged=unchanged,
+            files=len(result),
+            duration=time.monotonic() - started,
+            process_peak_rss_mb=rss_mb,
+        )
+        logging.info(
+            "Scanned %s: %s dirs listed, %s unchanged, %s screenshots in %.3fs (index %.1f MB, process peak RSS %s MB)",
+            self._root,
+            listed,
+            unchanged,
+            len(result),
+            self.last_stats.duration,
+            result.nbytes() / 1e6,
+            "n/a" if rss_mb is None else f"{rss_mb:.1f}",
+        )
+        return result
+
+    def snapshot(self) -> ScanSnapshot:
+        """Return the known screenshot paths without touching the filesystem."""
+        with self._lock:
+            return ScanSnapshot(self._dirs)
+
+    def export(self) -> list[ScanDir]:
+        """Return every listed directory, for persisting and ``restore`` on the next start."""
+        with self._lock:
+            return [
+                ScanDir(directory, state.mtime_ns, state.subdirs, state.files)
+                for directory, state in self._dirs.items()
+                if state.mtime_ns >= 0
+            ]
+
+    def restore(self, dirs: Iterable[ScanDir]) -> int:
+        """Seed the mtime cache from a persisted snapshot; returns the number of directories restored.
+
+        A restored directory is only re-listed by the next ``scan`` if its mtime
+        changed; until then its file list, with sizes and mtimes, is the
+        persisted one.
+        """
+        restored = 0
+        with self._lock:
+            for entry in dirs:
+                if entry.path in self._dirs:
+                    continue
+                self._dirs[entry.path] = _DirState(
+                    mtime_ns=entry.mtime_ns,
+                    appid=extract_appid_from_dir(entry.path),
+                    files=entry.files,
+                    subdirs=tuple(entry.subdirs),
+                )
+                restored += 1
+        return restored
+
+    def add(self, path: str) -> None:
+        if is_thumbnail_path(path) or not is_screenshot_file(path):
+            return
+        try:
+            st = os.stat(path)
+            stat = FileStat(st.st_size, st.st_mtime_ns)
+        except OSError:
+            # Events report new files; treat an unreadable one as just created
+            stat = FileStat(0, time.time_ns())
+        directory, name = os.path.split(path)
+        with self._lock:
+            state = self._dirs.get(directory)
+            if state is None:
+                # Not listed yet: a placeholder mtime makes the next scan list it
+                state = self._dirs[directory] = _DirState(-1, extract_appid_from_dir(directory), _NO_FILES, ())
+            state.files = state.files.with_file(name, stat)
+
+    def discard(self, path: str) -> None:
+        directory, name = os.path.split(path)
+        with self._lock:
+            state = self._dirs.get(directory)
+            if state is not None:
+                state.files = state.files.without(name)
+
+    def _list_directory(self, directory: str, mtime_ns: int) -> _DirState | None:
+        files: List[Tuple[str, FileStat]] = []
+        subdirs: list[str] = []
+        try:
+            with os.scandir(directory) as entries:
+                for entry in entries:
+                    try:
+                        if entry.is_dir(follow_symlinks=False):
+                            if entry.name.lower() != "thumbnails":
+                                subdirs.append(entry.path)
+                            continue
+                        if is_screenshot_file(entry.name):
+                            st = entry.stat()
+                            files.append((entry.name, FileStat(st.st_size, st.st_mtime_ns)))
+                    except OSError:
+                        continue
+        except OSError:
+            return None
+        return _DirState(
+            mtime_ns=mtime_ns,
+            appid=extract_appid_from_dir(directory),
+            files=FileList(files),
+            subdirs=tuple(subdirs),
+        )
+
+
+def _process_peak_rss_mb() -> Optional[float]:
+    if resource is None:
+        return None
+    # ru_maxrss is in kilobytes on Linux
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
@@ -0,0 +1,125 @@
+from __future__ import annotations
+
+import logging
+import os
+import struct
+import threading
+import zlib
+from typing import Dict, Optional, Tuple
+
+# Binary VDF value types
+_TYPE_MAP = 0x00
+_TYPE_STRING = 0x01
+_TYPE_INT32 = 0x02
+_TYPE_FLOAT32 = 0x03
+_TYPE_UINT64 = 0x07
+_TYPE_MAP_END = 0x08
+_FIXED_SIZES = {_TYPE_INT32: 4, _TYPE_FLOAT32: 4, _TYPE_UINT64: 8}
+
+
+def parse_binary_vdf(data: bytes) -> dict:
+    """Parse a binary VDF document (as used by shortcuts.vdf) into nested dicts.
+
+    Raises ValueError on truncated or malformed input.
+    """
+    root, _ = _parse_map(data, 0)
+    return root
+
+
+def _parse_map(data: bytes, pos: int) -> Tuple[dict, int]:
+    result: dict = {}
+    while True:
+        if pos >= len(data):
+            # Top-level documents may end without a closing marker
+            return result, pos
+        value_type = data[pos]
+        pos += 1
+        if value_type == _TYPE_MAP_END:
+            return result, pos
+        key, pos = _read_cstring(data, pos)
+        if value_type == _TYPE_MAP:
+            result[key], pos = _parse_map(data, pos)
+        elif value_type == _TYPE_STRING:
+            result[key], pos = _read_cstring(data, pos)
+        elif value_type in _FIXED_SIZES:
+            size = _FIXED_SIZES[value_type]
+            if pos + size > len(data):
+                raise ValueError("truncated binary VDF value")
+            fmt = {_TYPE_INT32: "<i", _TYPE_FLOAT32: "<f", _TYPE_UINT64: "<Q"}[value_type]
+            (result[key],) = struct.unpack_from(fmt, data, pos)
+            pos += size
+        else:
+            raise ValueError(f"unknown binary VDF type 0x{value_type:02x} at offset {pos - 1}")
+
+
+def _read_cstring(data: bytes, pos: int) -> Tuple[str, int]:
+    end = data.find(b"\x00", pos)
+    if end < 0:
+        raise ValueError("unterminated binary VDF string")
+    return data[pos:end].decode("utf-8", errors="replace"), end + 1
+
+
+def parse_shortcuts(data: bytes) -> Dict[str, str]:
+    """Map shortcut IDs to names, keyed by both the 32-bit ID and the 64-bit game ID."""
+    names: Dict[str, str] = {}
+    shortcuts = parse_binary_vdf(data).get("shortcuts", {})
+    if not isinstance(shortcuts, dict):
+        return names
+    for entry in shortcuts.values():
+        if not isinstance(entry, dict):
+            continue
+        fields = {key.lower(): value for key, value in entry.items()}
+        name = fields.get("appname")
+        if not isinstance(name, str) or not name.strip():
+            continue
+        appid = fields.get("appid")
+        if isinstance(appid, int):
+            short_id = appid & 0xFFFFFFFF
+        else:
+            # Older clients don't store the ID; it is derived from exe + name
+            exe = fields.get("exe") if isinstance(fields.get("exe"), str) else ""
+            short_id = zlib.crc32((exe + name).encode("utf-8")) | 0x80000000
+        names[str(short_id)] = name.strip()
+        names[str((short_id << 32) | 0x02000000)] = name.strip()
+    return names
+
+
+class ShortcutResolver:
+    """Names for non-Steam shortcuts from a local ``shortcuts.vdf``.
+
+    The file is parsed into memory and re-read only when its mtime changes,
+    so lookups never touch the network.
+    """
+
+    def __init__(self, path: str) -> None:
+        self._path = path
+        self._lock = threading.Lock()
+        self._mtime_ns: Optional[int] = None
+        self._names: Dict[str, str] = {}
+
+    def lookup(self, appid: str) -> Optional[str]:
+        self._refresh()
+        return self._names.get(appid)
+
+    def _refresh(self) -> None:
+        try:
+            mtime_ns = os.stat(self._path).st_mtime_ns
+        except OSError:
+            mtime_ns = None
+        if mtime_ns == self._mtime_ns:
+            return
+        with self._lock:
+            if mtime_ns == self._mtime_ns:
+                return
+            names: Dict[str, str] = {}
+            if mtime_ns is not None:
+                try:
+                    with open(self._path, "rb") as f:
+                        names = parse_shortcuts(f.read())
+                    logging.info("Loaded %s non-Steam shortcuts from %s", len(names) // 2, self._path)
+                except (OSError, ValueError) as exc:
+                    # Keep the last good names; a rewrite will bump the mtime again
+                    logging.warning("Could not read non-Steam shortcuts from %s: %s", self._path, exc)
+                    names = self._names
+            self._names = names
+            self._mtime_ns = mtime_ns
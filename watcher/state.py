@@ -1,19 +1,41 @@
 from __future__ import annotations
 
+import hashlib
 import json
 import logging
 import os
 import sqlite3
 import threading
 import time
+from contextlib import contextmanager
 from dataclasses import dataclass
-from typing import List, Optional
+from typing import AbstractSet, Iterable, Iterator, List, Mapping, Optional, Tuple, Union
 
 from watcher.config import (
     RETRY_INTERVAL_SECONDS,
     RETRY_MAX_INTERVAL_SECONDS,
+    STATE_COMMIT_INTERVAL_SECONDS,
+    STATE_DURABILITY,
+    STATE_PAGE_SIZE,
+    STATE_PRUNE_BATCH_SIZE,
+    STATE_SYNCHRONOUS,
+    STATE_VACUUM_BATCH_PAGES,
     StateConfig,
 )
+from watcher.paths import extract_appid_from_dir
+from watcher.scanner import FileList, ScanDir
+
+DURABILITY_MODES = ("batched", "immediate")
+
+# Integer status codes stored in screenshots.status; the API uses the names
+STATUS_PENDING = 0
+STATUS_SENT = 1
+_STATUS_NAMES = {STATUS_PENDING: "pending", STATUS_SENT: "sent"}
+
+
+def _path_key(path: str) -> int:
+    """Signed 64-bit hash of a path, the key of a sent tombstone."""
+    return int.from_bytes(hashlib.blake2b(path.encode("utf-8"), digest_size=8).digest(), "big", signed=True)
 
 
 @dataclass(frozen=True)
@@ -24,16 +46,30 @@ class PendingItem:
 
 
 class SendStateStore:
+    # Each directory path is stored once; screenshots refer to it by id
+    _CREATE_DIRS = """
+        CREATE TABLE IF NOT EXISTS dirs (
+            id INTEGER PRIMARY KEY,
+            path TEXT NOT NULL UNIQUE,
+            appid TEXT
+        )
+    """
     _CREATE_TABLE = """
         CREATE TABLE IF NOT EXISTS screenshots (
-            path TEXT PRIMARY KEY,
-            status TEXT NOT NULL,
+            dir_id INTEGER NOT NULL REFERENCES dirs (id),
+            filename TEXT NOT NULL,
+            status INTEGER NOT NULL,
             first_seen_at REAL,
             last_attempt_at REAL,
             next_retry_at REAL,
             attempts INTEGER NOT NULL DEFAULT 0,
             last_error TEXT,
-            sent_at REAL
+            sent_at REAL,
+            content_hash TEXT,
+            -- File size and mtime the content hash was taken at
+            hashed_size INTEGER,
+            hashed_mtime_ns INTEGER,
+            UNIQUE (dir_id, filename)
         )
     """
     _CREATE_META = """
@@ -42,21 +78,96 @@ class SendStateStore:
             value TEXT NOT NULL
         )
     """
+    # Covers the retry, cleanup and next-deadline scans, which only read pending rows
     _CREATE_INDEX = """
-        CREATE INDEX IF NOT EXISTS idx_status_retry
-        ON screenshots (status, next_retry_at)
+        CREATE INDEX IF NOT EXISTS idx_pending_retry
+        ON screenshots (status, next_retry_at, dir_id, filename, attempts, first_seen_at) WHERE status=0
+    """
+    # Covers per-directory (and so per-appid) counts by status
+    _CREATE_DIR_INDEX = """
+        CREATE INDEX IF NOT EXISTS idx_dir_status
+        ON screenshots (dir_id, status)
+    """
+    _CREATE_HASH_INDEX = """
+        CREATE INDEX IF NOT EXISTS idx_content_hash
+        ON screenshots (content_hash) WHERE content_hash IS NOT NULL
+    """
+    _CREATE_STEAM_APPS = """
+        CREATE TABLE IF NOT EXISTS steam_apps (
+            appid TEXT PRIMARY KEY,
+            name TEXT,
+            fetched_at REAL NOT NULL
+        )
+    """
+    # One row per listed directory, holding its packed FileList
+    _CREATE_SCAN_DIRS = """
+        CREATE TABLE IF NOT EXISTS scan_dirs (
+            path TEXT PRIMARY KEY,
+            mtime_ns INTEGER NOT NULL,
+            subdirs TEXT NOT NULL,
+            names TEXT NOT NULL,
+            offsets BLOB NOT NULL,
+            sizes BLOB NOT NULL,
+            mtimes BLOB NOT NULL
+        )
+    """
+    _CREATE_SENT_INDEX = """
+        CREATE INDEX IF NOT EXISTS idx_sent_at
+        ON screenshots (sent_at) WHERE status=1
     """
+    # Pruned sent rows, keyed by path hash
+    _CREATE_TOMBSTONES = """
+        CREATE TABLE IF NOT EXISTS sent_tombstones (
+            path_hash INTEGER PRIMARY KEY
+        )
+    """
+    _COLUMNS = "dir_id, filename, status, first_seen_at, last_attempt_at, next_retry_at, attempts, last_error, sent_at"
 
-    def __init__(self, config: StateConfig) -> None:
+    def __init__(self, config: StateConfig, durability: str = STATE_DURABILITY) -> None:
+        if durability not in DURABILITY_MODES:
+            raise ValueError(f"Unknown state durability: {durability}")
         self._path = config.file_path
         self._lock = threading.Lock()
         os.makedirs(os.path.dirname(self._path) or ".", exist_ok=True)
         self._conn = self._open_connection()
         self._conn.row_factory = sqlite3.Row
+        self._conn.execute(f"PRAGMA synchronous={STATE_SYNCHRONOUS}")
+        self._durability = durability
+        # Set while transitions are written but not yet committed
+        self._dirty = threading.Event()
+        self._closing = threading.Event()
+        self._committer: Optional[threading.Thread] = None
+        # One read-only connection per thread for scans; self._conn is the only writer
+        self._local = threading.local()
+        self._readers: List[sqlite3.Connection] = []
+        self._readers_lock = threading.Lock()
+        # Directory path -> dirs.id, filled by the writer
+        self._dir_ids: dict[str, int] = {}
+        # The scan snapshot as last saved or loaded, so saves only write changed directories
+        self._scan_dirs: dict[str, ScanDir] = {}
         with self._conn:
-            self._conn.execute(self._CREATE_TABLE)
             self._conn.execute(self._CREATE_META)
+            self._migrate_schema()
+            scan_columns = {r["name"] for r in self._conn.execute("PRAGMA table_info(scan_dirs)").fetchall()}
+            if "entries" in scan_columns:
+                # The snapshot is only a cache; one without file lists is rebuilt by the next scan
+                self._conn.execute("DROP TABLE scan_dirs")
+            self._conn.execute(self._CREATE_DIRS)
+            self._conn.execute(self._CREATE_TABLE)
+            columns = {r["name"] for r in self._conn.execute("PRAGMA table_info(screenshots)").fetchall()}
+            for column in ("hashed_size", "hashed_mtime_ns"):
+                if column not in columns:
+                    self._conn.execute(f"ALTER TABLE screenshots ADD COLUMN {column} INTEGER")
             self._conn.execute(self._CREATE_INDEX)
+            self._conn.execute(self._CREATE_DIR_INDEX)
+            self._conn.execute(self._CREATE_HASH_INDEX)
+            self._conn.execute(self._CREATE_STEAM_APPS)
+            self._conn.execute(self._CREATE_SCAN_DIRS)
+            self._conn.execute(self._CREATE_SENT_INDEX)
+            self._conn.execute(self._CREATE_TOMBSTONES)
+            tombstone_columns = {r["name"] for r in self._conn.execute("PRAGMA table_info(sent_tombstones)")}
+            if "dir_hash" in tombstone_columns:
+                self._conn.execute("ALTER TABLE sent_tombstones DROP COLUMN dir_hash")
             self._conn.execute(
                 "INSERT OR IGNORE INTO metadata (key, value) VALUES ('created_at', ?)",
                 (str(time.time()),),
@@ -69,11 +180,16 @@ class SendStateStore:
         self.update_heartbeat()
 
         self._migrate_from_json()
+        if durability == "batched":
+            self._committer = threading.Thread(target=self._commit_loop, name="state-commit", daemon=True)
+            self._committer.start()
 
     def _open_connection(self) -> sqlite3.Connection:
         """Open SQLite connection, renaming the file if it is not a valid database."""
         try:
             conn = sqlite3.connect(self._path, check_same_thread=False)
+            # Only takes effect on a new DB; older ones are converted by convert_auto_vacuum
+            conn.execute("PRAGMA auto_vacuum=INCREMENTAL")
             conn.execute("PRAGMA journal_mode=WAL")  # probe validity
             return conn
         except sqlite3.DatabaseError:
@@ -87,7 +203,68 @@ class SendStateStore:
                 os.replace(self._path, backup)
             except OSError as e:
                 logging.error("Could not move invalid state file: %s", e)
-            return sqlite3.connect(self._path, check_same_thread=False)
+            conn = sqlite3.connect(self._path, check_same_thread=False)
+            conn.execute("PRAGMA auto_vacuum=INCREMENTAL")
+            return conn
+
+    def convert_auto_vacuum(self) -> None:
+        """Switch a DB created before incremental vacuum over to it, once.
+
+        The conversion rewrites the whole file with VACUUM while holding the
+        writer, so it is run in the background after startup, not at open.
+        """
+        with self._lock:
+            if self._conn.execute("PRAGMA auto_vacuum").fetchone()[0] == 2:
+                return
+            # VACUUM cannot run inside the open group-commit transaction
+            self._dirty.clear()
+            self._conn.commit()
+            started = time.monotonic()
+            try:
+                self._conn.execute("PRAGMA auto_vacuum=INCREMENTAL")
+                self._conn.execute("VACUUM")
+            except sqlite3.OperationalError as e:
+                logging.warning("State DB auto-vacuum conversion skipped: %s", e)
+                return
+        logging.info("Converted state DB to incremental auto-vacuum in %.2fs", time.monotonic() - started)
+
+    def _migrate_schema(self) -> None:
+        """Move a DB keyed by full path over to the dirs + filename layout.
+
+        Runs in one transaction at open: the old table is renamed aside, its
+        rows are copied across with their directories interned and statuses
+        mapped to codes, and it is then dropped along with its indexes.
+        """
+        columns = {r["name"] for r in self._conn.execute("PRAGMA table_info(screenshots)").fetchall()}
+        if "path" not in columns:
+            return
+        started = time.monotonic()
+        self._conn.create_function("dirname", 1, os.path.dirname, deterministic=True)
+        self._conn.create_function("basename", 1, os.path.basename, deterministic=True)
+        self._conn.create_function("dir_appid", 1, extract_appid_from_dir, deterministic=True)
+        content_hash = "content_hash" if "content_hash" in columns else "NULL"
+        if not self._conn.in_transaction:
+            self._conn.execute("BEGIN")
+        self._conn.execute("ALTER TABLE screenshots RENAME TO screenshots_legacy")
+        self._conn.execute(self._CREATE_DIRS)
+        self._conn.execute(self._CREATE_TABLE)
+        self._conn.execute(
+            """INSERT OR IGNORE INTO dirs (path, appid)
+               SELECT DISTINCT dirname(path), dir_appid(dirname(path)) FROM screenshots_legacy"""
+        )
+        migrated = self._conn.execute(
+            f"""INSERT OR IGNORE INTO screenshots ({self._COLUMNS}, content_hash)
+                SELECT d.id, basename(l.path), CASE l.status WHEN 'sent' THEN {STATUS_SENT} ELSE {STATUS_PENDING} END,
+                       l.first_seen_at, l.last_attempt_at, l.next_retry_at, l.attempts, l.last_error, l.sent_at,
+                       {content_hash}
+                FROM screenshots_legacy l JOIN dirs d ON d.path = dirname(l.path)"""
+        ).rowcount
+        self._conn.execute("DROP TABLE screenshots_legacy")
+        logging.info(
+            "Migrated state schema: %s records moved to dirs + filename keys in %.2fs",
+            migrated,
+            time.monotonic() - started,
+        )
 
     def _migrate_from_json(self) -> None:
         base = os.path.splitext(self._path)[0]
@@ -106,7 +283,7 @@ class SendStateStore:
             rows = [
                 (
                     path,
-                    item.get("status", "pending"),
+                    STATUS_SENT if item.get("status") == "sent" else STATUS_PENDING,
                     item.get("first_seen_at"),
                     item.get("last_attempt_at"),
                     item.get("next_retry_at"),
@@ -116,144 +293,526 @@ class SendStateStore:
                 )
                 for path, item in records.items()
             ]
-            with self._conn:
-                self._conn.executemany(
-                    "INSERT OR IGNORE INTO screenshots VALUES (?,?,?,?,?,?,?,?)",
-                    rows,
-                )
+            with self._lock:
+                with self._conn:
+                    self._insert_rows(rows)
             logging.info("Migrated %d records from %s to SQLite", len(rows), json_path)
             os.rename(json_path, json_path + ".migrated")
         except Exception as e:
             logging.warning("Failed to migrate from JSON state: %s", e)
 
     def mark_discovered(self, path: str) -> bool:
+        """Track ``path`` as pending unless it was already sent; True if it should be sent."""
         now = time.time()
+        directory, filename = os.path.split(path)
         with self._lock:
-            row = self._conn.execute(
-                "SELECT status FROM screenshots WHERE path = ?", (path,)
-            ).fetchone()
-            if row and row["status"] == "sent":
-                return False
-            if row is None:
-                with self._conn:
-                    self._conn.execute(
-                        "INSERT INTO screenshots (path, status, first_seen_at, next_retry_at, attempts) VALUES (?, 'pending', ?, ?, 0)",
-                        (path, now, now),
-                    )
-                return True
-            if row["status"] != "pending":
-                with self._conn:
-                    self._conn.execute(
-                        "UPDATE screenshots SET status='pending', next_retry_at=COALESCE(next_retry_at, ?) WHERE path=?",
-                        (now, path),
-                    )
-            return True
+            # Inserts nothing (and returns no row) for a pruned, tombstoned path
+            rows = self._write(
+                f"""INSERT INTO screenshots (dir_id, filename, status, first_seen_at, next_retry_at, attempts)
+                    SELECT ?, ?, {STATUS_PENDING}, ?, ?, 0
+                    WHERE NOT EXISTS (SELECT 1 FROM sent_tombstones WHERE path_hash = ?)
+                    ON CONFLICT(dir_id, filename) DO UPDATE SET
+                        next_retry_at=CASE WHEN status={STATUS_SENT} THEN next_retry_at
+                                           ELSE COALESCE(next_retry_at, excluded.next_retry_at) END
+                    RETURNING status""",
+                (self._dir_id(directory), filename, now, now, _path_key(path)),
+            )
+            return bool(rows) and rows[0]["status"] != STATUS_SENT
 
     def mark_sent(self, path: str) -> None:
         now = time.time()
+        directory, filename = os.path.split(path)
         with self._lock:
-            with self._conn:
-                self._conn.execute(
-                    """INSERT INTO screenshots (path, status, first_seen_at, last_attempt_at, attempts, sent_at)
-                       VALUES (?, 'sent', ?, ?, 1, ?)
-                       ON CONFLICT(path) DO UPDATE SET
-                           status='sent', last_attempt_at=excluded.last_attempt_at,
-                           next_retry_at=NULL, last_error=NULL, sent_at=excluded.sent_at""",
-                    (path, now, now, now),
-                )
+            self._write(
+                f"""INSERT INTO screenshots (dir_id, filename, status, first_seen_at, last_attempt_at, attempts, sent_at)
+                    VALUES (?, ?, {STATUS_SENT}, ?, ?, 1, ?)
+                    ON CONFLICT(dir_id, filename) DO UPDATE SET
+                        status={STATUS_SENT}, last_attempt_at=excluded.last_attempt_at,
+                        next_retry_at=NULL, last_error=NULL, sent_at=excluded.sent_at""",
+                (self._dir_id(directory), filename, now, now, now),
+            )
 
-    def mark_failed(self, path: str, error: str) -> float:
+    def mark_failed(self, path: str, error: str) -> Optional[float]:
         """Mark a screenshot as failed and schedule exponential-backoff retry.
 
-        Returns the absolute timestamp of the next retry.
+        Returns the absolute timestamp of the next retry, or None if ``path``
+        is not tracked, e.g. because it was renamed while being sent. Only
+        existing rows are updated, so a stale path never gets a row again.
         """
         now = time.time()
+        directory, filename = os.path.split(path)
         with self._lock:
+            dir_id = self._dir_id(directory, create=False)
+            if dir_id is None:
+                return None
+            # The delay doubles with each earlier attempt, capped at the max interval
+            rows = self._write(
+                f"""UPDATE screenshots SET
+                        status={STATUS_PENDING}, last_attempt_at=:now,
+                        next_retry_at=:now + MIN(:max, :interval * (1 << MIN(attempts, 30))),
+                        attempts=attempts + 1, last_error=:error, sent_at=NULL
+                    WHERE dir_id = :dir_id AND filename = :filename
+                    RETURNING next_retry_at""",
+                {
+                    "dir_id": dir_id,
+                    "filename": filename,
+                    "now": now,
+                    "max": RETRY_MAX_INTERVAL_SECONDS,
+                    "interval": RETRY_INTERVAL_SECONDS,
+                    "error": error,
+                },
+            )
+            return float(rows[0]["next_retry_at"]) if rows else None
+
+    def get_content_hash(self, path: str, size: int, mtime_ns: int) -> Optional[str]:
+        """Return the stored content hash of ``path`` if it was taken at this size and mtime."""
+        directory, filename = os.path.split(path)
+        with self._lock:
+            dir_id = self._dir_id(directory, create=False)
+            if dir_id is None:
+                return None
             row = self._conn.execute(
-                "SELECT attempts FROM screenshots WHERE path = ?", (path,)
+                """SELECT content_hash FROM screenshots
+                   WHERE dir_id = ? AND filename = ? AND hashed_size = ? AND hashed_mtime_ns = ?""",
+                (dir_id, filename, size, mtime_ns),
             ).fetchone()
-            attempts = (int(row["attempts"]) if row else 0) + 1
-            delay = RETRY_INTERVAL_SECONDS * (2 ** (attempts - 1))
-            next_retry_at = now + min(RETRY_MAX_INTERVAL_SECONDS, delay)
-            with self._conn:
-                self._conn.execute(
-                    """INSERT INTO screenshots (path, status, first_seen_at, last_attempt_at, next_retry_at, attempts, last_error)
-                       VALUES (?, 'pending', ?, ?, ?, ?, ?)
-                       ON CONFLICT(path) DO UPDATE SET
-                           status='pending', last_attempt_at=excluded.last_attempt_at,
-                           next_retry_at=excluded.next_retry_at, attempts=excluded.attempts,
-                           last_error=excluded.last_error, sent_at=NULL""",
-                    (path, now, now, next_retry_at, attempts, error),
+            return row["content_hash"] if row else None
+
+    def set_content_hash(
+        self, path: str, content_hash: str, size: Optional[int] = None, mtime_ns: Optional[int] = None
+    ) -> None:
+        """Store the content hash of ``path``, with the file size and mtime it was taken at, if known."""
+        directory, filename = os.path.split(path)
+        with self._lock:
+            dir_id = self._dir_id(directory, create=False)
+            if dir_id is not None:
+                self._write(
+                    """UPDATE screenshots SET content_hash = ?, hashed_size = ?, hashed_mtime_ns = ?
+                       WHERE dir_id = ? AND filename = ?""",
+                    (content_hash, size, mtime_ns, dir_id, filename),
                 )
-            return next_retry_at
+
+    def is_pending(self, path: str) -> bool:
+        """Whether ``path`` is tracked and still pending.
+
+        Asks the writer connection, so transitions waiting for their group
+        commit are already taken into account.
+        """
+        directory, filename = os.path.split(path)
+        with self._lock:
+            dir_id = self._dir_id(directory, create=False)
+            if dir_id is None:
+                return False
+            row = self._conn.execute(
+                "SELECT status FROM screenshots WHERE dir_id = ? AND filename = ?", (dir_id, filename)
+            ).fetchone()
+            return row is not None and row["status"] == STATUS_PENDING
+
+    def find_sent_by_hash(self, content_hash: str) -> Optional[str]:
+        """Return the path of a sent screenshot with this content, if any."""
+        with self._lock:
+            row = self._conn.execute(
+                f"""SELECT d.path, s.filename FROM screenshots s JOIN dirs d ON d.id = s.dir_id
+                    WHERE s.content_hash = ? AND s.status={STATUS_SENT} LIMIT 1""",
+                (content_hash,),
+            ).fetchone()
+            return os.path.join(row["path"], row["filename"]) if row else None
+
+    def rename(self, src: str, dest: str) -> Optional[str]:
+        """Move the row for ``src`` to ``dest`` in place.
+
+        Returns the row's status, or None if ``src`` is not tracked. A pruned
+        ``src`` hands its tombstone over to ``dest`` and reports "sent".
+        """
+        src_dir, src_name = os.path.split(src)
+        dest_dir, dest_name = os.path.split(dest)
+        with self._lock:
+            src_id = self._dir_id(src_dir, create=False)
+            row = None
+            if src_id is not None:
+                row = self._conn.execute(
+                    "SELECT rowid, status FROM screenshots WHERE dir_id = ? AND filename = ?", (src_id, src_name)
+                ).fetchone()
+            if row is None:
+                if self._conn.execute(
+                    "SELECT 1 FROM sent_tombstones WHERE path_hash = ?", (_path_key(src),)
+                ).fetchone() is None:
+                    return None
+                with self._conn:
+                    self._conn.execute("DELETE FROM sent_tombstones WHERE path_hash = ?", (_path_key(src),))
+                    self._conn.execute(
+                        "INSERT OR IGNORE INTO sent_tombstones (path_hash) VALUES (?)", (_path_key(dest),)
+                    )
+                return "sent"
+            dest_id = self._dir_id(dest_dir)
+            self._write("DELETE FROM screenshots WHERE dir_id = ? AND filename = ?", (dest_id, dest_name))
+            self._write(
+                "UPDATE screenshots SET dir_id = ?, filename = ? WHERE rowid = ?", (dest_id, dest_name, row["rowid"])
+            )
+            return _STATUS_NAMES[row["status"]]
 
     def get_due_pending(self, now: Optional[float] = None) -> List[PendingItem]:
+        return list(self.iter_due_pending(now))
+
+    def iter_due_pending(self, now: Optional[float] = None, page_size: int = STATE_PAGE_SIZE) -> Iterator[PendingItem]:
+        """Stream the pending rows due by ``now``, earliest ``next_retry_at`` first.
+
+        Rows are read a page at a time with keyset pagination on
+        (next_retry_at, dir_id, filename), the order of ``idx_pending_retry``,
+        so every page is one index range scan on a fresh reader snapshot. The
+        next page is only read once the caller has consumed the previous one.
+        A row rescheduled while the stream is open moves past ``now`` and is
+        not returned again.
+        """
         if now is None:
             now = time.time()
+        key: Tuple[float, int, str] = (float("-inf"), -1, "")
+        while True:
+            with self._reader() as conn:
+                rows = conn.execute(
+                    f"""SELECT s.next_retry_at, s.dir_id, s.filename, s.attempts, d.path
+                        FROM screenshots s JOIN dirs d ON d.id = s.dir_id
+                        WHERE s.status={STATUS_PENDING} AND s.next_retry_at <= ?
+                          AND (s.next_retry_at, s.dir_id, s.filename) > (?, ?, ?)
+                        ORDER BY s.next_retry_at, s.dir_id, s.filename
+                        LIMIT ?""",
+                    (now, *key, page_size),
+                ).fetchall()
+            for r in rows:
+                yield PendingItem(
+                    path=os.path.join(r["path"], r["filename"]),
+                    attempt=int(r["attempts"]),
+                    next_retry_at=float(r["next_retry_at"]),
+                )
+            if len(rows) < page_size:
+                return
+            last = rows[-1]
+            key = (last["next_retry_at"], last["dir_id"], last["filename"])
+
+    def next_retry_at(self, after: Optional[float] = None) -> Optional[float]:
+        """Earliest pending retry deadline (strictly after ``after``, if given)."""
         with self._lock:
-            rows = self._conn.execute(
-                "SELECT path, attempts, next_retry_at FROM screenshots WHERE status='pending' AND next_retry_at <= ?",
-                (now,),
+            row = self._conn.execute(
+                f"SELECT MIN(next_retry_at) FROM screenshots WHERE status={STATUS_PENDING} AND next_retry_at > ?",
+                (float("-inf") if after is None else after,),
+            ).fetchone()
+            return None if row[0] is None else float(row[0])
+
+    def counts_by_appid(self) -> dict[Optional[str], dict[str, int]]:
+        """Tracked screenshots per appid, as {appid: {"pending": n, "sent": n}}.
+
+        Answered from ``idx_dir_status`` and the small dirs table, without
+        reading the screenshot rows. Pruned records are not counted.
+        """
+        with self._reader() as conn:
+            rows = conn.execute(
+                """SELECT d.appid, s.status, COUNT(*) AS n
+                   FROM screenshots s JOIN dirs d ON d.id = s.dir_id
+                   GROUP BY d.appid, s.status"""
             ).fetchall()
-            return [
-                PendingItem(path=r["path"], attempt=int(r["attempts"]), next_retry_at=float(r["next_retry_at"] or 0))
-                for r in rows
-            ]
+        counts: dict[Optional[str], dict[str, int]] = {}
+        for r in rows:
+            entry = counts.setdefault(r["appid"], {name: 0 for name in _STATUS_NAMES.values()})
+            entry[_STATUS_NAMES[r["status"]]] += r["n"]
+        return counts
 
-    def cleanup_missing(self, known_paths: set[str]) -> int:
+    def cleanup_missing(self, known_paths: AbstractSet[str], seen_before: Optional[float] = None) -> int:
+        """Delete pending rows whose files are no longer on disk.
+
+        Only pending rows can be removed, so the diff walks the covering
+        ``idx_pending_retry`` index instead of copying the whole table, and
+        deletes the missing rows with a single statement. The scan runs on this
+        thread's reader connection; the writer is only taken for the DELETE.
+
+        ``seen_before`` limits the cleanup to rows first seen before that time,
+        typically the start of the scan that produced ``known_paths``, so files
+        discovered by live events while it ran are kept.
+        """
+        sql = f"""SELECT s.rowid, d.path, s.filename FROM screenshots s JOIN dirs d ON d.id = s.dir_id
+                  WHERE s.status={STATUS_PENDING}"""
+        params: Tuple[float, ...] = ()
+        if seen_before is not None:
+            sql += " AND (s.first_seen_at IS NULL OR s.first_seen_at < ?)"
+            params = (seen_before,)
+        # Transitions recorded after the snapshot are re-checked by the DELETE
+        with self._reader() as conn:
+            rows = conn.execute(sql, params).fetchall()
+        missing = [r["rowid"] for r in rows if os.path.join(r["path"], r["filename"]) not in known_paths]
+        if not missing:
+            return 0
         with self._lock:
-            rows = self._conn.execute(
-                "SELECT path FROM screenshots"
-            ).fetchall()
-            removable = [r["path"] for r in rows if r["path"] not in known_paths]
-            if not removable:
-                return 0
             with self._conn:
-                self._conn.executemany(
-                    "DELETE FROM screenshots WHERE path = ?",
-                    [(p,) for p in removable],
-                )
-            return len(removable)
+                return self._conn.execute(
+                    f"""DELETE FROM screenshots
+                        WHERE status={STATUS_PENDING} AND rowid IN (SELECT value FROM json_each(?))""",
+                    (json.dumps(missing),),
+                ).rowcount
+
+    def unsent(self, paths: Iterable[str]) -> List[str]:
+        """Return the paths that are neither sent nor pruned, checked in one read.
+
+        Lets a rescan skip the write ``mark_discovered`` would make for a file
+        that is already done with.
+        """
+        entries = [[_path_key(path), *os.path.split(path)] for path in paths]
+        if not entries:
+            return []
+        with self._reader() as conn:
+            rows = conn.execute(
+                f"""SELECT j.key FROM json_each(?) j
+                    WHERE NOT EXISTS (
+                        SELECT 1 FROM sent_tombstones WHERE path_hash = json_extract(j.value, '$[0]')
+                    )
+                    AND NOT EXISTS (
+                        SELECT 1 FROM dirs d JOIN screenshots s ON s.dir_id = d.id
+                        WHERE d.path = json_extract(j.value, '$[1]') AND s.filename = json_extract(j.value, '$[2]')
+                          AND s.status = {STATUS_SENT}
+                    )""",
+                (json.dumps(entries),),
+            ).fetchall()
+        return [os.path.join(entries[r[0]][1], entries[r[0]][2]) for r in rows]
 
-    def preregister_startup(self, path_mtimes: dict[str, float]) -> int:
+    def preregister_startup(self, path_mtimes: Union[Mapping[str, float], Iterable[Tuple[str, float]]]) -> int:
         """Register unknown files on startup based on mtime vs DB creation time.
 
+        ``path_mtimes`` is a path → mtime mapping or an iterable of such pairs,
+        normally only the files the startup scan found in re-listed directories.
+        Tracked and pruned paths are skipped by the insert itself, so nothing
+        is read back into Python.
         Files older than DB → mark as sent (existed before tracking started).
         Files newer than DB → mark as pending (created while container was down).
         Returns count of files marked as pending (will be sent).
         """
+        pairs = path_mtimes.items() if isinstance(path_mtimes, Mapping) else path_mtimes
         now = time.time()
+        sent_rows = []
+        pending_rows = []
+        for path, mtime in pairs:
+            if mtime < self._startup_cutoff:
+                sent_rows.append((path, STATUS_SENT, mtime, now, None, 0, None, now))
+            else:
+                pending_rows.append((path, STATUS_PENDING, mtime, None, now, 0, None, None))
         with self._lock:
-            existing = {
-                r["path"]
-                for r in self._conn.execute("SELECT path FROM screenshots").fetchall()
-            }
-            sent_rows = []
-            pending_rows = []
-            for path, mtime in path_mtimes.items():
-                if path in existing:
-                    continue
-                if mtime < self._startup_cutoff:
-                    sent_rows.append((path, "sent", mtime, now, None, 0, None, now))
-                else:
-                    pending_rows.append((path, "pending", mtime, None, now, 0, None, None))
-            insert_sql = "INSERT OR IGNORE INTO screenshots VALUES (?,?,?,?,?,?,?,?)"
             with self._conn:
                 if sent_rows:
-                    self._conn.executemany(insert_sql, sent_rows)
+                    self._insert_rows(sent_rows)
                 if pending_rows:
-                    self._conn.executemany(insert_sql, pending_rows)
-            return len(pending_rows)
+                    return self._insert_rows(pending_rows)
+        return 0
 
-    def update_heartbeat(self) -> None:
+    def get_app_name(self, appid: str) -> Optional[Tuple[Optional[str], float]]:
+        """Return the cached (name, fetched_at) for an appid; name is None for a negative entry."""
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT name, fetched_at FROM steam_apps WHERE appid = ?", (appid,)
+            ).fetchone()
+            return (row["name"], float(row["fetched_at"])) if row else None
+
+    def put_app_name(self, appid: str, name: Optional[str], fetched_at: Optional[float] = None) -> None:
         with self._lock:
             with self._conn:
                 self._conn.execute(
-                    "INSERT OR REPLACE INTO metadata (key, value) VALUES ('last_shutdown_at', ?)",
-                    (str(time.time()),),
+                    "INSERT OR REPLACE INTO steam_apps (appid, name, fetched_at) VALUES (?, ?, ?)",
+                    (appid, name, time.time() if fetched_at is None else fetched_at),
+                )
+
+    def save_scan_dirs(self, dirs: Iterable[ScanDir]) -> None:
+        """Persist the per-directory scan snapshot.
+
+        Only directories that changed since the last save or load are written;
+        an unchanged directory still holds the very same file list.
+        """
+        current = {d.path: d for d in dirs}
+        with self._lock:
+            changed = [d for path, d in current.items() if self._scan_dirs.get(path) != d]
+            removed = [path for path in self._scan_dirs if path not in current]
+            with self._conn:
+                self._conn.executemany(
+                    """INSERT OR REPLACE INTO scan_dirs (path, mtime_ns, subdirs, names, offsets, sizes, mtimes)
+                       VALUES (?, ?, ?, ?, ?, ?, ?)""",
+                    [(d.path, d.mtime_ns, json.dumps(list(d.subdirs)), *d.files.to_blobs()) for d in changed],
                 )
+                if removed or not self._scan_dirs:
+                    # Nothing loaded or saved yet: clear rows left by an earlier run
+                    self._conn.execute(
+                        "DELETE FROM scan_dirs WHERE path NOT IN (SELECT value FROM json_each(?))",
+                        (json.dumps(list(current)),),
+                    )
+            self._scan_dirs = current
+
+    def load_scan_dirs(self) -> List[ScanDir]:
+        """Return the persisted scan snapshot, one packed file list per directory.
+
+        A directory whose stored list is damaged is left out, so the next scan
+        lists it afresh.
+        """
+        with self._reader() as conn:
+            rows = conn.execute(
+                "SELECT path, mtime_ns, subdirs, names, offsets, sizes, mtimes FROM scan_dirs"
+            ).fetchall()
+        result = []
+        for r in rows:
+            try:
+                files = FileList.from_blobs(r["names"], r["offsets"], r["sizes"], r["mtimes"])
+            except ValueError:
+                continue
+            result.append(ScanDir(r["path"], r["mtime_ns"], tuple(json.loads(r["subdirs"])), files))
+        with self._lock:
+            self._scan_dirs = {d.path: d for d in result}
+        return result
+
+    def prune_sent(self, retention: float, batch_size: int = STATE_PRUNE_BATCH_SIZE) -> int:
+        """Delete sent rows older than ``retention`` seconds, leaving tombstones; returns the count.
+
+        Works in batches of ``batch_size``, each in its own transaction, so
+        writers get the lock between batches. Freed pages are then returned
+        to the filesystem with an incremental vacuum.
+        """
+        cutoff = time.time() - retention
+        pruned = 0
+        while True:
+            with self._lock:
+                with self._conn:
+                    rows = self._conn.execute(
+                        f"""SELECT s.rowid, d.path, s.filename FROM screenshots s JOIN dirs d ON d.id = s.dir_id
+                            WHERE s.status={STATUS_SENT} AND s.sent_at < ? LIMIT ?""",
+                        (cutoff, batch_size),
+                    ).fetchall()
+                    if not rows:
+                        break
+                    self._conn.executemany(
+                        "INSERT OR IGNORE INTO sent_tombstones (path_hash) VALUES (?)",
+                        [(_path_key(os.path.join(r["path"], r["filename"])),) for r in rows],
+                    )
+                    self._conn.execute(
+                        "DELETE FROM screenshots WHERE rowid IN (SELECT value FROM json_each(?))",
+                        (json.dumps([r["rowid"] for r in rows]),),
+                    )
+            pruned += len(rows)
+            if len(rows) < batch_size:
+                break
+        if pruned:
+            logging.info("Pruned %s sent records older than %.0fs", pruned, retention)
+        self._vacuum()
+        return pruned
+
+    def _vacuum(self, batch_pages: int = STATE_VACUUM_BATCH_PAGES) -> None:
+        """Return free pages to the filesystem ``batch_pages`` at a time, releasing the writer between steps."""
+        previous = None
+        while True:
+            with self._lock:
+                self._dirty.clear()
+                self._conn.commit()
+                try:
+                    free = self._conn.execute("PRAGMA freelist_count").fetchone()[0]
+                    # Stops once nothing is free, or if a step freed nothing (no incremental mode)
+                    if not free or (previous is not None and free >= previous):
+                        return
+                    # executescript steps the pragma to completion
+                    self._conn.executescript(f"PRAGMA incremental_vacuum({int(batch_pages)});")
+                except sqlite3.OperationalError as e:
+                    logging.warning("State DB vacuum skipped: %s", e)
+                    return
+            previous = free
+
+    def update_heartbeat(self) -> None:
+        with self._lock:
+            self._write(
+                "INSERT OR REPLACE INTO metadata (key, value) VALUES ('last_shutdown_at', ?)",
+                (str(time.time()),),
+            )
+
+    def flush(self) -> None:
+        """Commit any transitions still waiting for the next group commit."""
+        with self._lock:
+            self._dirty.clear()
+            self._conn.commit()
 
     def close(self) -> None:
         self.update_heartbeat()
+        self._closing.set()
+        self._dirty.set()
+        if self._committer is not None:
+            self._committer.join(timeout=5)
+        self.flush()
+        with self._readers_lock:
+            for conn in self._readers:
+                conn.close()
+            self._readers.clear()
         self._conn.close()
 
+    @contextmanager
+    def _reader(self) -> Iterator[sqlite3.Connection]:
+        """This thread's read-only connection, inside one snapshot transaction.
+
+        Readers never hold ``self._lock`` while they read, so a long scan does
+        not hold up writes. Transitions still waiting for their group commit
+        are committed first, so a reader sees every write made before it
+        started (a due-retry query must never miss a recorded send).
+        """
+        if self._dirty.is_set():
+            self.flush()
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(self._path, check_same_thread=False)
+            conn.row_factory = sqlite3.Row
+            conn.execute("PRAGMA query_only=ON")
+            self._local.conn = conn
+            with self._readers_lock:
+                self._readers.append(conn)
+        conn.execute("BEGIN")
+        try:
+            yield conn
+        finally:
+            conn.rollback()
+
+    def _dir_id(self, directory: str, create: bool = True) -> Optional[int]:
+        """Id of ``directory`` in the dirs table, inserting it if ``create``; the caller holds ``self._lock``."""
+        dir_id = self._dir_ids.get(directory)
+        if dir_id is None:
+            if create:
+                self._conn.execute(
+                    "INSERT OR IGNORE INTO dirs (path, appid) VALUES (?, ?)",
+                    (directory, extract_appid_from_dir(directory)),
+                )
+            row = self._conn.execute("SELECT id FROM dirs WHERE path = ?", (directory,)).fetchone()
+            if row is None:
+                return None
+            dir_id = self._dir_ids[directory] = row["id"]
+        return dir_id
+
+    def _insert_rows(self, rows: Iterable[Tuple]) -> int:
+        """Insert (path, status, ...) rows in ``_COLUMNS`` order, skipping tracked and pruned paths.
+
+        Returns the count inserted. The caller holds ``self._lock`` and commits.
+        """
+        # OR IGNORE skips tracked paths; the tombstone check skips pruned ones
+        params = [
+            (self._dir_id(os.path.dirname(r[0])), os.path.basename(r[0]), *r[1:], _path_key(r[0])) for r in rows
+        ]
+        return self._conn.executemany(
+            f"""INSERT OR IGNORE INTO screenshots ({self._COLUMNS}) SELECT ?,?,?,?,?,?,?,?,?
+                WHERE NOT EXISTS (SELECT 1 FROM sent_tombstones WHERE path_hash = ?)""",
+            params,
+        ).rowcount
+
+    def _write(self, sql: str, params: Union[Tuple, dict] = ()) -> List[sqlite3.Row]:
+        """Run one state transition and return its RETURNING rows; the caller holds ``self._lock``.
+
+        In "immediate" mode the transition is committed here. In "batched"
+        mode it joins the open transaction, which ``_commit_loop`` commits
+        together with everything else written in the same interval.
+        """
+        rows = self._conn.execute(sql, params).fetchall()
+        if self._durability == "immediate":
+            self._conn.commit()
+        else:
+            self._dirty.set()
+        return rows
+
+    def _commit_loop(self) -> None:
+        while not self._closing.is_set():
+            self._dirty.wait()
+            # Let the interval's transitions pile up into one commit
+            self._closing.wait(STATE_COMMIT_INTERVAL_SECONDS)
+            self.flush()
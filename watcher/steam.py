@@ -1,21 +1,132 @@
 from __future__ import annotations
 
 import logging
-from typing import Optional
+import sqlite3
+import threading
+import time
+from typing import Iterable, Optional, Protocol, Tuple
 
 import requests
 
-from watcher.config import STEAM_CC, STEAM_LANG, STEAM_TIMEOUT_SECONDS
+from watcher.config import (
+    STEAM_CACHE_TTL_SECONDS,
+    STEAM_CC,
+    STEAM_ERROR_TTL_SECONDS,
+    STEAM_LANG,
+    STEAM_NEGATIVE_TTL_SECONDS,
+    STEAM_TIMEOUT_SECONDS,
+)
+from watcher.applist import AppListIndex
+from watcher.paths import is_shortcut_appid
+from watcher.shortcuts import ShortcutResolver
+
+
+class AppNameCache(Protocol):
+    def get_app_name(self, appid: str) -> Optional[Tuple[Optional[str], float]]: ...
+
+    def put_app_name(self, appid: str, name: Optional[str], fetched_at: Optional[float] = None) -> None: ...
 
 
 class SteamResolver:
-    def __init__(self) -> None:
+    """Resolve appids to game names via the Steam store, with a persistent cache.
+
+    Names are cached for STEAM_CACHE_TTL_SECONDS and definite misses (delisted
+    apps, shortcuts) for STEAM_NEGATIVE_TTL_SECONDS, both in ``cache`` so they
+    survive restarts. Network errors are only remembered in memory, for
+    STEAM_ERROR_TTL_SECONDS. Concurrent lookups of one appid share a request.
+    An optional offline ``app_list`` is consulted first; the store is only
+    queried for appids it does not contain. Non-Steam shortcut IDs never reach
+    the store: they are named from ``shortcuts`` or left unresolved.
+    """
+
+    def __init__(
+        self,
+        cache: Optional[AppNameCache] = None,
+        app_list: Optional[AppListIndex] = None,
+        shortcuts: Optional[ShortcutResolver] = None,
+    ) -> None:
         self._session = requests.Session()
-        self._cache: dict[str, str] = {}
+        self._store = cache
+        self._app_list = app_list
+        self._shortcuts = shortcuts
+        # appid -> (name or None, expires_at)
+        self._cache: dict[str, Tuple[Optional[str], float]] = {}
+        self._inflight: dict[str, threading.Event] = {}
+        self._lock = threading.Lock()
 
     def resolve_game_name(self, appid: str) -> Optional[str]:
-        if appid in self._cache:
-            return self._cache[appid]
+        if is_shortcut_appid(appid):
+            return self._shortcuts.lookup(appid) if self._shortcuts else None
+        if self._app_list is not None:
+            name = self._app_list.lookup(appid)
+            if name:
+                return name
+        while True:
+            with self._lock:
+                cached = self._cache.get(appid)
+                if cached is not None and cached[1] > time.time():
+                    return cached[0]
+                event = self._inflight.get(appid)
+                leader = event is None
+                if leader:
+                    event = self._inflight[appid] = threading.Event()
+            if leader:
+                break
+            event.wait(STEAM_TIMEOUT_SECONDS * 2)
+        try:
+            return self._load(appid)
+        finally:
+            with self._lock:
+                del self._inflight[appid]
+            event.set()
+
+    def warm(self, appids: Iterable[str], stop: Optional[threading.Event] = None) -> None:
+        """Resolve every appid not already cached, e.g. those found in the screenshot tree.
+
+        Returns early once ``stop`` is set, leaving at most the current lookup to finish.
+        """
+        for appid in appids:
+            if stop is not None and stop.is_set():
+                return
+            self.resolve_game_name(appid)
+
+    def close(self) -> None:
+        self._session.close()
+        if self._app_list is not None:
+            self._app_list.close()
+
+    def _load(self, appid: str) -> Optional[str]:
+        now = time.time()
+        stale: Optional[str] = None
+        stored = self._store.get_app_name(appid) if self._store else None
+        if stored is not None:
+            name, fetched_at = stored
+            ttl = STEAM_CACHE_TTL_SECONDS if name else STEAM_NEGATIVE_TTL_SECONDS
+            if fetched_at + ttl > now:
+                self._remember(appid, name, fetched_at + ttl)
+                return name
+            stale = name
+        found, name = self._fetch(appid)
+        if found is None:
+            # Transient failure: keep using a stale name, retry the store later
+            self._remember(appid, stale, now + STEAM_ERROR_TTL_SECONDS)
+            return stale
+        if self._store:
+            try:
+                self._store.put_app_name(appid, name, now)
+            except sqlite3.ProgrammingError:
+                # The store was closed while the request ran, at shutdown
+                logging.info("Not caching the name of appid=%s, the state store is closed", appid)
+        ttl = STEAM_CACHE_TTL_SECONDS if name else STEAM_NEGATIVE_TTL_SECONDS
+        self._remember(appid, name, now + ttl)
+        return name
+
+    def _remember(self, appid: str, name: Optional[str], expires_at: float) -> None:
+        with self._lock:
+            self._cache[appid] = (name, expires_at)
+
+    def _fetch(self, appid: str) -> Tuple[Optional[bool], Optional[str]]:
+        """Query appdetails; returns (found, name), with found=None on transient errors."""
         try:
             resp = self._session.get(
                 "https://store.steampowered.com/api/appdetails",
@@ -24,21 +135,17 @@ class SteamResolver:
             )
             if resp.status_code != 200:
                 logging.warning("Steam appdetails non-200 for appid=%s: status=%s", appid, resp.status_code)
-                return None
+                return None, None
             data = resp.json()
-            entry = data.get(str(appid))
+            entry = data.get(str(appid)) if data else None
             if not entry or not entry.get("success"):
                 logging.info("Steam appdetails unresolved for appid=%s (lang=%s, cc=%s)", appid, STEAM_LANG, STEAM_CC)
-                return None
+                return False, None
             name = entry.get("data", {}).get("name")
-            if name:
-                self._cache[appid] = name
-            else:
+            if not name:
                 logging.info("Steam appdetails has no name for appid=%s (lang=%s, cc=%s)", appid, STEAM_LANG, STEAM_CC)
-            return name
+                return False, None
+            return True, name
         except Exception as exc:
             logging.exception("Steam appdetails request failed for appid=%s: %s", appid, exc)
-            return None
-
-    def close(self) -> None:
-        self._session.close()
+            return None, None
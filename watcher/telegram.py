@@ -1,8 +1,10 @@
 from __future__ import annotations
 
+import json
 import logging
+import os
 import time
-from typing import Optional
+from typing import Dict, List, Optional
 
 import requests
 from requests import Response
@@ -11,11 +13,17 @@ from requests.exceptions import RequestException
 from watcher.config import (
     TELEGRAM_BACKOFF_SECONDS,
     TELEGRAM_CAPTION_LIMIT,
+    TELEGRAM_CHAT_BURST,
+    TELEGRAM_CHAT_RATE_PER_SECOND,
     TELEGRAM_CONNECT_TIMEOUT_SECONDS,
+    TELEGRAM_GLOBAL_BURST,
+    TELEGRAM_GLOBAL_RATE_PER_SECOND,
     TELEGRAM_READ_TIMEOUT_SECONDS,
     TELEGRAM_SEND_ATTEMPTS,
     TelegramConfig,
 )
+from watcher.multipart import MultipartEncoder
+from watcher.ratelimit import RateLimiter
 
 
 class TelegramSender:
@@ -25,63 +33,123 @@ class TelegramSender:
         if config.proxy_url:
             self._session.proxies = {"http": config.proxy_url, "https": config.proxy_url}
             logging.info("Telegram sender using proxy: %s", config.proxy_url)
-        self._url = f"https://api.telegram.org/bot{config.bot_token}/sendPhoto"
+        self._api_url = f"https://api.telegram.org/bot{config.bot_token}"
+        # Shared by every sender worker so they never exceed Telegram's limits together
+        self._limiter = RateLimiter(
+            TELEGRAM_CHAT_RATE_PER_SECOND,
+            TELEGRAM_CHAT_BURST,
+            TELEGRAM_GLOBAL_RATE_PER_SECOND,
+            TELEGRAM_GLOBAL_BURST,
+        )
 
     def send_photo(self, path: str, caption: Optional[str]) -> bool:
         caption = self._truncate_caption(caption)
         payload = {"chat_id": self._chat_id, "caption": caption} if caption else {"chat_id": self._chat_id}
+        resp = self._post("sendPhoto", payload, {"photo": path})
+        return resp is not None and resp.status_code == 200
+
+    def send_media_group(self, paths: List[str], caption: Optional[str]) -> List[bool]:
+        """Send photos as one album, captioned on the first item.
+
+        Returns one result per path. If Telegram rejects the album outright,
+        each photo is sent on its own so a single bad file does not fail the rest.
+        """
+        if len(paths) == 1:
+            return [self.send_photo(paths[0], caption)]
+        truncated = self._truncate_caption(caption)
+        media = []
+        for i in range(len(paths)):
+            item = {"type": "photo", "media": f"attach://photo{i}"}
+            if i == 0 and truncated:
+                item["caption"] = truncated
+            media.append(item)
+        payload = {"chat_id": self._chat_id, "media": json.dumps(media, ensure_ascii=False)}
+        resp = self._post("sendMediaGroup", payload, {f"photo{i}": path for i, path in enumerate(paths)})
+        if resp is not None and resp.status_code == 200:
+            return [True] * len(paths)
+        if resp is not None and resp.status_code != 429 and resp.status_code < 500:
+            logging.warning("Telegram rejected album of %s photos, sending them individually", len(paths))
+            return [self.send_photo(path, caption) for path in paths]
+        return [False] * len(paths)
+
+    def close(self) -> None:
+        self._session.close()
+
+    def _post(self, method: str, payload: Dict[str, str], files: Dict[str, str]) -> Optional[Response]:
+        """POST to the Bot API with retries.
+
+        Returns the final response, or None if every attempt hit a network error.
+        """
         for attempt in range(1, TELEGRAM_SEND_ATTEMPTS + 1):
+            self._limiter.acquire()
             try:
-                with open(path, "rb") as image:
+                # Rebuilt per attempt: the body is a one-shot stream
+                with MultipartEncoder(payload, files, label=f"{method} {self._describe(files)}") as body:
                     resp = self._session.post(
-                        self._url,
-                        data=payload,
-                        files={"photo": image},
+                        f"{self._api_url}/{method}",
+                        data=body,
+                        headers={"Content-Type": body.content_type},
                         timeout=(TELEGRAM_CONNECT_TIMEOUT_SECONDS, TELEGRAM_READ_TIMEOUT_SECONDS),
                     )
             except RequestException as exc:
                 if attempt == TELEGRAM_SEND_ATTEMPTS:
                     logging.error(
-                        "Telegram sendPhoto failed on final attempt %s/%s due to network error: %s",
+                        "Telegram %s failed on final attempt %s/%s due to network error: %s",
+                        method,
                         attempt,
                         TELEGRAM_SEND_ATTEMPTS,
                         exc,
                     )
-                    return False
-                self._log_and_backoff(attempt, f"network error: {exc}")
+                    return None
+                self._log_and_backoff(method, attempt, f"network error: {exc}")
                 continue
             if resp.status_code == 200:
-                return True
+                return resp
             if resp.status_code == 429 or resp.status_code >= 500:
+                retry_after = self._retry_after_from_response(resp)
+                if retry_after:
+                    # Close the bucket for every worker, not just this one
+                    self._limiter.defer(retry_after)
                 if attempt == TELEGRAM_SEND_ATTEMPTS:
                     logging.error(
-                        "Telegram sendPhoto failed on final attempt %s/%s (%s): %s",
+                        "Telegram %s failed on final attempt %s/%s (%s): %s",
+                        method,
                         attempt,
                         TELEGRAM_SEND_ATTEMPTS,
                         resp.status_code,
                         resp.text,
                     )
-                    return False
-                wait = self._retry_after_from_response(resp) or TELEGRAM_BACKOFF_SECONDS * attempt
-                self._log_and_backoff(attempt, f"HTTP {resp.status_code}: {resp.text}", wait_seconds=wait)
+                    return resp
+                reason = f"HTTP {resp.status_code}: {resp.text}"
+                if retry_after:
+                    # The limiter makes the next acquire() wait out the cooldown
+                    self._log_retry(method, attempt, reason, retry_after)
+                else:
+                    self._log_and_backoff(method, attempt, reason)
                 continue
-            logging.error("Telegram sendPhoto failed (%s): %s", resp.status_code, resp.text)
-            return False
-        return False
+            logging.error("Telegram %s failed (%s): %s", method, resp.status_code, resp.text)
+            return resp
+        return None
 
-    def close(self) -> None:
-        self._session.close()
+    @staticmethod
+    def _describe(files: Dict[str, str]) -> str:
+        names = [os.path.basename(path) for path in files.values()]
+        return names[0] if len(names) == 1 else f"{len(names)} photos"
 
-    def _log_and_backoff(self, attempt: int, reason: str, wait_seconds: Optional[float] = None) -> None:
-        delay = TELEGRAM_BACKOFF_SECONDS * attempt if wait_seconds is None else wait_seconds
+    def _log_and_backoff(self, method: str, attempt: int, reason: str) -> None:
+        delay = TELEGRAM_BACKOFF_SECONDS * attempt
+        self._log_retry(method, attempt, reason, delay)
+        time.sleep(delay)
+
+    def _log_retry(self, method: str, attempt: int, reason: str, delay: float) -> None:
         logging.warning(
-            "Telegram sendPhoto failed, retry %s/%s in %.2fs: %s",
+            "Telegram %s failed, retry %s/%s in %.2fs: %s",
+            method,
             attempt,
             TELEGRAM_SEND_ATTEMPTS,
             delay,
             reason,
         )
-        time.sleep(delay)
 
     def _retry_after_from_response(self, resp: Response) -> Optional[float]:
         try:
@@ -0,0 +1,152 @@
+from __future__ import annotations
+
+import hashlib
+import logging
+import multiprocessing
+import os
+import time
+from concurrent.futures import Future, ProcessPoolExecutor
+from typing import Dict, List, Optional
+
+from watcher.config import (
+    TRANSCODE_JPEG_QUALITY,
+    TRANSCODE_MAX_SIDE,
+    TRANSCODE_MIN_SIDE,
+    TRANSCODE_TARGET_BYTES,
+    TRANSCODE_WORKERS,
+)
+from watcher.imagecheck import jpeg_dimensions, png_dimensions
+
+try:
+    from PIL import Image
+except ImportError:  # optional dependency
+    Image = None
+
+# Quality steps tried before the image is downscaled further
+_QUALITY_STEPS = (TRANSCODE_JPEG_QUALITY, 85, 75, 65)
+
+
+def _transcode(src: str, dest: str, target_bytes: int, max_side: int, min_side: int) -> str:
+    """Re-encode ``src`` as JPEG within ``target_bytes`` and ``max_side``; runs in a pool worker.
+
+    Raises ValueError if it does not fit even with its longest side at ``min_side``.
+    """
+    with Image.open(src) as image:
+        image = image.convert("RGB")
+        scale = min(1.0, max_side / max(image.size))
+        min_scale = min(scale, min_side / max(image.size))
+        tmp = dest + ".tmp"
+        try:
+            while True:
+                size = (max(1, int(image.width * scale)), max(1, int(image.height * scale)))
+                resized = image.resize(size, Image.LANCZOS) if scale < 1.0 else image
+                for quality in _QUALITY_STEPS:
+                    resized.save(tmp, "JPEG", quality=quality, optimize=True)
+                    if os.path.getsize(tmp) <= target_bytes:
+                        os.replace(tmp, dest)
+                        return dest
+                if scale <= min_scale:
+                    raise ValueError(f"does not fit in {target_bytes} bytes at {max(size)}px")
+                scale = max(min_scale, scale * 0.75)
+        finally:
+            if os.path.exists(tmp):
+                os.remove(tmp)
+
+
+class Transcoder:
+    """Shrink oversized screenshots before upload.
+
+    Work runs in a process pool so it does not compete with the sender threads
+    for the GIL. Output is cached on disk, keyed by source path, mtime and size,
+    so a retry reuses the earlier result. Requires Pillow; without it every
+    file is uploaded as-is.
+    """
+
+    def __init__(self, cache_dir: str, enabled: bool) -> None:
+        self._cache_dir = cache_dir
+        self._enabled = enabled and Image is not None
+        self._pool: Optional[ProcessPoolExecutor] = None
+        if enabled and Image is None:
+            logging.warning("Image transcoding is enabled but Pillow is not installed; sending originals")
+        if self._enabled:
+            os.makedirs(cache_dir, exist_ok=True)
+
+    def prepare(self, paths: List[str]) -> List[str]:
+        """Return the file to upload for each path: a cached transcode or the original."""
+        if not self._enabled:
+            return list(paths)
+        uploads = list(paths)
+        futures: Dict[int, Future] = {}
+        for i, path in enumerate(paths):
+            try:
+                stat = os.stat(path)
+            except OSError:
+                continue
+            if not self._needs_transcode(path, stat.st_size):
+                continue
+            dest = self._cache_path(path, stat)
+            if os.path.exists(dest):
+                uploads[i] = dest
+                continue
+            futures[i] = self._get_pool().submit(
+                _transcode, path, dest, TRANSCODE_TARGET_BYTES, TRANSCODE_MAX_SIDE, TRANSCODE_MIN_SIDE
+            )
+        for i, future in futures.items():
+            try:
+                uploads[i] = future.result()
+            except Exception as exc:
+                logging.warning("Transcoding failed for %s, sending original: %s", paths[i], exc)
+                continue
+            logging.info(
+                "Transcoded %s: %.1f KB -> %.1f KB",
+                os.path.basename(paths[i]),
+                os.path.getsize(paths[i]) / 1024,
+                os.path.getsize(uploads[i]) / 1024,
+            )
+        return uploads
+
+    def discard(self, upload_path: str, source_path: str) -> None:
+        """Drop a cached transcode once it has been delivered."""
+        if upload_path != source_path:
+            try:
+                os.remove(upload_path)
+            except OSError:
+                pass
+
+    def prune(self, max_age: float) -> int:
+        """Delete cache entries older than ``max_age`` seconds, e.g. for sources that vanished."""
+        if not self._enabled:
+            return 0
+        cutoff = time.time() - max_age
+        removed = 0
+        with os.scandir(self._cache_dir) as entries:
+            for entry in entries:
+                try:
+                    if entry.stat().st_mtime < cutoff:
+                        os.remove(entry.path)
+                        removed += 1
+                except OSError:
+                    continue
+        return removed
+
+    def close(self) -> None:
+        if self._pool is not None:
+            self._pool.shutdown(wait=False, cancel_futures=True)
+
+    def _needs_transcode(self, path: str, size: int) -> bool:
+        if size > TRANSCODE_TARGET_BYTES:
+            return True
+        dims = png_dimensions(path) or jpeg_dimensions(path)
+        return dims is not None and max(dims) > TRANSCODE_MAX_SIDE
+
+    def _cache_path(self, path: str, stat: os.stat_result) -> str:
+        key = hashlib.sha1(f"{path}\0{stat.st_mtime_ns}\0{stat.st_size}".encode("utf-8")).hexdigest()
+        return os.path.join(self._cache_dir, key + ".jpg")
+
+    def _get_pool(self) -> ProcessPoolExecutor:
+        if self._pool is None:
+            # spawn: forking a process that already runs sender threads is unsafe
+            self._pool = ProcessPoolExecutor(
+                max_workers=TRANSCODE_WORKERS, mp_context=multiprocessing.get_context("spawn")
+            )
+        return self._pool